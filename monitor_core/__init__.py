@@ -0,0 +1,6 @@
+"""Shared probing helpers for the Mosquitto / RabbitMQ monitor apps.
+
+The GUI scripts in ``mosquitto_monitoring``, ``mosquitto_password`` and
+``mqtt_rabbit_mq_cluster`` put the project root on ``sys.path`` and import
+from the modules in this package.
+"""
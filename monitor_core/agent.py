@@ -0,0 +1,545 @@
+"""Push-based host agent and the fleet aggregator that listens to it.
+
+    python -m monitor_core.agent --broker central:1883              # on every host
+    python -m monitor_core.agent --broker central:1883 --aggregate  # fleet view
+
+The agent takes a local snapshot every second (watched ports and their
+owners, broker processes with CPU/RSS, host CPU/memory) as a flat dict.
+Values are rounded so that noise is not a change. Only the keys that
+changed since the last snapshot are published:
+
+    <prefix>/<host>/state   retained full state, also the last will (offline)
+    <prefix>/<host>/delta   {"seq", "set", "del"} of one tick, or {"hb": seq}
+                            after ``heartbeat`` quiet seconds
+    <prefix>/<host>/resync  an aggregator asks for a fresh full state
+
+The aggregator subscribes to every host's state and delta topics and
+applies deltas in order. When it sees a gap in ``seq`` (or a heartbeat
+naming a seq it never got) it marks the host stale and asks for a
+resync. A quiet host therefore costs the central
+side nothing beyond the rare keyframe and keepalive.
+"""
+import argparse
+import json
+import os
+import select
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from monitor_core.mqtt_probe import (
+    CONNACK, PUBLISH, build_connect, build_publish, build_subscribe, new_client_id,
+    parse_publish, read_packet, split_packet)
+from monitor_core.port_snapshot import PortSnapshotService
+from monitor_core.process_watcher import get_process_watcher
+
+PINGREQ = b'\xc0\x00'
+DISCONNECT = b'\xe0\x00'
+
+DEFAULT_PREFIX = "monitor/agents"
+OFFLINE = b'{"online":false}'
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def topic_safe(name):
+    """Host id usable as one topic level"""
+    return "".join('_' if c in '/+#' else c for c in name) or "unknown"
+
+
+def quantize(value, step):
+    """Round to a multiple of step so small jitter does not make a delta"""
+    return int(round(value / step) * step) if value is not None else None
+
+
+def diff_state(old, new):
+    """Return (changed {key: value}, removed [key]) from old to new"""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+class MqttLink:
+    """Blocking MQTT 3.1.1 connection owned by one thread.
+
+    Enough client for the agent and the aggregator: QoS 0 publish and
+    subscribe, retained messages, a last will, and ``poll()`` which waits
+    for incoming publishes and keeps the session alive with PINGREQ.
+    """
+
+    def __init__(self, host, port, client_id, username=None, password=None, keepalive=30, will=None):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.will = will
+        self.sock = None
+        self._buffer = bytearray()
+        self._packet_id = 0
+        self._last_sent = 0.0
+
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.messages_received = 0
+        self.bytes_received = 0
+
+    def connect(self, timeout=2.0):
+        sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(build_connect(self.client_id, keepalive=self.keepalive, username=self.username,
+                                       password=self.password, will=self.will))
+            header, body = read_packet(sock, time.perf_counter() + timeout)
+            if header & 0xF0 != CONNACK or len(body) < 2 or body[1] != 0:
+                raise ConnectionError(f"CONNACK refused ({body[1] if len(body) > 1 else '?'})")
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(timeout)
+        self.sock = sock
+        self._buffer.clear()
+        self._last_sent = time.monotonic()
+
+    def _send(self, packet):
+        self.sock.sendall(packet)
+        self._last_sent = time.monotonic()
+
+    def publish(self, topic, payload, retain=False):
+        self._send(build_publish(topic, payload, retain=retain))
+        self.messages_sent += 1
+        self.bytes_sent += len(payload)
+
+    def subscribe(self, *topics):
+        for topic in topics:
+            self._packet_id = self._packet_id % 0xFFFF + 1
+            self._send(build_subscribe(self._packet_id, topic))
+
+    def poll(self, timeout):
+        """Wait up to timeout for data; return the [(topic, payload)] that arrived"""
+        if time.monotonic() - self._last_sent >= self.keepalive / 2:
+            self._send(PINGREQ)
+        readable, _, _ = select.select([self.sock], [], [], max(0.0, timeout))
+        if not readable:
+            return []
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("Broker closed the connection")
+        self._buffer += data
+        messages = []
+        while True:
+            packet = split_packet(self._buffer)
+            if packet is None:
+                return messages
+            header, body, consumed = packet
+            del self._buffer[:consumed]
+            if header & 0xF0 == PUBLISH:
+                topic, payload = parse_publish(header, body)
+                self.messages_received += 1
+                self.bytes_received += len(payload)
+                messages.append((topic, payload))
+
+    def close(self, disconnect=True):
+        sock, self.sock = self.sock, None
+        if sock is None:
+            return
+        try:
+            if disconnect:
+                sock.sendall(DISCONNECT)
+        except OSError:
+            pass
+        sock.close()
+
+
+class LocalCollector:
+    """Snapshot of this host as a flat dict, the unit the agent diffs.
+
+    Keys: ``port/<n>`` -> [pid, name] for watched ports that listen,
+    ``proc/<pid>`` -> [family, name, cpu %, rss MB] per broker process,
+    ``host/cpu`` and ``host/mem`` in percent. CPU is rounded to
+    ``cpu_step`` percent and RSS to ``rss_step`` MB.
+    """
+
+    def __init__(self, ports=(1883,), port_snapshots=None, process_watcher=None,
+                 cpu_step=5, rss_step=8):
+        self.ports = tuple(ports)
+        self.port_snapshots = port_snapshots or PortSnapshotService(interval=0.5)
+        self.process_watcher = process_watcher or get_process_watcher()
+        self.cpu_step = cpu_step
+        self.rss_step = rss_step
+        self._processes = {}    # pid -> psutil.Process (cpu_percent butuh objek yang sama)
+        psutil.cpu_percent(None)
+
+    def __call__(self):
+        state = {}
+        snapshot = self.port_snapshots.get()
+        for port in self.ports:
+            listener = snapshot.lookup(port)
+            if listener:
+                state[f"port/{port}"] = [listener.pid, listener.name]
+
+        live = {}
+        for family in self.process_watcher.families:
+            for pid, name in self.process_watcher.running(family):
+                live[pid] = (family, name)
+        for pid in list(self._processes):
+            if pid not in live:
+                del self._processes[pid]
+        for pid, (family, name) in live.items():
+            proc = self._processes.get(pid)
+            try:
+                if proc is None:
+                    proc = self._processes[pid] = psutil.Process(pid)
+                    proc.cpu_percent(None)
+                with proc.oneshot():
+                    cpu = proc.cpu_percent(None)
+                    rss = proc.memory_info().rss / 1_048_576
+            except psutil.Error:
+                self._processes.pop(pid, None)
+                continue
+            state[f"proc/{pid}"] = [family, name, quantize(cpu, self.cpu_step), quantize(rss, self.rss_step)]
+
+        state["host/cpu"] = quantize(psutil.cpu_percent(None), self.cpu_step)
+        state["host/mem"] = quantize(psutil.virtual_memory().percent, self.cpu_step)
+        return state
+
+
+class HostAgent:
+    """Publish this host's state as deltas to a (central) broker.
+
+    Runs on its own thread and reconnects with backoff. A full retained
+    state goes out on connect, every ``keyframe`` seconds and on a resync
+    request; every other tick sends only what changed, or nothing. After
+    ``heartbeat`` seconds without a message a tiny heartbeat carries the
+    current seq, so a lost last delta is noticed without a new change.
+    """
+
+    def __init__(self, broker_host, broker_port=1883, host_id=None, prefix=DEFAULT_PREFIX,
+                 interval=1.0, keyframe=300.0, collect=None, username=None, password=None,
+                 max_backoff=10.0, heartbeat=30.0):
+        self.host_id = topic_safe(host_id or socket.gethostname())
+        self.base = f"{prefix}/{self.host_id}"
+        self.interval = interval
+        self.keyframe = keyframe
+        self.heartbeat = heartbeat
+        self.collect = collect or LocalCollector()
+        self.max_backoff = max_backoff
+        self.link = MqttLink(broker_host, broker_port, new_client_id("agent"), username, password,
+                             will=(f"{self.base}/state", OFFLINE, True))
+
+        self.state = {}
+        self.seq = 0
+        self.deltas = 0
+        self.keyframes = 0
+        self.connected = False
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"agent-{self.host_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Stop publishing (marks the host offline); timeout=0 does not wait"""
+        self._stop.set()
+        if self._thread is not None and timeout:
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self._session()
+                backoff = 1.0
+            except (OSError, ValueError) as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                self.link.close(disconnect=False)
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _session(self):
+        self.link.connect()
+        self.link.subscribe(f"{self.base}/resync")
+        self.connected = True
+        self.error = None
+        self.state = self._collect()
+        self._publish_full()
+        last_full = last_message = time.monotonic()
+        next_tick = time.monotonic() + self.interval
+
+        while not self._stop.is_set():
+            if self.link.poll(next_tick - time.monotonic()):
+                # Hanya topic resync yang disubscribe
+                self.state = self._collect()
+                self._publish_full()
+                last_full = last_message = time.monotonic()
+            now = time.monotonic()
+            if now < next_tick:
+                continue
+            next_tick = now + self.interval
+
+            state = self._collect()
+            if now - last_full >= self.keyframe:
+                self.state = state
+                self._publish_full()
+                last_full = last_message = now
+                continue
+            changed, removed = diff_state(self.state, state)
+            self.state = state
+            if changed or removed:
+                self.seq += 1
+                message = {"seq": self.seq, "set": changed}
+                if removed:
+                    message["del"] = removed
+                self.link.publish(f"{self.base}/delta", encode(message))
+                self.deltas += 1
+                last_message = now
+            elif now - last_message >= self.heartbeat:
+                self.link.publish(f"{self.base}/delta", encode({"hb": self.seq}))
+                last_message = now
+
+        # Stop normal: tandai offline sendiri (will hanya untuk putus tidak normal)
+        self.link.publish(f"{self.base}/state", OFFLINE, retain=True)
+        self.link.close()
+
+    def _collect(self):
+        try:
+            return self.collect()
+        except Exception as e:
+            self.error = f"collect: {e}"
+            return self.state
+
+    def _publish_full(self):
+        self.seq += 1
+        self.link.publish(f"{self.base}/state", encode({"online": True, "seq": self.seq, "state": self.state}),
+                          retain=True)
+        self.keyframes += 1
+
+
+FleetHost = namedtuple('FleetHost', [
+    'host', 'online',
+    'stale',            # ada delta yang hilang, menunggu state penuh
+    'seq', 'state', 'updated_at', 'updates'])
+
+
+class FleetAggregator:
+    """Subscribe to every agent and keep the fleet view up to date.
+
+    Work per message is proportional to the keys in it. ``snapshot()``
+    only rebuilds the entries of hosts that changed since the previous
+    call, and ``version`` lets a UI skip frames where nothing arrived.
+    """
+
+    RESYNC_EVERY = 5.0
+
+    def __init__(self, broker_host, broker_port=1883, prefix=DEFAULT_PREFIX, username=None,
+                 password=None, max_backoff=10.0):
+        self.prefix = prefix
+        self.max_backoff = max_backoff
+        self.link = MqttLink(broker_host, broker_port, new_client_id("fleet"), username, password)
+
+        self._hosts = {}        # host -> dict state/seq/online/stale/updated_at/updates
+        self._views = {}        # host -> FleetHost terakhir yang dibuat snapshot()
+        self._resync_at = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self.gaps = 0
+        self.connected = False
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self.link.connect()
+                self.link.subscribe(f"{self.prefix}/+/state", f"{self.prefix}/+/delta")
+                self.connected = True
+                self.error = None
+                backoff = 1.0
+                while not self._stop.is_set():
+                    for topic, payload in self.link.poll(1.0):
+                        resync = self.apply(topic, payload)
+                        if resync:
+                            self.link.publish(f"{self.prefix}/{resync}/resync", b'')
+            except (OSError, ValueError) as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                self.link.close()
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def apply(self, topic, payload):
+        """Apply one agent message; return the host to resync, or None"""
+        parts = topic[len(self.prefix) + 1:].split('/')
+        if len(parts) != 2 or parts[1] not in ('state', 'delta'):
+            return None
+        host, kind = parts
+        try:
+            message = json.loads(payload) if payload else None
+        except ValueError:
+            return None
+        now = time.time()
+
+        with self._lock:
+            entry = self._hosts.get(host)
+            if message is None:
+                # Retained state dihapus: host dikeluarkan dari fleet
+                if self._hosts.pop(host, None) is not None:
+                    self._views.pop(host, None)
+                    self.version += 1
+                return None
+            if entry is None:
+                entry = self._hosts[host] = {"online": False, "stale": True, "seq": None,
+                                             "state": {}, "updated_at": None, "updates": 0}
+            resync = None
+            if kind == 'state':
+                if message.get("online", False):
+                    entry["state"] = dict(message.get("state") or {})
+                    entry["seq"] = message.get("seq")
+                    entry["stale"] = False
+                entry["online"] = bool(message.get("online", False))
+            elif "hb" in message:
+                if entry["stale"] or message["hb"] != entry["seq"]:
+                    resync = self._gap(host, entry, now)
+                entry["online"] = True
+            else:
+                seq = message.get("seq")
+                if entry["seq"] is not None and seq is not None and seq <= entry["seq"]:
+                    return None     # sudah tercakup state penuh yang lebih baru
+                if entry["seq"] is None or entry["stale"] or seq != entry["seq"] + 1:
+                    resync = self._gap(host, entry, now)
+                    entry["online"] = True
+                else:
+                    state = entry["state"]
+                    state.update(message.get("set") or {})
+                    for key in message.get("del") or ():
+                        state.pop(key, None)
+                    entry["seq"] = seq
+                    entry["online"] = True
+            entry["updated_at"] = now
+            entry["updates"] += 1
+            self._views.pop(host, None)
+            self.version += 1
+            return resync
+
+    def _gap(self, host, entry, now):
+        """Mark a host stale; return it if a resync request is due (lock held)"""
+        if not entry["stale"]:
+            self.gaps += 1
+            entry["stale"] = True
+        if now - self._resync_at.get(host, 0.0) >= self.RESYNC_EVERY:
+            self._resync_at[host] = now
+            return host
+        return None
+
+    def snapshot(self):
+        """Return {host: FleetHost}; unchanged hosts reuse their previous entry"""
+        with self._lock:
+            for host, entry in self._hosts.items():
+                if host not in self._views:
+                    self._views[host] = FleetHost(host, entry["online"], entry["stale"], entry["seq"],
+                                                  dict(entry["state"]), entry["updated_at"], entry["updates"])
+            return dict(self._views)
+
+    def stats_text(self):
+        link = self.link
+        return (f"Fleet: {len(self._hosts)} hosts, {link.messages_received} msgs "
+                f"({link.bytes_received} B) received, {self.gaps} gaps")
+
+
+def host_summary(view):
+    """One line per FleetHost for a text view"""
+    state = view.state
+    ports = [f"{key.split('/', 1)[1]}({value[1]})" for key, value in sorted(state.items())
+             if key.startswith("port/")]
+    brokers = [value for key, value in state.items() if key.startswith("proc/")]
+    status = "offline" if not view.online else "stale" if view.stale else "online"
+    cpu = sum(value[2] or 0 for value in brokers)
+    rss = sum(value[3] or 0 for value in brokers)
+    return (f"{view.host[:24]:<24} {status:<8} ports {' '.join(ports) or '-':<28} "
+            f"brokers {len(brokers)} ({cpu}% CPU, {rss} MB) host CPU {state.get('host/cpu', '--')}% "
+            f"mem {state.get('host/mem', '--')}%")
+
+
+def parse_broker(value):
+    host, _, port = value.rpartition(':')
+    return (host or "localhost", int(port)) if port.isdigit() else (value, 1883)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push host snapshots to a broker, or aggregate them")
+    parser.add_argument('--broker', default='localhost:1883', help='central broker host:port')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+    parser.add_argument('--host-id', help='name of this host in the fleet (default: hostname)')
+    parser.add_argument('--ports', default='1883,52345', help='local ports to report')
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--keyframe', type=float, default=300.0, help='seconds between full states')
+    parser.add_argument('--aggregate', action='store_true', help='print the fleet view instead')
+    args = parser.parse_args(argv)
+
+    host, port = parse_broker(args.broker)
+    username = os.getenv("MQTT_USERNAME") or None
+    password = os.getenv("MQTT_PASSWORD")
+
+    if args.aggregate:
+        fleet = FleetAggregator(host, port, args.prefix, username, password)
+        fleet.start()
+        seen = None
+        try:
+            while True:
+                time.sleep(1.0)
+                if fleet.version != seen:
+                    seen = fleet.version
+                    print(f"--- {time.strftime('%H:%M:%S')} {fleet.stats_text()}")
+                    for view in sorted(fleet.snapshot().values(), key=lambda v: v.host):
+                        print(host_summary(view))
+        except KeyboardInterrupt:
+            fleet.stop()
+        return
+
+    ports = [int(p) for p in args.ports.split(',') if p.strip()]
+    agent = HostAgent(host, port, args.host_id, args.prefix, args.interval, args.keyframe,
+                      LocalCollector(ports), username, password)
+    agent.start()
+    print(f"[agent] {agent.host_id} -> {host}:{port} under {agent.base}")
+    try:
+        while True:
+            time.sleep(10.0)
+            print(f"[agent] seq {agent.seq}, {agent.deltas} deltas, {agent.keyframes} full states, "
+                  f"{agent.link.bytes_sent} B sent{f', error: {agent.error}' if agent.error else ''}")
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import asyncio
+import secrets
+import struct
+import time
+from collections import namedtuple
+
+from monitor_core.mqtt_probe import (
+    DISCONNECT, PUBLISH, SUBACK,
+    build_publish, build_subscribe, new_client_id, open_session_async, parse_publish, read_packet_async)
+
+# Payload: fase (0 = latency probe, 1 = flood), nomor urut, waktu kirim perf_counter
+STAMP = struct.Struct('!BQd')
+# open_session_async memakai keepalive 10 s; seluruh benchmark harus di bawahnya
+MAX_SECONDS = 6.0
+
+BenchResult = namedtuple('BenchResult', [
+    'sent', 'received',
+    'msgs_per_s',       # throughput flood (diterima subscriber)
+    'p50_ms', 'p99_ms', # latency saat beban ringan
+    'error'])
+
+
+def quick_benchmark(host, port, seconds=3.0, payload_size=64, probes=200,
+                    username=None, password=None, timeout=2.0):
+    """Measure one broker with a QoS 0 publisher and subscriber on localhost sockets.
+
+    First ``probes`` messages go out at 200/s for end-to-end latency,
+    then the publisher floods for ``seconds`` and the subscriber's
+    receive rate is the throughput. Blocks; call it off the Tk thread.
+    """
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"Benchmark duration must be in (0, {MAX_SECONDS}] s")
+    return asyncio.run(_benchmark(host, port, seconds, max(payload_size, STAMP.size), probes,
+                                  username, password, timeout))
+
+
+async def _benchmark(host, port, seconds, payload_size, probes, username, password, timeout):
+    topic = f"monitor/bench/{secrets.token_hex(4)}"
+    padding = b'\x00' * (payload_size - STAMP.size)
+    writers = []
+    try:
+        sub_result, sub_reader, sub_writer = await open_session_async(
+            host, port, timeout, username=username, password=password, client_id=new_client_id("bench-sub"))
+        if sub_writer is not None:
+            writers.append(sub_writer)
+        if not sub_result.accepted:
+            return BenchResult(0, 0, 0.0, None, None, sub_result.reason)
+        pub_result, _, pub_writer = await open_session_async(
+            host, port, timeout, username=username, password=password, client_id=new_client_id("bench-pub"))
+        if pub_writer is not None:
+            writers.append(pub_writer)
+        if not pub_result.accepted:
+            return BenchResult(0, 0, 0.0, None, None, pub_result.reason)
+
+        sub_writer.write(build_subscribe(1, topic))
+        header, body = await asyncio.wait_for(read_packet_async(sub_reader), timeout)
+        if header & 0xF0 != SUBACK or body[-1:] >= b'\x80':
+            return BenchResult(0, 0, 0.0, None, None, "Subscription refused")
+
+        latencies = []
+        flood = {"received": 0, "last": None}
+
+        async def receive():
+            while True:
+                header, body = await read_packet_async(sub_reader)
+                if header & 0xF0 != PUBLISH:
+                    continue
+                now = time.perf_counter()
+                payload = parse_publish(header, body)[1]
+                phase, _, sent_at = STAMP.unpack_from(payload)
+                if phase == 0:
+                    latencies.append((now - sent_at) * 1000.0)
+                else:
+                    flood["received"] += 1
+                    flood["last"] = now
+
+        receiver = asyncio.ensure_future(receive())
+        try:
+            for seq in range(probes):
+                pub_writer.write(build_publish(topic, STAMP.pack(0, seq, time.perf_counter()) + padding))
+                await pub_writer.drain()
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.3)
+
+            sent = 0
+            start = time.perf_counter()
+            deadline = start + seconds
+            while time.perf_counter() < deadline:
+                # Batch 100 publish per drain agar loop tidak jadi bottleneck
+                for _ in range(100):
+                    sent += 1
+                    pub_writer.write(build_publish(topic, STAMP.pack(1, sent, time.perf_counter()) + padding))
+                await pub_writer.drain()
+            # Tunggu sampai subscriber berhenti menerima
+            settled = -1
+            while flood["received"] != settled:
+                settled = flood["received"]
+                await asyncio.sleep(0.3)
+        finally:
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+
+        received = flood["received"]
+        elapsed = (flood["last"] or start) - start
+        latencies.sort()
+        p50 = p99 = None
+        if latencies:
+            last = len(latencies) - 1
+            p50 = latencies[min(last, int(len(latencies) * 0.50))]
+            p99 = latencies[min(last, int(len(latencies) * 0.99))]
+        return BenchResult(sent, received, received / elapsed if elapsed > 0 else 0.0, p50, p99, None)
+    except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        return BenchResult(0, 0, 0.0, None, None, str(e) or type(e).__name__)
+    finally:
+        for writer in writers:
+            if not writer.is_closing():
+                writer.write(DISCONNECT)
+            writer.close()
+
+
+def result_text(name, result):
+    if result.error:
+        return f"{name:<16} error: {result.error}"
+    loss = 1.0 - result.received / result.sent if result.sent else 0.0
+    p50 = f"{result.p50_ms:.2f}" if result.p50_ms is not None else "--"
+    p99 = f"{result.p99_ms:.2f}" if result.p99_ms is not None else "--"
+    return (f"{name:<16} {result.msgs_per_s:>10,.0f} msg/s  p50 {p50:>6} ms  p99 {p99:>6} ms  "
+            f"loss {loss * 100:.1f}%")
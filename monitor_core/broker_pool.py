@@ -0,0 +1,319 @@
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from monitor_core.mosquitto_profiles import DEFAULT_PROFILE, bridge_lines, write_config
+from monitor_core.readiness import wait_ready
+from monitor_core.table_view import TableRow
+
+INSTANCE_COLUMNS = (
+    ("port", "Port", 6), ("pid", "PID", 8), ("state", "State", 10), ("restarts", "Restarts", 8),
+    ("cpu", "CPU %", 7), ("rss", "RSS MB", 8), ("ready", "Ready ms", 9), ("uptime", "Uptime", 9),
+    ("exit", "Last exit", 9),
+)
+
+# Warna state di tabel instance
+STATE_COLORS = {
+    'starting': "orange", 'running': "green", 'unready': "orange",
+    'backoff': "red", 'stopped': "gray",
+}
+
+# Instance yang tidak siap di-SIGTERM; kalau belum keluar setelah ini, SIGKILL
+TERMINATE_GRACE = 5.0
+
+PoolEvent = namedtuple('PoolEvent', [
+    'kind',             # launched / ready / not_ready / exited / failed
+    'port', 'pid',
+    'start_kind',       # 'cold' atau 'restart' (restart dari user)
+    'result',           # ReadyResult untuk ready/not_ready
+    'message'])
+
+InstanceStatus = namedtuple('InstanceStatus', [
+    'index', 'port', 'pid', 'state', 'restarts', 'last_exit',
+    'cpu', 'rss_mb', 'ready_ms', 'uptime_s',
+    'retry_in_s'])     # detik sampai restart berikutnya saat backoff
+
+
+class PoolInstance:
+    """Supervision state of one mosquitto process of a BrokerPool"""
+
+    def __init__(self, index, port, config_path):
+        self.index = index
+        self.port = port
+        self.config_path = config_path
+        self.process = None
+        self.state = 'stopped'
+        self.restarts = 0
+        self.last_exit = None
+        self.backoff = 0.0
+        self.next_start = None
+        self.launched_at = None
+        self.ready_ms = None
+        self.cpu = None
+        self.rss_mb = None
+        self.terminated_at = None   # saat instance 'unready' di-SIGTERM
+        self._ps = None         # psutil.Process; cpu_percent butuh objek yang sama antar tick
+
+
+class BrokerPool:
+    """Run N mosquitto instances on consecutive ports and keep them up.
+
+    Instance i listens on ``base_port + i`` with its own generated config
+    (profile from monitor_core.mosquitto_profiles). With ``bridge=True``
+    every instance after the first bridges ``#`` to the first, so clients
+    on any port share one topic space. Only the processes the pool
+    launched are ever stopped or counted; other mosquitto processes on
+    the host are left alone.
+
+    A supervisor thread checks the instances every ``interval``: a
+    process that exits on its own is relaunched after a backoff that
+    doubles from 1 s up to ``max_backoff`` and resets once an instance
+    has stayed up ``stable_after`` seconds. An instance that never
+    became ready is terminated and relaunched the same way, and so is
+    one whose relaunch failed to execute. It also samples CPU % and RSS
+    of each process. Events go to ``on_event(PoolEvent)`` from pool
+    threads; ``on_output(port, stream)`` is run on a thread per launch to
+    consume the process output (without it the output is discarded).
+    """
+
+    def __init__(self, executable, base_port, count=1, profile=DEFAULT_PROFILE, directory=".",
+                 base_config=None, bridge=False, username=None, password=None,
+                 max_backoff=30.0, stable_after=30.0, ready_timeout=30.0, interval=0.5,
+                 on_event=None, on_output=None):
+        self.executable = executable
+        self.base_port = base_port
+        self.count = count
+        self.profile = profile
+        self.directory = directory
+        self.base_config = base_config
+        self.bridge = bridge
+        self.username = username
+        self.password = password
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.ready_timeout = ready_timeout
+        self.interval = interval
+        self.on_event = on_event
+        self.on_output = on_output
+        self.instances = []
+        # RLock: on_event bisa dipanggil saat lock dipegang
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ports(self):
+        return [self.base_port + i for i in range(self.count)]
+
+    def write_configs(self):
+        """Generate one config per instance; returns the paths"""
+        paths = []
+        for i, port in enumerate(self.ports):
+            extra = ()
+            if self.bridge and i > 0:
+                extra = bridge_lines(port, self.base_port, self.username, self.password)
+            paths.append(write_config(self.profile, port, self.directory, self.base_config, extra))
+        return paths
+
+    def start(self, restart_since=None):
+        """Write the configs and launch every instance.
+
+        ``restart_since`` (time.monotonic()) marks a user restart, timed
+        from that moment to ready. Raises OSError when mosquitto cannot
+        be executed at all.
+        """
+        self._stop.clear()
+        self.instances = [PoolInstance(i, port, path)
+                          for i, (port, path) in enumerate(zip(self.ports, self.write_configs()))]
+        # Hub (instance pertama) dulu, supaya bridge langsung bisa connect
+        try:
+            for instance in self.instances:
+                with self._lock:
+                    self._launch(instance, 'cold' if restart_since is None else 'restart', restart_since)
+        except OSError:
+            self.stop()
+            raise
+        self._thread = threading.Thread(target=self._loop, name="broker-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop supervising and terminate the pool's own processes"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        with self._lock:
+            processes = [(instance, instance.process) for instance in self.instances if instance.process]
+            for instance, _ in processes:
+                instance.process = None
+                instance.state = 'stopped'
+        for _, process in processes:
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for _, process in processes:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                # Reap supaya tidak tersisa zombie
+                try:
+                    process.wait(timeout=1.0)
+                except subprocess.TimeoutExpired:
+                    pass
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _launch(self, instance, start_kind, since=None):
+        process = subprocess.Popen(
+            [self.executable, '-c', instance.config_path],
+            stdout=subprocess.PIPE if self.on_output else subprocess.DEVNULL,
+            stderr=subprocess.STDOUT
+        )
+        instance.process = process
+        instance.state = 'starting'
+        instance.launched_at = time.monotonic()
+        instance.next_start = None
+        instance.ready_ms = None
+        instance.cpu = instance.rss_mb = None
+        instance.terminated_at = None
+        instance._ps = None
+        if self.on_output:
+            threading.Thread(target=self.on_output, args=(instance.port, process.stdout), daemon=True).start()
+        threading.Thread(target=self._await_ready, daemon=True,
+                         args=(instance, process, start_kind, since or instance.launched_at)).start()
+        self._emit('launched', instance.port, process.pid, start_kind)
+
+    def _await_ready(self, instance, process, start_kind, since):
+        result = wait_ready("127.0.0.1", instance.port, timeout=self.ready_timeout, process=process,
+                            start=since, username=self.username, password=self.password)
+        with self._lock:
+            if instance.process is not process:
+                return  # sudah diganti/di-stop
+            if result.ready:
+                instance.state = 'running'
+                instance.ready_ms = result.elapsed_ms
+            elif process.poll() is None:
+                instance.state = 'unready'
+        if result.ready or process.poll() is None:
+            self._emit('ready' if result.ready else 'not_ready', instance.port, process.pid, start_kind, result)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            for instance in self.instances:
+                with self._lock:
+                    if self._stop.is_set():
+                        return
+                    self._supervise(instance, now)
+
+    def _supervise(self, instance, now):
+        process = instance.process
+        if process is not None and instance.state in ('starting', 'running', 'unready'):
+            code = process.poll()
+            if code is not None:
+                # Keluar sendiri (atau karena tidak siap): restart dengan backoff, reset kalau sempat stabil
+                reason = "stopped after not getting ready" if instance.terminated_at else f"exited with code {code}"
+                self._retry_later(instance, now, stable=now - instance.launched_at >= self.stable_after)
+                instance.last_exit = code
+                self._emit('exited', instance.port, process.pid, None,
+                           message=f"{reason}, restarting in {instance.backoff:.0f} s")
+                return
+            if instance.state == 'running':
+                self._sample(instance)
+            elif instance.state == 'unready':
+                # Jalan tapi tidak menjawab CONNECT: hentikan, cabang di atas yang me-restart
+                if instance.terminated_at is None:
+                    instance.terminated_at = now
+                    process.terminate()
+                elif now - instance.terminated_at >= TERMINATE_GRACE:
+                    process.kill()
+        elif instance.state == 'backoff' and now >= instance.next_start:
+            instance.restarts += 1
+            try:
+                self._launch(instance, 'cold')
+            except OSError as e:
+                instance.process = None
+                self._retry_later(instance, now, stable=False)
+                self._emit('failed', instance.port, None, None,
+                           message=f"{e}, retrying in {instance.backoff:.0f} s")
+
+    def _retry_later(self, instance, now, stable):
+        instance.backoff = 1.0 if stable or not instance.backoff else min(instance.backoff * 2,
+                                                                          self.max_backoff)
+        instance.state = 'backoff'
+        instance.next_start = now + instance.backoff
+        instance.cpu = instance.rss_mb = None
+
+    def _sample(self, instance):
+        try:
+            if instance._ps is None:
+                instance._ps = psutil.Process(instance.process.pid)
+                instance._ps.cpu_percent(None)     # tick pertama hanya baseline
+                return
+            with instance._ps.oneshot():
+                instance.cpu = instance._ps.cpu_percent(None)
+                instance.rss_mb = instance._ps.memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            instance._ps = None
+
+    def _emit(self, kind, port, pid, start_kind, result=None, message=None):
+        if self.on_event is not None:
+            self.on_event(PoolEvent(kind, port, pid, start_kind, result, message))
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return [InstanceStatus(
+                instance.index, instance.port,
+                instance.process.pid if instance.process is not None else None,
+                instance.state, instance.restarts, instance.last_exit, instance.cpu, instance.rss_mb,
+                instance.ready_ms,
+                now - instance.launched_at if instance.state == 'running' else None,
+                max(0.0, instance.next_start - now) if instance.state == 'backoff' else None)
+                for instance in self.instances]
+
+
+def _uptime(seconds):
+    if seconds is None:
+        return "--"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m{int(seconds % 60):02d}s"
+    return f"{int(seconds // 3600)}h{int(seconds % 3600 // 60):02d}m"
+
+
+def instance_rows(statuses):
+    """TableRows for INSTANCE_COLUMNS"""
+    rows = []
+    for status in statuses:
+        state = status.state
+        if status.retry_in_s is not None:
+            state = f"retry {status.retry_in_s:.0f}s"
+        fg = STATE_COLORS.get(status.state, "black")
+        cells = ((str(status.port), "black"), (str(status.pid or "--"), "black"), (state, fg),
+                 (str(status.restarts), "red" if status.restarts else "black"),
+                 (f"{status.cpu:.1f}" if status.cpu is not None else "--", "black"),
+                 (f"{status.rss_mb:.1f}" if status.rss_mb is not None else "--", "black"),
+                 (f"{status.ready_ms:.0f}" if status.ready_ms is not None else "--", "black"),
+                 (_uptime(status.uptime_s), "black"),
+                 (str(status.last_exit) if status.last_exit is not None else "--", "black"))
+        rows.append(TableRow(status.port, cells,
+                             (status.port, status.pid, status.state, status.restarts, status.cpu,
+                              status.rss_mb, status.ready_ms, status.uptime_s, status.last_exit)))
+    return rows
+
+
+def pool_summary(statuses):
+    """'3/4 running on 1883-1886, 12.5% CPU, 40.1 MB' for the status line"""
+    if not statuses:
+        return "No instances"
+    running = [s for s in statuses if s.state == 'running']
+    cpu = sum(s.cpu or 0.0 for s in running)
+    rss = sum(s.rss_mb or 0.0 for s in running)
+    ports = f"{statuses[0].port}" if len(statuses) == 1 else f"{statuses[0].port}-{statuses[-1].port}"
+    return f"{len(running)}/{len(statuses)} running on {ports}, {cpu:.1f}% CPU, {rss:.1f} MB"
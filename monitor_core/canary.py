@@ -0,0 +1,387 @@
+import asyncio
+import heapq
+import math
+import secrets
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from monitor_core.mqtt_probe import (
+    DISCONNECT, PUBLISH, SUBACK,
+    build_publish, build_subscribe, new_client_id, open_session_async, parse_publish, read_packet_async)
+
+# Payload probe: index node pengirim + nomor urut
+PROBE = struct.Struct('!IQ')
+# Slot latency untuk probe yang dikirim saat subscriber belum subscribe (tidak dihitung)
+NOT_EXPECTED = -1.0
+# open_session_async memakai keepalive 10 s; publish tiap interval menjaga sesi tetap hidup
+MAX_INTERVAL = 5.0
+
+
+class CanaryCell(namedtuple('CanaryCell', ['received', 'lost', 'pending', 'p50_ms', 'p99_ms'])):
+    """Delivery stats of one publisher -> subscriber pair over the window"""
+
+    __slots__ = ()
+
+    @property
+    def loss(self):
+        """Fraction of settled probes that never arrived (None without probes)"""
+        settled = self.received + self.lost
+        return self.lost / settled if settled else None
+
+
+CanarySnapshot = namedtuple('CanarySnapshot', [
+    'names',
+    'cells',            # {(src, dst): CanaryCell}: semua pasangan, atau hanya yang terburuk
+    'connected',        # per node: sesi MQTT terbuka dan subscription aktif
+    'errors',           # per node: error koneksi terakhir atau None
+    'sent',             # total probe yang dikirim
+    'version',
+    'worst'])           # (loss, p99_ms) pasangan terburuk, untuk warna panel
+
+
+class ReplicationCanary:
+    """Measure end-to-end delivery between every pair of cluster nodes.
+
+    Keeps one MQTT session per node on a private asyncio loop. Each
+    session subscribes to ``<prefix>/<run id>/+`` and, every ``interval``,
+    publishes a numbered probe on ``<prefix>/<run id>/<own index>``; a
+    probe from node i arriving at node j fills cell (i, j) with its
+    latency. All clients run in this process, so one monotonic clock
+    times both ends and there is no clock skew to correct.
+
+    Per pair the last ``window`` probes are kept in flat arrays; a probe
+    that has not arrived ``loss_after`` seconds after it was sent counts
+    as lost. Probes sent while a subscriber was down are not counted
+    against it. Received/lost/pending counts and the latency sum of every
+    pair are kept up to date as probes are sent, arrive and expire, so
+    ``snapshot()`` (callable from any thread) only copies counters and
+    computes percentiles for the cells it returns: all of them up to
+    ``max_nodes`` nodes, otherwise the ``max_nodes`` worst pairs.
+    """
+
+    def __init__(self, nodes, interval=1.0, window=120, loss_after=5.0, timeout=2.0,
+                 username=None, password=None, prefix="monitor/canary"):
+        if not 0 < interval <= MAX_INTERVAL:
+            raise ValueError(f"Canary interval must be in (0, {MAX_INTERVAL}] s")
+        self.nodes = nodes
+        self.interval = interval
+        self.window = window
+        self.loss_after = loss_after
+        self.timeout = timeout
+        self.username = username
+        self.password = password
+        self.topic = f"{prefix}/{secrets.token_hex(4)}"
+
+        count = len(nodes)
+        self._seq = [0] * count
+        self._slot_seq = [array('q', bytes(8 * window)) for _ in range(count)]
+        self._sent_at = [array('d', bytes(8 * window)) for _ in range(count)]
+        # _latency[src][dst][slot]: ms, NaN = belum/tidak sampai, NOT_EXPECTED = tidak dihitung
+        self._latency = [[array('d', [NOT_EXPECTED]) * window for _ in range(count)]
+                         for _ in range(count)]
+        # Counter per pasangan, index src * count + dst
+        self._received = array('q', bytes(8 * count * count))
+        self._lost = array('q', bytes(8 * count * count))
+        self._pending = array('q', bytes(8 * count * count))
+        self._sum_ms = array('d', bytes(8 * count * count))
+        self._settled = [0] * count     # seq terakhir yang sudah lewat loss_after
+        self._subscribed = [False] * count
+        self._errors = [None] * count
+        self._writers = [None] * count
+        self._lock = threading.Lock()
+
+        self.sent = 0
+        self.version = 0
+        self._thread = None
+        self._loop = None
+        self._stopping = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="replication-canary", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        loop, stopping = self._loop, self._stopping
+        if loop is not None and stopping is not None:
+            try:
+                loop.call_soon_threadsafe(stopping.set)
+            except RuntimeError:
+                pass  # loop sudah selesai
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._main())
+        finally:
+            loop.close()
+            self._loop = None
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        tasks = [asyncio.ensure_future(self._session(i)) for i in range(len(self.nodes))]
+        tasks.append(asyncio.ensure_future(self._publish_loop()))
+        await self._stopping.wait()
+        for writer in self._writers:
+            if writer is not None:
+                writer.write(DISCONNECT)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _session(self, index):
+        node = self.nodes[index]
+        backoff = 1.0
+        while True:
+            result, reader, writer = await open_session_async(
+                node["host"], node["mqtt_port"], self.timeout,
+                username=self.username, password=self.password, client_id=new_client_id("canary"))
+            if not result.accepted:
+                self._errors[index] = result.reason
+                if writer is not None:
+                    writer.close()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+                continue
+
+            self._writers[index] = writer
+            try:
+                writer.write(build_subscribe(1, f"{self.topic}/+"))
+                while True:
+                    header, body = await read_packet_async(reader)
+                    kind = header & 0xF0
+                    if kind == PUBLISH:
+                        self._receive(index, parse_publish(header, body)[1])
+                    elif kind == SUBACK:
+                        if body[-1:] >= b'\x80':
+                            raise ValueError("Canary subscription refused")
+                        with self._lock:
+                            self._subscribed[index] = True
+                            self._errors[index] = None
+                        backoff = 1.0
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                self._errors[index] = str(e) or type(e).__name__
+            finally:
+                with self._lock:
+                    self._subscribed[index] = False
+                    self.version += 1
+                self._writers[index] = None
+                writer.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    async def _publish_loop(self):
+        count = len(self.nodes)
+        next_due = time.perf_counter()
+        while True:
+            with self._lock:
+                self._settle(time.perf_counter())
+            for src in range(count):
+                writer = self._writers[src]
+                if writer is None or not self._subscribed[src]:
+                    continue
+                with self._lock:
+                    seq = self._record_send(src)
+                writer.write(build_publish(f"{self.topic}/{src}", PROBE.pack(src, seq)))
+            with self._lock:
+                self.version += 1
+            next_due += self.interval
+            await asyncio.sleep(max(0.0, next_due - time.perf_counter()))
+
+    def _record_send(self, src):
+        """Take the next slot of src for a probe and return its seq (lock held)"""
+        count = len(self.nodes)
+        seq = self._seq[src] + 1
+        self._seq[src] = seq
+        slot = seq % self.window
+        self._retire(src, slot)
+        self._slot_seq[src][slot] = seq
+        base = src * count
+        for dst in range(count):
+            if self._subscribed[dst]:
+                self._latency[src][dst][slot] = math.nan
+                self._pending[base + dst] += 1
+            else:
+                self._latency[src][dst][slot] = NOT_EXPECTED
+        self.sent += 1
+        # Waktu kirim diambil tepat sebelum write, setelah bookkeeping
+        self._sent_at[src][slot] = time.perf_counter()
+        return seq
+
+    def _retire(self, src, slot):
+        """Remove the probe that used to occupy slot from the counters (lock held)"""
+        old = self._slot_seq[src][slot]
+        if not old:
+            return
+        count = len(self.nodes)
+        settled = old <= self._settled[src]
+        for dst in range(count):
+            value = self._latency[src][dst][slot]
+            if value == NOT_EXPECTED:
+                continue
+            index = src * count + dst
+            if value == value:
+                self._received[index] -= 1
+                self._sum_ms[index] -= value
+            elif settled:
+                self._lost[index] -= 1
+            else:
+                self._pending[index] -= 1
+
+    def _settle(self, now):
+        """Count probes older than loss_after that did not arrive as lost (lock held)"""
+        count = len(self.nodes)
+        for src in range(count):
+            slot_seq = self._slot_seq[src]
+            sent_at = self._sent_at[src]
+            settled = self._settled[src]
+            while settled < self._seq[src]:
+                slot = (settled + 1) % self.window
+                if slot_seq[slot] == settled + 1 and now - sent_at[slot] <= self.loss_after:
+                    break
+                settled += 1
+                if slot_seq[slot] != settled:
+                    continue  # slot sudah dipakai ulang, _retire yang menghitung
+                base = src * count
+                for dst in range(count):
+                    value = self._latency[src][dst][slot]
+                    if value != value:
+                        self._pending[base + dst] -= 1
+                        self._lost[base + dst] += 1
+            self._settled[src] = settled
+
+    def _receive(self, dst, payload):
+        now = time.perf_counter()
+        if len(payload) != PROBE.size:
+            return
+        src, seq = PROBE.unpack(payload)
+        if src >= len(self.nodes):
+            return
+        slot = seq % self.window
+        with self._lock:
+            # Probe yang slotnya sudah dipakai ulang (terlalu lambat) diabaikan
+            if self._slot_seq[src][slot] == seq and math.isnan(self._latency[src][dst][slot]):
+                latency = (now - self._sent_at[src][slot]) * 1000.0
+                self._latency[src][dst][slot] = latency
+                index = src * len(self.nodes) + dst
+                self._received[index] += 1
+                self._sum_ms[index] += latency
+                # Terlambat tapi masih di window: yang tadinya dihitung hilang jadi diterima
+                if seq <= self._settled[src]:
+                    self._lost[index] -= 1
+                else:
+                    self._pending[index] -= 1
+                self.version += 1
+
+    def snapshot(self, max_nodes=8):
+        now = time.perf_counter()
+        count = len(self.nodes)
+        names = tuple(node["name"] for node in self.nodes)
+        with self._lock:
+            self._settle(now)
+            if count <= max_nodes:
+                cells = {(src, dst): self._cell(src, dst, now) for src in range(count) for dst in range(count)}
+                return CanarySnapshot(names, cells, tuple(self._subscribed), tuple(self._errors),
+                                      self.sent, self.version, _worst(cells.values(), 0.0))
+            received = array('q', self._received)
+            lost = array('q', self._lost)
+            sum_ms = array('d', self._sum_ms)
+
+        # Di luar lock: peringkat dari counter, persentil hanya untuk pasangan yang ditampilkan
+        ranked = []
+        for index in range(count * count):
+            settled = received[index] + lost[index]
+            if settled:
+                mean = sum_ms[index] / received[index] if received[index] else 0.0
+                ranked.append((lost[index] / settled, mean, index))
+        worst_loss = max((loss for loss, _, _ in ranked), default=0.0)
+        shown = [divmod(index, count) for _, _, index in heapq.nlargest(max_nodes, ranked)]
+        with self._lock:
+            cells = {pair: self._cell(pair[0], pair[1], now) for pair in shown}
+            return CanarySnapshot(names, cells, tuple(self._subscribed), tuple(self._errors),
+                                  self.sent, self.version, _worst(cells.values(), worst_loss))
+
+    def _cell(self, src, dst, now):
+        latency = self._latency[src][dst]
+        sent_at = self._sent_at[src]
+        values = []
+        lost = pending = 0
+        for slot in range(self.window):
+            value = latency[slot]
+            if value == NOT_EXPECTED:
+                continue
+            if value == value:
+                values.append(value)
+            elif now - sent_at[slot] > self.loss_after:
+                lost += 1
+            else:
+                pending += 1
+        if not values:
+            return CanaryCell(0, lost, pending, None, None)
+        values.sort()
+        last = len(values) - 1
+        return CanaryCell(len(values), lost, pending, values[min(last, int(len(values) * 0.50))],
+                          values[min(last, int(len(values) * 0.99))])
+
+
+def _worst(cells, worst_loss):
+    """(loss, p99_ms) of the worst of the given cells, loss at least worst_loss"""
+    worst_p99 = 0.0
+    for cell in cells:
+        worst_loss = max(worst_loss, cell.loss or 0.0)
+        worst_p99 = max(worst_p99, cell.p99_ms or 0.0)
+    return worst_loss, worst_p99
+
+
+def cell_text(cell):
+    """'1.2/4.8 0%' (p50/p99 ms and loss) for one matrix cell"""
+    if cell.p50_ms is None:
+        return "lost" if cell.lost else "--"
+    loss = cell.loss
+    return f"{cell.p50_ms:.1f}/{cell.p99_ms:.1f} {loss * 100:.0f}%"
+
+
+def matrix_lines(snapshot, max_nodes=8, width=16):
+    """Text matrix (rows = publisher, columns = subscriber) for a fixed-width label.
+
+    Bigger clusters do not fit a matrix; they get the worst pairs the
+    snapshot picked (by loss and mean latency) instead, sorted by loss and p99.
+    """
+    names = snapshot.names
+    count = len(names)
+    if count <= max_nodes and len(snapshot.cells) == count * count:
+        short = [f"N{i + 1}" for i in range(count)]
+        lines = ["pub \\ sub".ljust(10) + "".join(f"{label:>{width}}" for label in short)]
+        for src in range(count):
+            state = "" if snapshot.connected[src] else " (down)"
+            lines.append(f"{short[src]}{state}".ljust(10) +
+                         "".join(f"{cell_text(snapshot.cells[(src, dst)]):>{width}}" for dst in range(count)))
+        lines.append("  ".join(f"{short[i]}={names[i]}" for i in range(count)))
+        return lines
+
+    pairs = [(cell.loss or 0.0, cell.p99_ms or 0.0, src, dst) for (src, dst), cell in snapshot.cells.items()]
+    pairs.sort(reverse=True)
+    lines = [f"Worst {min(max_nodes, len(pairs))} of {count * count} pairs (p50/p99 ms, loss):"]
+    for _, _, src, dst in pairs[:max_nodes]:
+        lines.append(f"  {names[src][:20]:>20} -> {names[dst][:20]:<20} {cell_text(snapshot.cells[(src, dst)])}")
+    return lines
+
+
+def worst_cell(snapshot):
+    """Return (loss, p99_ms) of the worst pair, for colouring the panel.
+
+    Loss covers every pair; p99 only the cells in the snapshot (all of
+    them for small clusters, the worst pairs for big ones).
+    """
+    return snapshot.worst
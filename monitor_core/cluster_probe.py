@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from monitor_core.mqtt_probe import mqtt_handshake_async
+from monitor_core.proc_net import listening_pids
+
+NodeStatus = namedtuple('NodeStatus', [
+    'name', 'mqtt',         # HandshakeResult dari port MQTT
+    'amqp_open', 'mgmt_open', 'pid'])
+
+ClusterStatus = namedtuple('ClusterStatus', [
+    'checked_at', 'nodes', 'active_nodes', 'elapsed_ms', 'timed_out'])
+
+# Konfigurasi cluster HA Plan A (3 node di satu host)
+PLAN_A_NODES = (
+    {"name": "Node 1 (Master)", "mqtt_port": 1883, "amqp_port": 5672, "mgmt_port": 15672, "host": "localhost"},
+    {"name": "Node 2 (Slave)",  "mqtt_port": 1884, "amqp_port": 5673, "mgmt_port": 15673, "host": "localhost"},
+    {"name": "Node 3 (Slave)",  "mqtt_port": 1885, "amqp_port": 5674, "mgmt_port": 15674, "host": "localhost"},
+)
+
+
+def status_signature(status):
+    """Node state of a ClusterStatus without latencies, for change detection"""
+    return tuple((node.mqtt.return_code, node.amqp_open, node.mgmt_open, node.pid)
+                 for node in status.nodes)
+
+
+async def tcp_open(host, port, timeout):
+    """True if a TCP connection to host:port succeeds within timeout"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+class ClusterProbeEngine:
+    """Probe every node/port of the cluster concurrently under one deadline.
+
+    All MQTT handshakes and AMQP/management TCP checks are started at
+    once, so a tick takes as long as the slowest single probe rather than
+    the sum of them. Local PIDs come from one shared listener scan that
+    runs in a thread while the network probes are in flight.
+    """
+
+    def __init__(self, nodes, deadline=1.0, username=None, password=None):
+        self.nodes = nodes
+        self.deadline = deadline
+        self.username = username
+        self.password = password
+        self._loop = None
+
+    def probe(self):
+        """Blocking entry point for a worker thread; returns a ClusterStatus"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.probe_all())
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    async def probe_all(self):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        timeout = self.deadline
+
+        local_ports = [node["mqtt_port"] for node in self.nodes if _is_local(node["host"])]
+        pids_future = loop.run_in_executor(None, listening_pids, local_ports)
+
+        checks = []
+        for node in self.nodes:
+            host = node["host"]
+            checks.append(mqtt_handshake_async(host, node["mqtt_port"], timeout=timeout,
+                                               username=self.username, password=self.password))
+            checks.append(tcp_open(host, node["amqp_port"], timeout))
+            checks.append(tcp_open(host, node["mgmt_port"], timeout))
+
+        results = await asyncio.gather(*checks)
+        try:
+            pids = await asyncio.wait_for(pids_future, timeout)
+        except (asyncio.TimeoutError, OSError):
+            pids = {}
+
+        nodes = []
+        active = 0
+        timed_out = 0
+        for i, node in enumerate(self.nodes):
+            mqtt, amqp_open, mgmt_open = results[i * 3:i * 3 + 3]
+            if mqtt.is_mqtt:
+                active += 1
+            elif mqtt.error == "CONNACK timeout":
+                timed_out += 1
+            pid = pids.get(node["mqtt_port"]) if _is_local(node["host"]) else None
+            nodes.append(NodeStatus(node["name"], mqtt, amqp_open, mgmt_open, pid))
+
+        return ClusterStatus(
+            checked_at=datetime.now().strftime("%H:%M:%S"),
+            nodes=tuple(nodes),
+            active_nodes=active,
+            elapsed_ms=(time.perf_counter() - start) * 1000.0,
+            timed_out=timed_out,
+        )
+
+
+def _is_local(host):
+    return host in ("localhost", "127.0.0.1", "::1")
@@ -0,0 +1,320 @@
+"""Headless broker monitor with a Prometheus /metrics endpoint.
+
+    python -m monitor_core.daemon --listen 0.0.0.0:9883 --cluster
+
+Runs the same probes as the Tk monitors (ports from one shared socket
+scan, broker processes from the watcher, CONNECT/CONNACK handshake, the
+anonymous-service sweep and optionally the RabbitMQ cluster) on the
+adaptive scheduler. After every probe tick the metrics page is rendered
+once and cached; a scrape only copies those bytes and never probes.
+MQTT_USERNAME / MQTT_PASSWORD are taken from the environment; the
+cluster nodes come from the shared inventory (see monitor_core.inventory).
+With --fleet the daemon also aggregates the push agents
+(monitor_core.agent) reporting to that broker and exports their state.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+from monitor_core.cluster_probe import ClusterProbeEngine, status_signature
+from monitor_core.inventory import load_nodes
+from monitor_core.agent import FleetAggregator, parse_broker
+from monitor_core.metrics import Exposition, Histogram, MetricsServer
+from monitor_core.mqtt_discovery import MqttDiscovery
+from monitor_core.mqtt_probe import mqtt_handshake
+from monitor_core.mqtt_services import find_mqtt_services
+from monitor_core.port_snapshot import PortSnapshotService
+from monitor_core.probe_worker import ProbeError
+from monitor_core.process_watcher import get_process_watcher
+from monitor_core.scheduler import ProbeScheduler, ProbeTask
+
+
+class HeadlessMonitor:
+    """Probe loop of the monitor windows without Tk, publishing metrics"""
+
+    def __init__(self, monitor_port=52345, default_port=1883, cluster_nodes=None,
+                 username=None, password=None, fleet_broker=None):
+        self.monitor_port = monitor_port
+        self.default_port = default_port
+        self.username = username
+        self.password = password
+        self.roles = {monitor_port: 'monitor', default_port: 'default'}
+
+        self.port_snapshots = PortSnapshotService(interval=0.5)
+        # Listener asing diprobe tanpa kredensial; username/password hanya untuk port monitor
+        self.discovery = MqttDiscovery(fingerprint=True)
+        self.process_watcher = get_process_watcher()
+        self.latency = Histogram()
+        self.server = None
+
+        self.cluster_engine = None
+        self.cluster_latency = {}
+        self.last_error = None
+
+        # Agent push: state host lain datang sebagai delta, tidak diprobe dari sini
+        self.fleet = None
+        if fleet_broker:
+            self.fleet = FleetAggregator(*fleet_broker, username=username, password=password)
+
+        tasks = [
+            ProbeTask('ports', self.probe_ports, 0.5, 1.0, budget_ms=20,
+                      signature=lambda ports: tuple(p[:3] for p in ports),
+                      wakes=('mqtt', 'process', 'sweep')),
+            ProbeTask('process', self.probe_processes, 1.0, 10.0, wakes=('ports',)),
+            ProbeTask('mqtt', self.probe_monitor_mqtt, 2.0, 20.0, budget_ms=50,
+                      signature=lambda h: h and (h.return_code, h.error)),
+            ProbeTask('sweep', self.probe_sweep, 5.0, 30.0, backoff=2.0, budget_ms=100,
+                      signature=lambda services: tuple((s['port'], s['pid']) for s in services)),
+        ]
+        if cluster_nodes:
+            self.cluster_engine = ClusterProbeEngine(cluster_nodes, deadline=1.0,
+                                                     username=username, password=password)
+            self.cluster_latency = {node["name"]: Histogram() for node in cluster_nodes}
+            tasks.append(ProbeTask('cluster', self.probe_cluster, 1.0, 10.0, signature=status_signature))
+
+        self.scheduler = ProbeScheduler(tasks, self.render, name="daemon-probes", sink=self.publish)
+        self.page = b"# no probe finished yet\n"
+        self.rendered_at = 0.0
+
+    # ---- probes (scheduler thread) ----
+
+    def probe_ports(self):
+        snapshot = self.port_snapshots.get()
+        result = []
+        for port in (self.monitor_port, self.default_port):
+            listener = snapshot.lookup(port)
+            if listener:
+                result.append((port, True, listener.pid, listener.name))
+            else:
+                result.append((port, False, None, None))
+        return tuple(result)
+
+    def probe_processes(self):
+        return {family: tuple(self.process_watcher.running(family))
+                for family in self.process_watcher.families}
+
+    def probe_monitor_mqtt(self):
+        ports = self.scheduler.value('ports')
+        if not ports or not ports[0][1]:
+            return None
+        handshake = mqtt_handshake('localhost', self.monitor_port, timeout=1.0,
+                                   username=self.username, password=self.password)
+        if handshake.is_mqtt:
+            self.latency.observe(handshake.latency_us / 1_000_000)
+        return handshake
+
+    def probe_sweep(self):
+        return find_mqtt_services(self.port_snapshots.get(),
+                                  exclude_ports=(self.monitor_port, self.default_port),
+                                  discovery=self.discovery)
+
+    def probe_cluster(self):
+        status = self.cluster_engine.probe()
+        for node in status.nodes:
+            if node.mqtt.is_mqtt:
+                self.cluster_latency[node.name].observe(node.mqtt.latency_us / 1_000_000)
+        return status
+
+    # ---- metrics ----
+
+    def render(self, values):
+        """Build the whole metrics page from the latest probe values"""
+        page = Exposition()
+        page.sample("mqtt_monitor_last_update_timestamp_seconds", f"{time.time():.3f}",
+                    help_text="Time of the probe tick that rendered this page")
+
+        for port, up, pid, name in values['ports'] or ():
+            labels = {'port': port, 'role': self.roles[port]}
+            page.sample("mqtt_monitor_port_up", up, labels,
+                        help_text="1 if something listens on the port")
+            page.sample("mqtt_monitor_port_pid", pid or 0, labels,
+                        help_text="PID of the listener, 0 if unknown or down")
+
+        handshake = values['mqtt']
+        labels = {'port': self.monitor_port}
+        page.sample("mqtt_monitor_handshake_accepted", bool(handshake and handshake.accepted), labels,
+                    help_text="1 if the last CONNECT got CONNACK return code 0")
+        page.sample("mqtt_monitor_handshake_return_code",
+                    handshake.return_code if handshake and handshake.is_mqtt else -1, labels,
+                    help_text="CONNACK return/reason code of the last handshake, -1 without CONNACK")
+        page.histogram("mqtt_monitor_handshake_latency_seconds", self.latency, labels,
+                       help_text="TCP connect to CONNACK time of successful handshakes")
+
+        for family, running in (values['process'] or {}).items():
+            page.sample("mqtt_monitor_broker_processes", len(running), {'family': family},
+                        help_text="Number of running broker processes")
+            for pid, name in running:
+                page.sample("mqtt_monitor_broker_process_info", 1,
+                            {'family': family, 'pid': pid, 'name': name},
+                            help_text="One series per running broker process")
+
+        services = values['sweep'] or ()
+        page.sample("mqtt_monitor_anonymous_services", len(services),
+                    help_text="MQTT listeners found on non-standard ports")
+        for service in services:
+            page.sample("mqtt_monitor_anonymous_service_info", 1,
+                        {'port': service['port'], 'pid': service['pid'] or 0, 'name': service['name'],
+                         'connack': service['mqtt'] or '', 'broker': service['broker'] or '',
+                         'anonymous': 'true' if service['anonymous'] else 'false'},
+                        help_text="One series per anonymous MQTT listener")
+
+        discovery = self.discovery.stats()
+        page.sample("mqtt_monitor_discovery_duration_seconds", f"{discovery['last_sweep_ms'] / 1000:.6f}",
+                    help_text="Duration of the last concurrent CONNECT sweep")
+        page.sample("mqtt_monitor_discovery_probes_total", discovery['probes'], kind="counter",
+                    help_text="Listeners probed with CONNECT since start")
+        page.sample("mqtt_monitor_discovery_cache_hits_total", discovery['hits'], kind="counter",
+                    help_text="Listeners answered from the (port, pid) cache")
+
+        scan = self.port_snapshots.stats()
+        page.sample("mqtt_monitor_port_scan_duration_seconds", f"{scan['last_scan_ms'] / 1000:.6f}",
+                    help_text="Duration of the last socket table scan")
+        page.sample("mqtt_monitor_port_scan_sockets", scan['last_rows'],
+                    help_text="Socket rows read by the last scan")
+        page.sample("mqtt_monitor_port_scans_total", scan['scans'], kind="counter",
+                    help_text="Socket table scans since start")
+        page.sample("mqtt_monitor_port_scan_seconds_total", f"{scan['total_scan_ms'] / 1000:.6f}",
+                    kind="counter", help_text="Time spent scanning the socket table")
+
+        for task, stats in self.scheduler.stats().items():
+            labels = {'task': task}
+            page.sample("mqtt_monitor_probe_duration_seconds", f"{stats['last_ms'] / 1000:.6f}", labels,
+                        help_text="Wall time of the last run of a probe task")
+            page.sample("mqtt_monitor_probe_cpu_seconds_total", f"{stats['cpu_ms'] / 1000:.6f}", labels,
+                        kind="counter", help_text="CPU time used by a probe task")
+            page.sample("mqtt_monitor_probe_runs_total", stats['runs'], labels, kind="counter",
+                        help_text="Runs of a probe task")
+            page.sample("mqtt_monitor_probe_interval_seconds", f"{stats['interval']:.3f}", labels,
+                        help_text="Current adaptive interval of a probe task")
+
+        cluster = values.get('cluster')
+        if cluster is not None:
+            page.sample("rabbitmq_cluster_active_nodes", cluster.active_nodes,
+                        help_text="Nodes that answered the MQTT handshake")
+            page.sample("rabbitmq_cluster_probe_duration_seconds", f"{cluster.elapsed_ms / 1000:.6f}",
+                        help_text="Wall time of the last concurrent cluster probe")
+            for node in cluster.nodes:
+                labels = {'node': node.name}
+                page.sample("rabbitmq_cluster_node_up", node.mqtt.is_mqtt, labels,
+                            help_text="1 if the node's MQTT listener answered with CONNACK")
+                page.sample("rabbitmq_cluster_node_amqp_open", node.amqp_open, labels,
+                            help_text="1 if the AMQP port accepts TCP connections")
+                page.sample("rabbitmq_cluster_node_mgmt_open", node.mgmt_open, labels,
+                            help_text="1 if the management port accepts TCP connections")
+                page.sample("rabbitmq_cluster_node_pid", node.pid or 0, labels,
+                            help_text="PID listening on the node's MQTT port (local nodes)")
+                page.histogram("rabbitmq_cluster_node_mqtt_latency_seconds",
+                               self.cluster_latency[node.name], labels,
+                               help_text="MQTT handshake latency per node")
+
+        if self.fleet is not None:
+            fleet = self.fleet.snapshot()
+            page.sample("mqtt_fleet_hosts", len(fleet),
+                        help_text="Hosts whose agent has reported")
+            page.sample("mqtt_fleet_gaps_total", self.fleet.gaps, kind="counter",
+                        help_text="Lost agent deltas that needed a resync")
+            for host, view in sorted(fleet.items()):
+                labels = {'host': host}
+                page.sample("mqtt_fleet_host_online", view.online and not view.stale, labels,
+                            help_text="1 if the host's agent is connected and its state is current")
+                page.sample("mqtt_fleet_host_listeners",
+                            sum(1 for key in view.state if key.startswith("port/")), labels,
+                            help_text="Watched ports listening on the host")
+                page.sample("mqtt_fleet_host_broker_processes",
+                            sum(1 for key in view.state if key.startswith("proc/")), labels,
+                            help_text="Broker processes running on the host")
+                if "host/cpu" in view.state:
+                    page.sample("mqtt_fleet_host_cpu_percent", view.state["host/cpu"], labels,
+                                help_text="Host CPU as reported by the agent (rounded)")
+
+        if self.server is not None:
+            page.sample("mqtt_monitor_scrapes_total", self.server.scrapes, kind="counter",
+                        help_text="Scrapes served (as of the last render)")
+        page.sample("mqtt_monitor_probe_error", self.last_error is not None,
+                    help_text="1 if the previous probe tick reported an error")
+        return page.render()
+
+    def publish(self, result):
+        """Scheduler sink: keep the newest page, log probe errors"""
+        if isinstance(result, ProbeError):
+            self.last_error = result
+            print(f"[daemon] probe error: {result.message}", file=sys.stderr)
+            return
+        self.last_error = None
+        self.page = result
+        self.rendered_at = time.time()
+
+    def on_broker_event(self, event):
+        self.scheduler.trigger('process', 'ports', 'mqtt')
+
+    # ---- lifecycle ----
+
+    def start(self, host=None, port=None):
+        self.process_watcher.subscribe(self.on_broker_event)
+        if self.fleet is not None:
+            self.fleet.start()
+        if port is not None:
+            self.server = MetricsServer(lambda: self.page, host or "0.0.0.0", port)
+            self.server.start()
+        self.scheduler.start()
+
+    def stop(self):
+        self.process_watcher.unsubscribe(self.on_broker_event)
+        self.scheduler.stop()
+        if self.server is not None:
+            self.server.stop()
+        if self.cluster_engine is not None:
+            self.cluster_engine.close()
+        if self.fleet is not None:
+            self.fleet.stop()
+
+
+def parse_listen(value):
+    host, _, port = value.rpartition(':')
+    return host or "0.0.0.0", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless MQTT/RabbitMQ monitor with Prometheus metrics")
+    parser.add_argument('--listen', default='0.0.0.0:9883', help='address of the /metrics endpoint')
+    parser.add_argument('--monitor-port', type=int, default=52345)
+    parser.add_argument('--default-port', type=int, default=1883)
+    parser.add_argument('--cluster', action='store_true', help='also probe the RabbitMQ cluster nodes')
+    parser.add_argument('--inventory', help='cluster inventory JSON (default: CLUSTER_INVENTORY, '
+                                            'CLUSTER_NODES or Plan A)')
+    parser.add_argument('--fleet', metavar='HOST:PORT', help='aggregate the push agents on this broker')
+    parser.add_argument('--once', action='store_true', help='print one metrics page and exit')
+    args = parser.parse_args()
+
+    monitor = HeadlessMonitor(
+        monitor_port=args.monitor_port,
+        default_port=args.default_port,
+        cluster_nodes=load_nodes(args.inventory) if args.cluster or args.inventory else None,
+        username=os.getenv("MQTT_USERNAME") or None,
+        password=os.getenv("MQTT_PASSWORD"),
+        fleet_broker=parse_broker(args.fleet) if args.fleet else None)
+
+    if args.once:
+        monitor.scheduler.run_once()
+        sys.stdout.write(monitor.page.decode('utf-8'))
+        monitor.stop()
+        return
+
+    host, port = parse_listen(args.listen)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    monitor.start(host, port)
+    print(f"[daemon] serving http://{host}:{port}/metrics")
+    try:
+        while not stopped.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        pass
+    monitor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import csv
+import math
+import threading
+from array import array
+from datetime import datetime
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+
+# Jarak antar sampel: task 'ports' monitor jalan dengan interval tetap ini
+SAMPLE_INTERVAL = 0.5
+# 24 jam pada SAMPLE_INTERVAL
+DAY_AT_HALF_SECOND = int(24 * 3600 / SAMPLE_INTERVAL)
+
+
+class PortHistory:
+    """Fixed-memory time series of one port: up/down, latency and PID.
+
+    Samples live in preallocated ``array`` ring buffers (17 bytes per
+    sample: timestamp 'd', latency 'f', pid 'i', up 'b'), so the default
+    capacity of 24 h at 0.5 s takes about 3 MB and never grows. Latency is
+    NaN when there was no handshake; pid 0 means unknown.
+    """
+
+    def __init__(self, port, capacity=DAY_AT_HALF_SECOND):
+        self.port = port
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.latency_ms = array('f', bytes(4 * capacity))
+        self.pids = array('i', bytes(4 * capacity))
+        self.up = array('b', bytes(capacity))
+        self._head = 0          # index sampel berikutnya
+        self._count = 0
+        self._up_count = 0      # jumlah sampel up di buffer, untuk uptime O(1)
+        self._lock = threading.Lock()
+
+        self.flaps = 0          # jumlah perubahan up <-> down
+        self.appended = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, up, latency_ms=None, pid=None):
+        with self._lock:
+            if self._count and bool(self.up[self._head - 1]) != bool(up):
+                self.flaps += 1
+            i = self._head
+            if self._count == self.capacity:
+                self._up_count -= self.up[i]
+            self.timestamps[i] = timestamp
+            self.latency_ms[i] = math.nan if latency_ms is None else latency_ms
+            self.pids[i] = pid or 0
+            self.up[i] = 1 if up else 0
+            self._up_count += self.up[i]
+            self._head = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self.appended += 1
+
+    def _indexes(self, last=None):
+        count = self._count if last is None else min(last, self._count)
+        start = (self._head - count) % self.capacity
+        return [(start + k) % self.capacity for k in range(count)]
+
+    def tail(self, last=None):
+        """Oldest-first list of (timestamp, up, latency_ms, pid) samples"""
+        with self._lock:
+            return [(self.timestamps[i], bool(self.up[i]), self.latency_ms[i], self.pids[i])
+                    for i in self._indexes(last)]
+
+    def up_states(self, last=None):
+        with self._lock:
+            return [self.up[i] for i in self._indexes(last)]
+
+    def latencies(self, last=None):
+        with self._lock:
+            return [self.latency_ms[i] for i in self._indexes(last)]
+
+    def uptime(self, last=None):
+        """Fraction of samples that were up (None without samples)"""
+        if last is None:
+            with self._lock:
+                return self._up_count / self._count if self._count else None
+        states = self.up_states(last)
+        return sum(states) / len(states) if states else None
+
+    def percentiles(self, last=None, points=(50, 99)):
+        """Latency percentiles over the last samples, NaN samples skipped"""
+        values = sorted(v for v in self.latencies(last) if not math.isnan(v))
+        if not values:
+            return tuple(None for _ in points)
+        return tuple(values[min(len(values) - 1, int(len(values) * p / 100))] for p in points)
+
+    def export_csv(self, path):
+        """Write every sample as CSV; return the number of rows"""
+        return export_histories_csv([self], path)
+
+
+def sparkline(values, width=40):
+    """Unicode block sparkline of the last ``width`` values (NaN -> space)"""
+    values = list(values)[-width:]
+    finite = [v for v in values if not math.isnan(v)]
+    if not finite:
+        return " " * len(values)
+    low, high = min(finite), max(finite)
+    span = (high - low) or 1.0
+    top = len(SPARK_BLOCKS) - 1
+    return "".join(" " if math.isnan(v) else SPARK_BLOCKS[int((v - low) / span * top)]
+                   for v in values)
+
+
+def export_histories_csv(histories, path):
+    """Write several PortHistory objects into one CSV, ordered by time"""
+    rows = []
+    for history in histories:
+        rows.extend((timestamp, history.port, up, latency, pid)
+                    for timestamp, up, latency, pid in history.tail())
+    rows.sort(key=lambda row: row[0])
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'port', 'up', 'latency_ms', 'pid'])
+        for timestamp, port, up, latency, pid in rows:
+            writer.writerow([
+                datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'),
+                port, int(up),
+                '' if math.isnan(latency) else f"{latency:.3f}",
+                pid or ''])
+    return len(rows)
@@ -0,0 +1,80 @@
+"""Cluster node inventory shared by the cluster monitor, clients and daemon.
+
+Nodes are read, in order of precedence, from:
+
+1. an explicit path (``--inventory`` / ``load_nodes(path)``)
+2. the file named by ``CLUSTER_INVENTORY``
+3. ``CLUSTER_NODES``, an inline list: ``host:mqtt:amqp:mgmt,...``
+   (ports may be left out, e.g. ``10.0.0.5,10.0.0.6:1884``)
+4. the built-in HA Plan A layout (3 nodes on localhost)
+
+An inventory file is JSON, either a list of nodes or ``{"nodes": [...]}``;
+each node needs ``host`` and may set ``name``, ``mqtt_port``,
+``amqp_port`` and ``mgmt_port``.
+"""
+import json
+import os
+
+from monitor_core.cluster_probe import PLAN_A_NODES
+
+DEFAULT_PORTS = {"mqtt_port": 1883, "amqp_port": 5672, "mgmt_port": 15672}
+
+
+def normalize_node(raw, index=0):
+    """Fill defaults and validate one node dict"""
+    if not isinstance(raw, dict) or not raw.get("host"):
+        raise ValueError(f"Inventory node #{index + 1} needs a 'host'")
+    node = {"host": str(raw["host"])}
+    for key, default in DEFAULT_PORTS.items():
+        try:
+            node[key] = int(raw.get(key, default))
+        except (TypeError, ValueError):
+            raise ValueError(f"Inventory node #{index + 1}: {key} must be a port number")
+    node["name"] = str(raw.get("name") or f"{node['host']}:{node['mqtt_port']}")
+    return node
+
+
+def parse_inline(text):
+    """'host:mqtt:amqp:mgmt,...' -> list of raw node dicts"""
+    nodes = []
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split(':')
+        node = {"host": parts[0]}
+        for key, value in zip(("mqtt_port", "amqp_port", "mgmt_port"), parts[1:]):
+            if value:
+                node[key] = value
+        nodes.append(node)
+    return nodes
+
+
+def read_inventory(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("nodes")
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of nodes or {{\"nodes\": [...]}}")
+    return data
+
+
+def load_nodes(path=None, env=None):
+    """Return the normalized node list (see module docstring for the sources)"""
+    env = os.environ if env is None else env
+    path = path or env.get("CLUSTER_INVENTORY")
+    if path:
+        raw = read_inventory(path)
+    elif env.get("CLUSTER_NODES"):
+        raw = parse_inline(env["CLUSTER_NODES"])
+    else:
+        raw = PLAN_A_NODES
+    if not raw:
+        raise ValueError("Cluster inventory is empty")
+    return [normalize_node(node, i) for i, node in enumerate(raw)]
+
+
+def mqtt_brokers(nodes):
+    """Broker list in the {'host', 'port'} shape the HA clients fail over with"""
+    return [{"host": node["host"], "port": node["mqtt_port"]} for node in nodes]
@@ -0,0 +1,263 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from monitor_core.proc_cache import get_process_cache
+
+# detected_at: time.monotonic() saat target terdeteksi (None = saat kill dimulai)
+# create_time: create_time process saat terdeteksi (None = PID dianggap masih baru)
+KillTarget = namedtuple('KillTarget', ['pid', 'port', 'description', 'detected_at', 'create_time'])
+
+KillResult = namedtuple('KillResult', [
+    'pid', 'port', 'description',
+    'outcome',          # 'terminated', 'killed', 'gone' atau 'failed'
+    'exit_ms',          # SIGTERM sampai process hilang
+    'error'])
+
+
+class KillReport(namedtuple('KillReport', ['tag', 'results', 'elapsed_ms'])):
+    """Outcome of one kill batch"""
+
+    __slots__ = ()
+
+    @property
+    def killed_count(self):
+        return sum(1 for r in self.results if r.outcome in ('terminated', 'killed', 'gone'))
+
+    @property
+    def failed_count(self):
+        return sum(1 for r in self.results if r.outcome == 'failed')
+
+    def summary(self):
+        text = f"{self.killed_count} killed"
+        if self.failed_count:
+            text += f", {self.failed_count} failed"
+        return text
+
+
+class PortRelease(namedtuple('PortRelease', [
+        'tag', 'ports',
+        'release_ms',       # deteksi sampai semua port dilepas, None kalau tidak dilepas
+        'released'])):
+    """The ports of one kill batch seen free again (or still busy at the deadline)"""
+
+    __slots__ = ()
+
+    def summary(self):
+        if self.released:
+            return f"port released {self.release_ms:.0f} ms after detection"
+        return "port still in use"
+
+
+class _Release:
+    """Ports of a kill batch that have not been seen free yet"""
+
+    __slots__ = ('tag', 'ports', 'pending', 'detected', 'released_at', 'exited_at', 'deadline')
+
+    def __init__(self, tag, ports, detected):
+        self.tag = tag
+        self.ports = ports
+        self.pending = set(ports)
+        self.detected = detected
+        self.released_at = None     # event 'close' terakhir dari watcher
+        self.exited_at = None       # diisi setelah semua target keluar (dan KillReport diantrekan)
+        self.deadline = None
+
+
+class KillEngine:
+    """Terminate a group of processes in parallel under one deadline.
+
+    Every target gets SIGTERM at once, the whole group is awaited with
+    ``psutil.wait_procs`` for ``grace`` seconds, stragglers get SIGKILL
+    and one more grace period. Before SIGTERM every PID is checked against
+    the process cache: a target whose process exited, or whose PID now
+    belongs to another process (create_time differs), is reported 'gone'
+    and left alone.
+
+    The batch does not wait for its ports to be released. That is
+    measured afterwards, from the 'close' events of ``listen_watcher``
+    while it runs, otherwise from the snapshots ``port_snapshots`` already
+    has (no extra scans), and reported as a PortRelease through
+    ``drain()``, at the latest ``release_timeout`` seconds after the kill.
+
+    ``submit()`` runs a batch on a background thread and queues the
+    KillReport for ``drain()``; ``kill_now()`` runs it on the caller's
+    thread (for loops that already live on a worker thread) and queues
+    it only with publish=True. A PortRelease is never queued before the
+    KillReport of its batch.
+    """
+
+    def __init__(self, port_snapshots=None, grace=1.0, release_timeout=2.0, listen_watcher=None):
+        self.port_snapshots = port_snapshots
+        self.listen_watcher = listen_watcher
+        self.grace = grace
+        self.release_timeout = release_timeout
+        self.reports = queue.Queue()
+        self._releases = []
+        self._release_lock = threading.Lock()
+        if listen_watcher is not None:
+            listen_watcher.subscribe(self._on_listen_events)
+
+    def submit(self, targets, tag="kill", callback=None):
+        """Kill in the background; the report goes to drain() and callback"""
+        def run():
+            report = self.kill_now(targets, tag, publish=True)
+            if callback is not None:
+                callback(report)
+
+        thread = threading.Thread(target=run, name=f"kill-{tag}", daemon=True)
+        thread.start()
+        return thread
+
+    def drain(self):
+        """Return every KillReport and PortRelease finished since the last call"""
+        self._check_releases()
+        reports = []
+        while True:
+            try:
+                reports.append(self.reports.get_nowait())
+            except queue.Empty:
+                return reports
+
+    def kill_now(self, targets, tag="kill", publish=False):
+        start = time.monotonic()
+        all_targets = list(targets)
+        targets = _unique(all_targets)
+        results = {}
+        procs = {}
+        # Didaftarkan sebelum SIGTERM supaya event 'close' dari watcher tidak terlewat
+        release = self._track_release(all_targets, start, tag) if publish else None
+
+        for target in targets:
+            # PID bisa sudah dipakai process lain sejak terdeteksi (daftar service bisa berumur 30 s)
+            if _replaced(target):
+                results[target.pid] = KillResult(target.pid, target.port, target.description,
+                                                 'gone', 0.0, None)
+                continue
+            try:
+                proc = psutil.Process(target.pid)
+                proc.terminate()
+                procs[proc] = target
+            except psutil.NoSuchProcess:
+                results[target.pid] = KillResult(target.pid, target.port, target.description,
+                                                 'gone', 0.0, None)
+            except psutil.Error as e:
+                results[target.pid] = KillResult(target.pid, target.port, target.description,
+                                                 'failed', None, str(e) or type(e).__name__)
+
+        sent_at = time.monotonic()
+        exited = {}
+
+        def on_exit(proc):
+            exited[proc.pid] = time.monotonic()
+
+        _, alive = psutil.wait_procs(list(procs), timeout=self.grace, callback=on_exit)
+        killed = set()
+        for proc in alive:
+            try:
+                proc.kill()
+                killed.add(proc.pid)
+            except psutil.NoSuchProcess:
+                exited.setdefault(proc.pid, time.monotonic())
+            except psutil.Error:
+                pass
+        if alive:
+            _, alive = psutil.wait_procs(alive, timeout=self.grace, callback=on_exit)
+        still_alive = {proc.pid for proc in alive}
+
+        for proc, target in procs.items():
+            if proc.pid in still_alive:
+                results[target.pid] = KillResult(target.pid, target.port, target.description,
+                                                 'failed', None, "Still running after SIGKILL")
+            else:
+                exit_ms = (exited.get(proc.pid, time.monotonic()) - sent_at) * 1000.0
+                outcome = 'killed' if proc.pid in killed else 'terminated'
+                results[target.pid] = KillResult(target.pid, target.port, target.description,
+                                                 outcome, exit_ms, None)
+
+        now = time.monotonic()
+        report = KillReport(tag, tuple(results[t.pid] for t in targets), (now - start) * 1000.0)
+        if publish:
+            self.reports.put(report)
+        if release is not None:
+            with self._release_lock:
+                release.exited_at = now
+                release.deadline = now + self.release_timeout
+                if not release.pending:
+                    self._finish(release, release.released_at)
+        return report
+
+    def _track_release(self, targets, start, tag):
+        ports = frozenset(t.port for t in targets if t.port)
+        if not ports or (self.port_snapshots is None and self.listen_watcher is None):
+            return None
+        detected = min((t.detected_at for t in targets if t.detected_at is not None), default=start)
+        release = _Release(tag, ports, detected)
+        with self._release_lock:
+            self._releases.append(release)
+        return release
+
+    def _on_listen_events(self, events):
+        # Thread watcher: port dianggap lepas kalau tidak ada listener lain (IPv4/IPv6) di port itu
+        closed = [event for event in events if event.kind == 'close']
+        if not closed:
+            return
+        with self._release_lock:
+            for release in list(self._releases):
+                for event in closed:
+                    if event.port in release.pending and not self.listen_watcher.is_listening(event.port):
+                        release.pending.discard(event.port)
+                        if not release.pending:
+                            release.released_at = event.timestamp
+                            if release.exited_at is not None:
+                                self._finish(release, release.released_at)
+                            break
+
+    def _check_releases(self):
+        """Resolve pending releases from the latest snapshot, expire overdue ones"""
+        now = time.monotonic()
+        watching = self.listen_watcher is not None and self.listen_watcher.running
+        snapshot = None
+        if not watching and self.port_snapshots is not None:
+            snapshot = self.port_snapshots.latest()
+        with self._release_lock:
+            for release in list(self._releases):
+                if release.exited_at is None:
+                    continue  # kill masih jalan
+                if (snapshot is not None and snapshot.taken_at >= release.exited_at
+                        and not any(snapshot.is_listening(port) for port in release.ports)):
+                    self._finish(release, snapshot.taken_at)
+                elif now >= release.deadline:
+                    self._finish(release, None)
+
+    def _finish(self, release, released_at):
+        """Queue the PortRelease (caller holds _release_lock)"""
+        self._releases.remove(release)
+        if released_at is None:
+            self.reports.put(PortRelease(release.tag, release.ports, None, False))
+        else:
+            release_ms = max(0.0, released_at - release.detected) * 1000.0
+            self.reports.put(PortRelease(release.tag, release.ports, release_ms, True))
+
+
+def _replaced(target):
+    """True when the target's process exited or its PID now belongs to another process"""
+    info = get_process_cache().get(target.pid, validate=True)
+    if info is None:
+        # Tidak terbaca (mis. AccessDenied) tapi masih ada: biar terminate() yang melapor
+        return not psutil.pid_exists(target.pid)
+    return target.create_time is not None and info.create_time != target.create_time
+
+
+def _unique(targets):
+    """Drop duplicate PIDs (one process can listen on several ports)"""
+    seen = set()
+    unique = []
+    for target in targets:
+        if target.pid and target.pid not in seen:
+            seen.add(target.pid)
+            unique.append(target)
+    return unique
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import namedtuple
+
+from monitor_core.proc_net import ProcNetBackend, get_backend
+
+# kind: 'open' (listener baru) atau 'close'; key: inode (Linux) atau PID (psutil)
+ListenEvent = namedtuple('ListenEvent', ['kind', 'port', 'key', 'timestamp'])
+
+
+class ListenerWatcher:
+    """Turn the LISTEN socket table into open/close events.
+
+    Each poll is one ``backend.scan()`` (on Linux: the LISTEN rows of
+    /proc/net/tcp{,6}, no per-process work) diffed against the previous
+    one by (port, inode), so a new listener is seen within one interval.
+    On Linux the default interval is 20 ms; elsewhere the psutil scan is
+    far more expensive and the watcher falls back to polling every 500 ms.
+    Subscribers are called on the watcher thread with a list of events
+    and should hand real work to another thread.
+    """
+
+    FAST_INTERVAL = 0.02
+    FALLBACK_INTERVAL = 0.5
+
+    def __init__(self, backend=None, interval=None):
+        self.backend = backend or get_backend()
+        self.event_driven = isinstance(self.backend, ProcNetBackend)
+        if interval is None:
+            interval = self.FAST_INTERVAL if self.event_driven else self.FALLBACK_INTERVAL
+        self.interval = interval
+
+        self._current = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.polls = 0
+        self.events = 0
+        self.last_scan_ms = 0.0
+
+    def subscribe(self, callback):
+        """callback([ListenEvent, ...]) is called from the watcher thread"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def is_listening(self, port):
+        """True when the last poll saw a listener on port"""
+        current = self._current
+        return current is not None and any(key_port == port for key_port, _ in current)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._current = None
+        self.poll()  # baseline: listener yang sudah ada bukan event
+        self._thread = threading.Thread(target=self._loop, name="listen-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[listen-watcher] poll error: {e}")
+
+    def poll(self):
+        """Scan once and dispatch the difference; return the events"""
+        start = time.perf_counter()
+        listeners, _ = self.backend.scan()
+        now = time.monotonic()
+        self.last_scan_ms = (time.perf_counter() - start) * 1000.0
+        self.polls += 1
+
+        current = set(listeners.items())
+        previous, self._current = self._current, current
+        if previous is None:
+            return []
+
+        events = [ListenEvent('open', port, key, now) for port, key in current - previous]
+        events += [ListenEvent('close', port, key, now) for port, key in previous - current]
+        if not events:
+            return events
+
+        self.events += len(events)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"[listen-watcher] subscriber error: {e}")
+        return events
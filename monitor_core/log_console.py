@@ -0,0 +1,176 @@
+import codecs
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+# Ukuran blok os.read dari pipe proses anak
+READ_BLOCK = 65536
+# Baris tanpa newline dipotong sepanjang ini agar buffer sisa tidak tumbuh terus
+MAX_LINE = 8192
+
+
+class LogBuffer:
+    """Bounded, thread-safe queue of (line, tag) waiting for the Tk thread.
+
+    Holds at most ``max_pending`` lines; when producers outrun the
+    flushes the oldest pending lines are dropped and counted, so memory
+    stays flat however fast a process writes.
+    """
+
+    def __init__(self, max_pending=2000):
+        self._lines = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+
+    def push(self, lines, tag):
+        with self._lock:
+            overflow = len(self._lines) + len(lines) - self._lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self._lines.extend((line, tag) for line in lines)
+            self.received += len(lines)
+
+    def drain(self):
+        """Take every pending line; return ([(line, tag)], dropped since last drain)"""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+            self.dropped = 0
+
+
+class LogConsole:
+    """Batched, bounded log view on top of a Tk Text widget.
+
+    ``write()`` and ``pump()`` may be called from any thread; they only
+    append to a LogBuffer. Every ``flush_ms`` the Tk thread drains the
+    buffer and inserts the whole batch with a single ``insert`` call,
+    then trims the widget to the last ``max_lines`` lines. Lines dropped
+    on overflow are replaced by one marker line and counted in
+    ``status``. The view only follows new output while it is scrolled to
+    the bottom, so reading older lines is not interrupted.
+    """
+
+    def __init__(self, root, text, max_lines=2000, flush_ms=100, max_pending=None):
+        self.root = root
+        self.text = text
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self.buffer = LogBuffer(max_pending or max_lines)
+        self.status = tk.StringVar(master=root, value="")
+        self.text.tag_config("dropped", foreground="gray")
+
+        self.shown = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._rate_mark = (time.monotonic(), 0)
+        self.rate = 0.0
+        self._job = self.root.after(self.flush_ms, self._flush)
+
+    def write(self, message, tag="normal"):
+        """Queue a message (one or more lines) for the next flush"""
+        lines = message.splitlines()
+        if lines:
+            self.buffer.push(lines, tag)
+
+    def pump(self, stream, tag="normal", encoding="utf-8", sink=None):
+        """Read a binary stream in blocks until EOF, queueing whole lines.
+
+        Blocks the calling thread; run it on a reader thread. ``sink``
+        gets every block of lines on that thread, including lines the
+        view later drops.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        fd = stream.fileno()
+        rest = ""
+        while True:
+            try:
+                block = os.read(fd, READ_BLOCK)
+            except OSError:
+                block = b""
+            chunk = decoder.decode(block, final=not block)
+            if chunk:
+                lines = (rest + chunk).split("\n")
+                rest = lines.pop()
+                if len(rest) > MAX_LINE:
+                    lines.append(rest)
+                    rest = ""
+                if lines:
+                    self._emit([line.rstrip("\r") for line in lines], tag, sink)
+            if not block:
+                break
+        if rest:
+            self._emit([rest.rstrip("\r")], tag, sink)
+
+    def _emit(self, lines, tag, sink):
+        if sink is not None:
+            sink(lines)
+        self.buffer.push(lines, tag)
+
+    def clear(self):
+        self.buffer.clear()
+        self.text.delete("1.0", tk.END)
+        self.shown = 0
+
+    def close(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _flush(self):
+        self._job = None
+        try:
+            lines, dropped = self.buffer.drain()
+            if lines or dropped:
+                self._insert(lines, dropped)
+            self._update_status()
+        except tk.TclError:
+            return  # widget sudah dihancurkan
+        self._job = self.root.after(self.flush_ms, self._flush)
+
+    def _insert(self, lines, dropped):
+        follow = self.text.yview()[1] >= 0.999
+        chunks = []
+        if dropped:
+            self.dropped += dropped
+            chunks += [f"... {dropped} lines dropped ...\n", "dropped"]
+        # Baris berurutan dengan tag sama digabung jadi satu chunk
+        run, run_tag = [], None
+        for line, tag in lines:
+            if tag != run_tag and run:
+                chunks += ["\n".join(run) + "\n", run_tag]
+                run = []
+            run.append(line)
+            run_tag = tag
+        if run:
+            chunks += ["\n".join(run) + "\n", run_tag]
+        self.text.insert(tk.END, *chunks)
+        self.flushes += 1
+
+        count = int(self.text.index("end-1c").split(".")[0]) - 1
+        if count > self.max_lines:
+            self.text.delete("1.0", f"{count - self.max_lines + 1}.0")
+            count = self.max_lines
+        self.shown = count
+        if follow:
+            self.text.see(tk.END)
+
+    def _update_status(self):
+        now = time.monotonic()
+        mark_time, mark_count = self._rate_mark
+        if now - mark_time >= 1.0:
+            self.rate = (self.buffer.received - mark_count) / (now - mark_time)
+            self._rate_mark = (now, self.buffer.received)
+        text = f"{self.buffer.received} lines, {self.rate:.0f}/s, last {self.shown} shown"
+        if self.dropped:
+            text += f", {self.dropped} dropped"
+        if self.status.get() != text:
+            self.status.set(text)
@@ -0,0 +1,116 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket latency handshake (detik): dari loopback sampai mendekati timeout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Histogram:
+    """Cumulative Prometheus histogram for one label set"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        out = []
+        for bound, count in zip(self.buckets, self.counts):
+            out.append(f"{name}_bucket{format_labels(dict(labels, le=repr(bound)))} {count}")
+        out.append(f"{name}_bucket{format_labels(dict(labels, le='+Inf'))} {self.count}")
+        out.append(f"{name}_sum{format_labels(labels)} {self.sum:.6f}")
+        out.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return out
+
+
+class Exposition:
+    """Builder for one Prometheus text-format page.
+
+    Samples are grouped per metric name in the order the names first
+    appear, as the text format requires, whatever order they are added in.
+    """
+
+    def __init__(self):
+        self._families = {}     # name -> [baris HELP/TYPE + sample]
+
+    def metric(self, name, kind, help_text):
+        if name not in self._families:
+            self._families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        return self._families[name]
+
+    def sample(self, name, value, labels=None, kind="gauge", help_text=""):
+        if isinstance(value, bool):
+            value = int(value)
+        self.metric(name, kind, help_text or name).append(f"{name}{format_labels(labels)} {value}")
+
+    def histogram(self, name, histogram, labels=None, help_text=""):
+        self.metric(name, "histogram", help_text or name).extend(histogram.lines(name, labels or {}))
+
+    def render(self):
+        return ("\n".join(line for lines in self._families.values() for line in lines) + "\n").encode('utf-8')
+
+
+class MetricsServer:
+    """Serve pre-rendered metrics over HTTP.
+
+    ``source()`` must return the cached page as bytes; it is called on every
+    scrape, so it has to be a plain attribute read, never a probe. That
+    keeps the cost of a scrape constant however often it is scraped.
+    """
+
+    def __init__(self, source, host="0.0.0.0", port=9883):
+        self.source = source
+        self.scrapes = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                server.scrapes += 1
+                body = server.source()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
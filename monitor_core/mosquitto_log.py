@@ -0,0 +1,274 @@
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from monitor_core.table_view import TableRow
+
+# Pola dikompilasi sekali; feed() memilih pola lewat startswith dulu
+PUBLISH_RE = re.compile(r"(\S+) \(d\d, q(\d), r(\d), m\d+, '(.*)', \.\.\. \((\d+) bytes\)\)")
+CONNECTED_RE = re.compile(r"(\S+) as (\S+) \(")
+# "disconnected" juga menutup varian "disconnected due to ...", "disconnected, not authorised." dst.
+GONE_RE = re.compile(r"Client (\S+) (?:\[\S+\] )?(?:disconnected|closed its connection|has exceeded timeout)")
+# Putus mendadak: "Socket error on client X, disconnecting." / "Bad socket read/write on client X: ..."
+DROPPED_RE = re.compile(r"(?:Socket error|Bad socket read/write) on client (\S+?)(?:,|:| )")
+SUBSCRIBED_RE = re.compile(r"\t(.*) \(QoS (\d)\)$")
+
+# Topic/client baru di atas batas ini per bucket digabung ke satu kunci
+OTHER = "(other)"
+
+LogEvent = namedtuple('LogEvent', ['kind', 'client', 'topic', 'size'])
+
+ClientRate = namedtuple('ClientRate', [
+    'client', 'address', 'online',
+    'in_rate',          # PUBLISH/s diterima dari client
+    'out_rate',         # PUBLISH/s dikirim ke client
+    'in_bytes_rate',
+    'subscriptions'])
+
+TopicRate = namedtuple('TopicRate', ['topic', 'in_rate', 'bytes_rate', 'out_rate'])
+
+CLIENT_COLUMNS = (
+    ("client", "Client", 18), ("address", "Address", 16),
+    ("in", "In msg/s", 8), ("out", "Out msg/s", 9), ("bytes", "In B/s", 8), ("subs", "Subs", 4),
+)
+TOPIC_COLUMNS = (
+    ("topic", "Topic", 28), ("in", "In msg/s", 8), ("bytes", "In B/s", 8), ("out", "Out msg/s", 9),
+)
+
+TrafficSnapshot = namedtuple('TrafficSnapshot', [
+    'clients', 'topics',        # list, diurutkan dari msg/s terbesar
+    'online', 'lines', 'events', 'unparsed', 'in_rate', 'out_rate'])
+
+
+def parse_line(line, pending=None):
+    """Turn one ``mosquitto -v`` line into a LogEvent (or None).
+
+    ``pending`` is the client of the SUBSCRIBE/UNSUBSCRIBE that the
+    following tab-indented topic lines belong to.
+    """
+    if line[:1].isdigit():
+        # Lewati timestamp ("1700000000: " atau format log_timestamp_format)
+        index = line.find(": ")
+        if index >= 0:
+            line = line[index + 2:]
+    if line.startswith("Received PUBLISH from "):
+        match = PUBLISH_RE.match(line, 22)
+        if match:
+            return LogEvent('publish_in', match.group(1), match.group(4), int(match.group(5)))
+    elif line.startswith("Sending PUBLISH to "):
+        match = PUBLISH_RE.match(line, 19)
+        if match:
+            return LogEvent('publish_out', match.group(1), match.group(4), int(match.group(5)))
+    elif line.startswith("\t"):
+        if pending is not None:
+            kind, client = pending
+            if kind == 'subscribe':
+                match = SUBSCRIBED_RE.match(line)
+                if match:
+                    return LogEvent('subscribe', client, match.group(1), int(match.group(2)))
+            else:
+                return LogEvent('unsubscribe', client, line[1:], 0)
+    elif line.startswith("Received SUBSCRIBE from "):
+        return LogEvent('subscribe_start', line[24:].strip(), None, 0)
+    elif line.startswith("Received UNSUBSCRIBE from "):
+        return LogEvent('unsubscribe_start', line[26:].strip(), None, 0)
+    elif line.startswith("New client connected from "):
+        match = CONNECTED_RE.match(line, 26)
+        if match:
+            return LogEvent('connect', match.group(2), match.group(1), 0)
+    elif line.startswith("Client "):
+        match = GONE_RE.match(line)
+        if match:
+            return LogEvent('disconnect', match.group(1), None, 0)
+    elif line.startswith(("Socket error on client ", "Bad socket read/write on client ")):
+        match = DROPPED_RE.match(line)
+        if match:
+            return LogEvent('disconnect', match.group(1), None, 0)
+    return None
+
+
+class RateWindow:
+    """Per-key message and byte counts over the last ``window`` seconds.
+
+    Counts land in one-second buckets; old buckets fall off the end, so
+    memory is bounded by ``window`` x ``max_keys`` however long it runs.
+    """
+
+    def __init__(self, window=10, max_keys=2000):
+        self.window = window
+        self.max_keys = max_keys
+        self._buckets = deque()     # (detik, {key: [count, bytes]})
+
+    def bucket(self, now):
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append((second, {}))
+            while self._buckets[0][0] <= second - self.window:
+                self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def add(self, bucket, key, size):
+        entry = bucket.get(key)
+        if entry is None:
+            if len(bucket) >= self.max_keys:
+                key = OTHER
+                entry = bucket.get(key)
+            if entry is None:
+                entry = bucket[key] = [0, 0]
+        entry[0] += 1
+        entry[1] += size
+
+    def rates(self, now):
+        """{key: (msg/s, bytes/s)} over the window ending at ``now``"""
+        oldest = int(now) - self.window
+        totals = {}
+        for second, bucket in self._buckets:
+            if second <= oldest:
+                continue
+            for key, (count, size) in bucket.items():
+                entry = totals.get(key)
+                if entry is None:
+                    totals[key] = [count, size]
+                else:
+                    entry[0] += count
+                    entry[1] += size
+        return {key: (count / self.window, size / self.window) for key, (count, size) in totals.items()}
+
+
+class MosquittoLogParser:
+    """Streaming parser of ``mosquitto -v`` output with per-client/topic rates.
+
+    ``feed(lines)`` is called from the log reader thread with each block
+    of lines; ``snapshot()`` is called from the Tk thread. Only the
+    verbose (debug) lines carry PUBLISH traffic, so the rates are zero
+    when the broker logs less. Like the rate windows, the online table is
+    capped at ``max_keys`` clients: past that the longest-connected entry
+    is dropped, so a disconnect line the parser misses cannot grow it.
+    """
+
+    def __init__(self, window=10, max_keys=2000, max_subscriptions=50):
+        self.window = window
+        self.max_keys = max_keys
+        self.max_subscriptions = max_subscriptions
+        self.clients_in = RateWindow(window, max_keys)
+        self.clients_out = RateWindow(window, max_keys)
+        self.topics_in = RateWindow(window, max_keys)
+        self.topics_out = RateWindow(window, max_keys)
+        self.online = {}            # client -> alamat
+        self.subscriptions = {}     # client -> set(filter)
+        self._pending = None
+        self._lock = threading.Lock()
+
+        self.lines = 0
+        self.events = 0
+        self.unparsed = 0
+
+    def feed(self, lines, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            clients_in = self.clients_in.bucket(now)
+            clients_out = self.clients_out.bucket(now)
+            topics_in = self.topics_in.bucket(now)
+            topics_out = self.topics_out.bucket(now)
+            events = 0
+            for line in lines:
+                event = parse_line(line, self._pending)
+                if event is None:
+                    continue
+                events += 1
+                kind = event[0]
+                if kind == 'publish_in':
+                    self.clients_in.add(clients_in, event.client, event.size)
+                    self.topics_in.add(topics_in, event.topic, event.size)
+                elif kind == 'publish_out':
+                    self.clients_out.add(clients_out, event.client, event.size)
+                    self.topics_out.add(topics_out, event.topic, event.size)
+                else:
+                    self._apply(event)
+            self.lines += len(lines)
+            self.events += events
+            self.unparsed += len(lines) - events
+
+    def _apply(self, event):
+        kind = event.kind
+        if kind == 'subscribe_start':
+            self._pending = ('subscribe', event.client)
+            return
+        if kind == 'unsubscribe_start':
+            self._pending = ('unsubscribe', event.client)
+            return
+        if kind == 'subscribe':
+            filters = self.subscriptions.get(event.client)
+            if filters is None:
+                if len(self.subscriptions) >= self.max_keys:
+                    return
+                filters = self.subscriptions[event.client] = set()
+            if len(filters) < self.max_subscriptions:
+                filters.add(event.topic)
+        elif kind == 'unsubscribe':
+            self.subscriptions.get(event.client, set()).discard(event.topic)
+        elif kind == 'connect':
+            # Sambung ulang pindah ke akhir, jadi urutan dict = urutan connect
+            self.online.pop(event.client, None)
+            self.subscriptions.pop(event.client, None)
+            if len(self.online) >= self.max_keys:
+                oldest = next(iter(self.online))
+                del self.online[oldest]
+                self.subscriptions.pop(oldest, None)
+            self.online[event.client] = event.topic
+            self._pending = None
+        elif kind == 'disconnect':
+            self.online.pop(event.client, None)
+            self.subscriptions.pop(event.client, None)
+            self._pending = None
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            clients_in = self.clients_in.rates(now)
+            clients_out = self.clients_out.rates(now)
+            topics_in = self.topics_in.rates(now)
+            topics_out = self.topics_out.rates(now)
+            names = set(clients_in) | set(clients_out) | set(self.online)
+            clients = [ClientRate(name, self.online.get(name, ""), name in self.online,
+                                  clients_in.get(name, (0.0, 0.0))[0], clients_out.get(name, (0.0, 0.0))[0],
+                                  clients_in.get(name, (0.0, 0.0))[1], len(self.subscriptions.get(name, ())))
+                       for name in names]
+            topics = [TopicRate(topic, topics_in.get(topic, (0.0, 0.0))[0], topics_in.get(topic, (0.0, 0.0))[1],
+                                topics_out.get(topic, (0.0, 0.0))[0])
+                      for topic in set(topics_in) | set(topics_out)]
+            online, lines, events, unparsed = len(self.online), self.lines, self.events, self.unparsed
+        clients.sort(key=lambda row: (row.in_rate + row.out_rate, row.client), reverse=True)
+        topics.sort(key=lambda row: (row.in_rate + row.out_rate, row.topic), reverse=True)
+        return TrafficSnapshot(clients, topics, online, lines, events, unparsed,
+                               sum(row.in_rate for row in topics), sum(row.out_rate for row in topics))
+
+
+def traffic_summary(snapshot):
+    return (f"{snapshot.online} clients online | in {snapshot.in_rate:.1f} msg/s, "
+            f"out {snapshot.out_rate:.1f} msg/s | {snapshot.lines} lines parsed "
+            f"({snapshot.unparsed} not traffic)")
+
+
+def client_rows(snapshot):
+    """TableRows for CLIENT_COLUMNS; offline clients in gray"""
+    rows = []
+    for row in snapshot.clients:
+        fg = "black" if row.online else "gray"
+        rows.append(TableRow(row.client,
+                             ((row.client, fg), (row.address or "--", fg), (f"{row.in_rate:.1f}", fg),
+                              (f"{row.out_rate:.1f}", fg), (f"{row.in_bytes_rate:.0f}", fg),
+                              (str(row.subscriptions), fg)),
+                             (row.client, row.address or None, row.in_rate, row.out_rate,
+                              row.in_bytes_rate, row.subscriptions)))
+    return rows
+
+
+def topic_rows(snapshot):
+    """TableRows for TOPIC_COLUMNS"""
+    return [TableRow(row.topic,
+                     ((row.topic, "black"), (f"{row.in_rate:.1f}", "black"),
+                      (f"{row.bytes_rate:.0f}", "black"), (f"{row.out_rate:.1f}", "black")),
+                     (row.topic, row.in_rate, row.bytes_rate, row.out_rate))
+            for row in snapshot.topics]
@@ -0,0 +1,134 @@
+import os
+from collections import namedtuple
+
+
+class Profile(namedtuple('Profile', ['name', 'description', 'settings'])):
+    """Named set of mosquitto.conf options; settings is a tuple of (option, value)"""
+
+    __slots__ = ()
+
+    @property
+    def verbose(self):
+        """True when the broker logs PUBLISH traffic (needed by the traffic panel)"""
+        return any(key == "log_type" and value in ("all", "debug") for key, value in self.settings)
+
+    @property
+    def persistent(self):
+        return ("persistence", "true") in self.settings
+
+
+PROFILES = {profile.name: profile for profile in (
+    Profile("verbose", "Defaults with every log line, same as `mosquitto -v`", (
+        ("set_tcp_nodelay", "false"),
+        ("max_inflight_messages", "20"),
+        ("max_queued_messages", "1000"),
+        ("persistence", "false"),
+        ("log_type", "all"),
+    )),
+    # Nagle mati, antrean pendek: pesan tidak menunggu di buffer
+    Profile("low-latency", "TCP_NODELAY, short per-client queues, errors/warnings only", (
+        ("set_tcp_nodelay", "true"),
+        ("max_inflight_messages", "10"),
+        ("max_queued_messages", "100"),
+        ("persistence", "false"),
+        ("log_type", "error"),
+        ("log_type", "warning"),
+    )),
+    # Nagle menggabungkan paket kecil; antrean panjang menahan burst
+    Profile("high-throughput", "Nagle on, deep inflight/queue limits, errors only", (
+        ("set_tcp_nodelay", "false"),
+        ("max_inflight_messages", "100"),
+        ("max_queued_messages", "10000"),
+        ("persistence", "false"),
+        ("log_type", "error"),
+    )),
+    Profile("durable", "Persistence with a 30 s autosave, large queues for offline clients", (
+        ("set_tcp_nodelay", "false"),
+        ("max_inflight_messages", "20"),
+        ("max_queued_messages", "100000"),
+        ("persistence", "true"),
+        ("autosave_interval", "30"),
+        ("log_type", "error"),
+        ("log_type", "warning"),
+        ("log_type", "notice"),
+    )),
+)}
+
+DEFAULT_PROFILE = "verbose"
+
+
+def read_base_config(path):
+    """(option, value) pairs of an existing config, without listener/port lines"""
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, _, value = line.partition(" ")
+            if key in ("listener", "port"):
+                continue    # listener diatur oleh profil
+            pairs.append((key, value.strip()))
+    return pairs
+
+
+def render_config(profile, port, data_dir=None, base=(), extra_lines=()):
+    """mosquitto.conf text for one listener on ``port`` with ``profile``.
+
+    ``base`` pairs (e.g. allow_anonymous/password_file of the password
+    broker) win over the profile for the options they set. ``extra_lines``
+    (e.g. a bridge section) go at the end.
+    """
+    base_keys = {key for key, _ in base}
+    lines = [f"# Generated from profile '{profile.name}': {profile.description}",
+             "# Rewritten on every start; edit monitor_core/mosquitto_profiles.py instead",
+             f"listener {port}"]
+    if "allow_anonymous" not in base_keys:
+        lines.append("allow_anonymous true")
+    lines += [f"{key} {value}" for key, value in profile.settings if key not in base_keys]
+    if profile.persistent and data_dir and "persistence_location" not in base_keys:
+        # mosquitto butuh trailing separator pada persistence_location
+        lines.append(f"persistence_location {os.path.join(data_dir, '')}")
+    lines += [f"{key} {value}" for key, value in base]
+    lines += list(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+def bridge_lines(port, hub_port, username=None, password=None, host="127.0.0.1"):
+    """Bridge section that joins the broker on ``port`` to the hub on ``hub_port``.
+
+    Every non-hub broker bridges ``#`` both ways to the hub, so a star of
+    brokers shares one topic space. ``try_private`` lets mosquitto know
+    the peer is a bridge and not echo messages back, which keeps the star
+    loop-free.
+    """
+    lines = ["",
+             f"connection pool-{port}-to-{hub_port}",
+             f"address {host}:{hub_port}",
+             "topic # both 0",
+             f"remote_clientid pool-bridge-{port}",
+             "cleansession true",
+             "try_private true",
+             "notifications false",
+             "start_type automatic",
+             "restart_timeout 1 10"]
+    if username:
+        lines.append(f"remote_username {username}")
+        if password:
+            lines.append(f"remote_password {password}")
+    return lines
+
+
+def write_config(profile_name, port, directory, base_path=None, extra_lines=()):
+    """Write ``mosquitto_<port>_<profile>.conf`` into ``directory`` and return its path"""
+    profile = PROFILES[profile_name]
+    os.makedirs(directory, exist_ok=True)
+    data_dir = None
+    if profile.persistent:
+        data_dir = os.path.join(directory, f"data_{port}")
+        os.makedirs(data_dir, exist_ok=True)
+    base = read_base_config(base_path) if base_path and os.path.exists(base_path) else ()
+    path = os.path.join(directory, f"mosquitto_{port}_{profile.name}.conf")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_config(profile, port, data_dir, base, extra_lines))
+    return path
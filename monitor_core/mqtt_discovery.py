@@ -0,0 +1,221 @@
+"""Concurrent MQTT discovery: CONNECT every listener, classify by CONNACK.
+
+    python -m monitor_core.mqtt_discovery                      # local listeners
+    python -m monitor_core.mqtt_discovery --host 10.0.0.5 --ports 1024-9999
+
+Listeners are probed with one anonymous CONNECT each, up to
+``concurrency`` at a time, so a sweep costs about one probe timeout per
+batch instead of one per port. Answers are cached per (port, pid): a
+listener that is still owned by the same PID is not probed again. With
+fingerprint=True each probe also identifies the broker (see
+monitor_core.mqtt_fingerprint), still once per listener lifetime.
+"""
+import argparse
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+from monitor_core.mqtt_fingerprint import fingerprint_async
+from monitor_core.mqtt_probe import MQTT_V311, mqtt_handshake_async
+from monitor_core.proc_cache import get_process_cache
+
+# Return code yang berarti broker jalan tapi menolak CONNECT tanpa kredensial
+AUTH_CODES = (0x04, 0x05, 0x86, 0x87)
+
+
+class DiscoveryResult(namedtuple('DiscoveryResult', [
+        'host', 'port', 'pid',
+        'handshake',        # HandshakeResult dari CONNECT anonim
+        'fingerprint',      # Fingerprint, None kalau discovery tanpa fingerprint
+        'probed_at'])):     # time.monotonic() saat probe selesai
+    """Outcome of probing one listener"""
+
+    __slots__ = ()
+
+    @property
+    def is_mqtt(self):
+        return self.handshake.is_mqtt
+
+    @property
+    def classification(self):
+        """'open', 'auth', 'mqtt', 'other' (no CONNACK) or 'closed'"""
+        handshake = self.handshake
+        if handshake.accepted:
+            return 'open'
+        if handshake.return_code in AUTH_CODES:
+            return 'auth'
+        if handshake.is_mqtt:
+            return 'mqtt'
+        return 'other' if handshake.connected else 'closed'
+
+
+class MqttDiscovery:
+    """Probe many listeners at once and remember the answers.
+
+    ``probe()`` runs one asyncio loop per call on the caller's thread
+    (normally a scheduler worker), with at most ``concurrency`` probes in
+    flight and ``timeout`` seconds per probe. Results are cached per
+    (host, port) together with the owning PID; the cached answer is reused
+    while the PID matches. Listeners without a known PID (another user's
+    process, remote hosts) are re-probed after ``unknown_ttl`` seconds.
+    ``fingerprint=True`` replaces the plain CONNECT with fingerprint_async
+    (username/password are tried alongside the anonymous CONNECT, so only
+    pass them when every probed listener is trusted; the monitors probe
+    unknown listeners without credentials).
+    """
+
+    def __init__(self, concurrency=256, timeout=0.5, protocol=MQTT_V311, unknown_ttl=30.0,
+                 fingerprint=False, username=None, password=None, sys_window=0.25):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.protocol = protocol
+        self.unknown_ttl = unknown_ttl
+        self.fingerprint = fingerprint
+        self.username = username
+        self.password = password
+        self.sys_window = sys_window
+        self._cache = {}            # (host, port) -> DiscoveryResult
+        self._lock = threading.Lock()
+
+        self.probes = 0
+        self.cache_hits = 0
+        self.last_sweep_ms = 0.0
+        self.last_probed = 0
+
+    def probe(self, targets, host='127.0.0.1', fingerprint=None):
+        """Probe (port, pid) pairs, return {port: DiscoveryResult}.
+
+        ``fingerprint`` overrides the instance setting for this call; with
+        False only the CONNACK is awaited (no $SYS window). A cached plain
+        answer is not reused when a fingerprint is asked for.
+        """
+        fingerprint = self.fingerprint if fingerprint is None else fingerprint
+        now = time.monotonic()
+        results = {}
+        pending = []
+        with self._lock:
+            for port, pid in targets:
+                cached = self._cache.get((host, port))
+                if cached is not None and cached.pid == pid and (
+                        pid is not None or now - cached.probed_at < self.unknown_ttl) and (
+                        cached.fingerprint is not None or not fingerprint):
+                    results[port] = cached
+                    self.cache_hits += 1
+                else:
+                    pending.append((port, pid))
+
+        start = time.perf_counter()
+        if pending:
+            for result in asyncio.run(self._probe_all(host, pending, fingerprint)):
+                results[result.port] = result
+        self.last_sweep_ms = (time.perf_counter() - start) * 1000.0
+        self.last_probed = len(pending)
+
+        with self._lock:
+            self.probes += len(pending)
+            for port, pid in pending:
+                self._cache[(host, port)] = results[port]
+        return results
+
+    def scan_range(self, host, ports):
+        """Probe a host/port range whose owners are unknown (pid None)"""
+        return self.probe(((port, None) for port in ports), host)
+
+    def forget(self, host='127.0.0.1', ports=None):
+        """Drop cached answers (all, or for the given ports)"""
+        with self._lock:
+            for key in list(self._cache):
+                if key[0] == host and (ports is None or key[1] in ports):
+                    del self._cache[key]
+
+    async def _probe_all(self, host, targets, with_fingerprint):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        names = {}
+        if with_fingerprint:
+            cache = get_process_cache()
+            names = {pid: cache.name(pid) for _, pid in targets if pid is not None}
+
+        async def probe_one(port, pid):
+            fingerprint = None
+            async with semaphore:
+                if with_fingerprint:
+                    fingerprint = await fingerprint_async(host, port, self.timeout, self.username,
+                                                          self.password, self.sys_window, names.get(pid))
+                    handshake = fingerprint.handshake
+                else:
+                    handshake = await mqtt_handshake_async(host, port, timeout=self.timeout,
+                                                           protocol=self.protocol)
+            return DiscoveryResult(host, port, pid, handshake, fingerprint, time.monotonic())
+
+        return await asyncio.gather(*(probe_one(port, pid) for port, pid in targets))
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._cache), 'probes': self.probes, 'hits': self.cache_hits,
+                    'last_sweep_ms': self.last_sweep_ms, 'last_probed': self.last_probed}
+
+    def stats_text(self):
+        s = self.stats()
+        return (f"Discovery: {s['last_probed']} probed in {s['last_sweep_ms']:.0f} ms "
+                f"({s['hits']} cached)")
+
+
+def parse_ports(text):
+    """'1883,8883,10000-10100' -> list of ports"""
+    ports = []
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            low, high = part.split('-', 1)
+            ports.extend(range(int(low), int(high) + 1))
+        elif part:
+            ports.append(int(part))
+    return ports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find MQTT brokers by CONNECT/CONNACK")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ports', help="e.g. 1883,8883,10000-10100 (default: local listeners)")
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=0.5)
+    parser.add_argument('--all', action='store_true', help="also print listeners without CONNACK")
+    parser.add_argument('--fingerprint', action='store_true',
+                        help="identify the broker (MQTT 5 properties, $SYS, credentials)")
+    # Tidak dari .env: kredensial hanya dikirim kalau diminta eksplisit
+    parser.add_argument('--username', help="also try this login (sent to every probed port)")
+    parser.add_argument('--password')
+    args = parser.parse_args(argv)
+
+    discovery = MqttDiscovery(concurrency=args.concurrency, timeout=args.timeout,
+                              fingerprint=args.fingerprint, username=args.username,
+                              password=args.password)
+    if args.ports:
+        results = discovery.scan_range(args.host, parse_ports(args.ports))
+    else:
+        from monitor_core.port_snapshot import PortSnapshotService
+        snapshot = PortSnapshotService().get()
+        results = discovery.probe(((l.port, l.pid) for l in snapshot.listeners()), args.host)
+
+    for port in sorted(results):
+        result = results[port]
+        if result.is_mqtt or (args.all and result.classification != 'closed'):
+            pid = result.pid if result.pid is not None else '-'
+            print(f"{port:>5}  {result.classification:<6}  pid {pid:<7}  "
+                  f"{result.handshake.reason}  {result.handshake.latency_us / 1000:.1f} ms")
+            fingerprint = result.fingerprint
+            if fingerprint is not None and result.is_mqtt:
+                print(f"       {fingerprint.broker_text} ({fingerprint.evidence}), "
+                      f"MQTT {'5' if fingerprint.handshake.protocol == 5 else '3.1.1'}"
+                      f"{', ' + fingerprint.limits_text() if fingerprint.limits_text() else ''}"
+                      f"{', credentials ' + fingerprint.auth_handshake.reason if fingerprint.auth_handshake else ''}"
+                      f", {len(fingerprint.sys_topics)} $SYS topics")
+    found = sum(1 for r in results.values() if r.is_mqtt)
+    print(f"{found} MQTT listener(s) among {len(results)} port(s), "
+          f"{discovery.last_sweep_ms:.0f} ms (concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import namedtuple
+
+from monitor_core.mqtt_probe import (
+    DISCONNECT, MQTT_V311, MQTT_V5, PUBLISH, SUBACK,
+    build_subscribe, open_session_async, parse_properties, parse_publish, read_packet_async)
+
+# Return code CONNECT MQTT 5 yang berarti "protokol ini tidak didukung"
+UNSUPPORTED_VERSION = (0x01, 0x84)
+
+# Nama process -> jenis broker (bukti paling lemah, dipakai kalau $SYS tidak menjawab)
+PROCESS_HINTS = (
+    ('mosquitto', 'mosquitto'),
+    ('emqx', 'emqx'),
+    ('vernemq', 'vernemq'),
+    ('hivemq', 'hivemq'),
+    ('rabbitmq', 'rabbitmq'),
+    ('nanomq', 'nanomq'),
+)
+
+
+class Fingerprint(namedtuple('Fingerprint', [
+        'handshake',        # CONNECT tanpa kredensial
+        'auth_handshake',   # CONNECT dengan kredensial, None kalau tidak ada kredensial
+        'properties',       # MQTT 5 CONNACK properties (dict), kosong untuk 3.1.1
+        'sys_topics',       # topic $SYS yang terkirim selama jendela subscribe
+        'broker',           # 'mosquitto', 'emqx', 'rabbitmq', ... atau 'unknown'
+        'version',
+        'evidence'])):      # dasar klasifikasi, untuk ditampilkan
+    """What one listener revealed about itself"""
+
+    __slots__ = ()
+
+    @property
+    def anonymous(self):
+        """The broker accepted a CONNECT without username/password"""
+        return self.handshake.accepted
+
+    @property
+    def credentials_accepted(self):
+        return None if self.auth_handshake is None else self.auth_handshake.accepted
+
+    @property
+    def broker_text(self):
+        if self.broker == 'unknown':
+            return "Unknown MQTT broker"
+        return f"{self.broker} {self.version}" if self.version else self.broker
+
+    def limits_text(self):
+        """MQTT 5 limits the broker announced, e.g. 'max QoS 1, receive max 100'"""
+        labels = (('maximum_qos', "max QoS"), ('receive_maximum', "receive max"),
+                  ('maximum_packet_size', "max packet"), ('server_keepalive', "keepalive"))
+        return ", ".join(f"{label} {self.properties[key]}" for key, label in labels
+                         if key in self.properties)
+
+
+async def fingerprint_async(host, port, timeout=0.5, username=None, password=None,
+                            sys_window=0.25, process_name=None):
+    """Identify an MQTT listener in one CONNECT round trip per credential set.
+
+    The anonymous and (if given) credentialed CONNECTs run concurrently as
+    MQTT 5; a broker that rejects version 5 is retried once as 3.1.1. On
+    the first accepted session ``$SYS/#`` is subscribed for ``sys_window``
+    seconds to collect the retained $SYS topics. Never raises.
+    """
+    handshake, auth_handshake, sessions = await _connect_pair(
+        host, port, timeout, MQTT_V5, username, password)
+    # Broker lama menjawab "unsupported version" atau langsung menutup koneksi
+    closed = handshake.connected and not handshake.is_mqtt and handshake.error != "CONNACK timeout"
+    if handshake.return_code in UNSUPPORTED_VERSION or closed:
+        _close(sessions)
+        handshake, auth_handshake, sessions = await _connect_pair(
+            host, port, timeout, MQTT_V311, username, password)
+
+    sys_topics = {}
+    try:
+        for result, reader, writer in sessions:
+            if result.accepted:
+                sys_topics = await _collect_sys(reader, writer, result.protocol, sys_window)
+                break
+    finally:
+        _close(sessions)
+
+    source = handshake if handshake.is_mqtt or auth_handshake is None else auth_handshake
+    properties = parse_properties(source.properties) if source.protocol == MQTT_V5 else {}
+    broker, version, evidence = classify(source, properties, sys_topics, process_name)
+    return Fingerprint(handshake, auth_handshake, properties, tuple(sorted(sys_topics)),
+                       broker, version, evidence)
+
+
+async def _connect_pair(host, port, timeout, protocol, username, password):
+    attempts = [open_session_async(host, port, timeout, protocol)]
+    if username is not None:
+        attempts.append(open_session_async(host, port, timeout, protocol,
+                                           username=username, password=password))
+    sessions = await asyncio.gather(*attempts)
+    auth_handshake = sessions[1][0] if len(sessions) > 1 else None
+    return sessions[0][0], auth_handshake, sessions
+
+
+def _close(sessions):
+    for result, _, writer in sessions:
+        if writer is None:
+            continue
+        if result.accepted:
+            writer.write(DISCONNECT)
+        writer.close()
+
+
+async def _collect_sys(reader, writer, protocol, window, limit=500):
+    """Subscribe to $SYS/# and return {topic: payload} seen within window"""
+    topics = {}
+    writer.write(build_subscribe(1, '$SYS/#', protocol=protocol))
+    deadline = time.monotonic() + window
+    try:
+        while len(topics) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            header, body = await asyncio.wait_for(read_packet_async(reader), remaining)
+            if header & 0xF0 == SUBACK and body and body[-1] >= 0x80:
+                break  # broker menolak $SYS/#
+            if header & 0xF0 == PUBLISH:
+                topic, payload = parse_publish(header, body, protocol)
+                topics[topic] = payload[:200]
+    except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        pass
+    return topics
+
+
+def classify(handshake, properties, sys_topics, process_name=None):
+    """Return (broker, version, evidence) from what the listener answered"""
+    for topic, payload in sys_topics.items():
+        text = payload.decode('utf-8', 'replace').strip()
+        if topic == '$SYS/broker/version' and text.lower().startswith('mosquitto'):
+            return 'mosquitto', text.split()[-1], topic
+        if topic.startswith('$SYS/brokers/') and topic.endswith('/version'):
+            return 'emqx', text, topic
+        if 'vernemq' in text.lower():
+            return 'vernemq', text.split()[-1], topic
+        if 'hivemq' in text.lower():
+            return 'hivemq', text.split()[-1], topic
+
+    if sys_topics:
+        if any(topic.startswith('$SYS/brokers') for topic in sys_topics):
+            return 'emqx', None, "$SYS/brokers topics"
+        if any(topic.startswith('$SYS/broker/') for topic in sys_topics):
+            return 'mosquitto', None, "$SYS/broker topics"
+
+    name = (process_name or '').lower()
+    for keyword, broker in PROCESS_HINTS:
+        if keyword in name:
+            return broker, None, f"process name {process_name}"
+
+    if handshake.protocol == MQTT_V311 and not sys_topics and name.startswith(('beam', 'erl')):
+        # Plugin MQTT RabbitMQ (< 3.13): tidak ada MQTT 5 dan tidak ada $SYS, jalan di Erlang VM
+        return 'rabbitmq', None, "Erlang VM without MQTT 5 or $SYS"
+    if properties.get('topic_alias_maximum') == 10 and 'maximum_packet_size' not in properties:
+        return 'mosquitto', None, "MQTT 5 CONNACK defaults"
+    if properties.get('shared_subscription_available') is not None and \
+            properties.get('topic_alias_maximum') == 65535:
+        return 'emqx', None, "MQTT 5 CONNACK defaults"
+    return 'unknown', None, "no $SYS answer"
@@ -0,0 +1,410 @@
+import asyncio
+import secrets
+import socket
+import struct
+import time
+from collections import namedtuple
+
+MQTT_V311 = 4
+MQTT_V5 = 5
+
+CONNECT = 0x10
+CONNACK = 0x20
+DISCONNECT = b'\xe0\x00'
+
+# Return code CONNACK (3.1.1) dan reason code umum (5)
+RETURN_CODES = {
+    0x00: "Accepted",
+    0x01: "Unacceptable protocol version",
+    0x02: "Identifier rejected",
+    0x03: "Server unavailable",
+    0x04: "Bad username or password",
+    0x05: "Not authorized",
+    0x80: "Unspecified error",
+    0x84: "Unsupported protocol version",
+    0x85: "Client identifier not valid",
+    0x86: "Bad username or password",
+    0x87: "Not authorized",
+    0x88: "Server unavailable",
+    0x89: "Server busy",
+    0x8A: "Banned",
+    0x8C: "Bad authentication method",
+}
+
+
+class HandshakeResult(namedtuple('HandshakeResult', [
+        'host', 'port', 'protocol', 'client_id',
+        'connected',        # TCP connect berhasil
+        'return_code',      # CONNACK return/reason code, None kalau tidak ada CONNACK
+        'session_present',
+        'connect_us',       # waktu TCP connect (mikrodetik)
+        'latency_us',       # TCP connect sampai CONNACK diterima (mikrodetik)
+        'properties',       # raw MQTT 5 CONNACK properties (bytes)
+        'error'])):
+    """Outcome of one CONNECT/CONNACK round trip"""
+
+    __slots__ = ()
+
+    @property
+    def is_mqtt(self):
+        """The listener answered with a CONNACK, whatever the return code"""
+        return self.return_code is not None
+
+    @property
+    def accepted(self):
+        return self.return_code == 0
+
+    @property
+    def reason(self):
+        if self.return_code is None:
+            return self.error or "No CONNACK"
+        return RETURN_CODES.get(self.return_code, f"Code 0x{self.return_code:02x}")
+
+
+def new_client_id(prefix="mon"):
+    """Unique client id (<= 23 chars so strict 3.1.1 brokers accept it)"""
+    return f"{prefix}-{secrets.token_hex(8)}"
+
+
+def encode_remaining_length(length):
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _utf8(value):
+    data = value.encode('utf-8') if isinstance(value, str) else value
+    return struct.pack('!H', len(data)) + data
+
+
+def build_connect(client_id, protocol=MQTT_V311, keepalive=10,
+                  username=None, password=None, properties=b'', will=None):
+    """Encode a minimal clean-session CONNECT packet.
+
+    ``will`` is an optional (topic, payload, retain) QoS 0 last will.
+    """
+    flags = 0x02  # clean session / clean start
+    payload = _utf8(client_id)
+    if will is not None:
+        will_topic, will_payload, will_retain = will
+        flags |= 0x04 | (0x20 if will_retain else 0)
+        if protocol == MQTT_V5:
+            payload += b'\x00'  # will properties kosong
+        payload += _utf8(will_topic) + _utf8(will_payload)
+    if username is not None:
+        flags |= 0x80
+        payload += _utf8(username)
+        if password is not None:
+            flags |= 0x40
+            payload += _utf8(password)
+
+    variable = _utf8('MQTT') + bytes([protocol, flags]) + struct.pack('!H', keepalive)
+    if protocol == MQTT_V5:
+        variable += encode_remaining_length(len(properties)) + properties
+
+    body = variable + payload
+    return bytes([CONNECT]) + encode_remaining_length(len(body)) + body
+
+
+def _recv_exact(sock, count, deadline):
+    data = bytearray()
+    while len(data) < count:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise socket.timeout("CONNACK timeout")
+        sock.settimeout(remaining)
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed before CONNACK")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def read_packet(sock, deadline):
+    """Read one MQTT control packet, return (header_byte, body)"""
+    header = _recv_exact(sock, 1, deadline)[0]
+    multiplier = 1
+    length = 0
+    for _ in range(4):
+        byte = _recv_exact(sock, 1, deadline)[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    else:
+        raise ValueError("Malformed remaining length")
+    return header, _recv_exact(sock, length, deadline)
+
+
+def parse_connack(body, protocol=MQTT_V311):
+    """Return (session_present, return_code, raw_properties)"""
+    if len(body) < 2:
+        raise ValueError("CONNACK too short")
+    session_present = bool(body[0] & 0x01)
+    return_code = body[1]
+    properties = b''
+    if protocol == MQTT_V5 and len(body) > 2:
+        # Properties length (varint) lalu isi properties
+        multiplier = 1
+        length = 0
+        index = 2
+        while index < len(body):
+            byte = body[index]
+            index += 1
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        properties = body[index:index + length]
+    return session_present, return_code, properties
+
+
+def mqtt_handshake(host, port, timeout=1.0, protocol=MQTT_V311,
+                   username=None, password=None, client_id=None):
+    """Open a TCP connection, send CONNECT, wait for CONNACK, then DISCONNECT.
+
+    Never raises: failures are reported through ``HandshakeResult.error``.
+    """
+    client_id = client_id or new_client_id()
+    start = time.perf_counter()
+    deadline = start + timeout
+    connect_us = None
+    sock = None
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connect_us = int((time.perf_counter() - start) * 1_000_000)
+
+        sock.sendall(build_connect(client_id, protocol, username=username, password=password))
+        header, body = read_packet(sock, deadline)
+        latency_us = int((time.perf_counter() - start) * 1_000_000)
+        if header & 0xF0 != CONNACK:
+            return HandshakeResult(host, port, protocol, client_id, True, None, False,
+                                   connect_us, latency_us, b'', f"Unexpected packet 0x{header:02x}")
+
+        session_present, return_code, properties = parse_connack(body, protocol)
+        if return_code == 0:
+            try:
+                sock.sendall(DISCONNECT)
+            except OSError:
+                pass
+        return HandshakeResult(host, port, protocol, client_id, True, return_code,
+                               session_present, connect_us, latency_us, properties, None)
+    except (OSError, ValueError) as e:
+        latency_us = int((time.perf_counter() - start) * 1_000_000)
+        return HandshakeResult(host, port, protocol, client_id, connect_us is not None, None,
+                               False, connect_us, latency_us, b'', str(e) or type(e).__name__)
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+async def read_packet_async(reader):
+    """asyncio version of read_packet, return (header_byte, body)"""
+    header = (await reader.readexactly(1))[0]
+    multiplier = 1
+    length = 0
+    for _ in range(4):
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    else:
+        raise ValueError("Malformed remaining length")
+    return header, await reader.readexactly(length)
+
+
+async def open_session_async(host, port, timeout=1.0, protocol=MQTT_V311,
+                             username=None, password=None, client_id=None):
+    """CONNECT and wait for CONNACK, leaving the connection open.
+
+    Returns (HandshakeResult, reader, writer). reader/writer are None when
+    the TCP connect failed; otherwise the caller must close the writer.
+    """
+    client_id = client_id or new_client_id()
+    start = time.perf_counter()
+    connect_us = None
+    reader = writer = None
+    try:
+        async def round_trip():
+            nonlocal connect_us, reader, writer
+            reader, writer = await asyncio.open_connection(host, port)
+            connect_us = int((time.perf_counter() - start) * 1_000_000)
+            writer.write(build_connect(client_id, protocol, username=username, password=password))
+            await writer.drain()
+            return await read_packet_async(reader)
+
+        header, body = await asyncio.wait_for(round_trip(), timeout)
+        latency_us = int((time.perf_counter() - start) * 1_000_000)
+        if header & 0xF0 != CONNACK:
+            return (HandshakeResult(host, port, protocol, client_id, True, None, False,
+                                    connect_us, latency_us, b'', f"Unexpected packet 0x{header:02x}"),
+                    reader, writer)
+
+        session_present, return_code, properties = parse_connack(body, protocol)
+        return (HandshakeResult(host, port, protocol, client_id, True, return_code,
+                                session_present, connect_us, latency_us, properties, None),
+                reader, writer)
+    except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        latency_us = int((time.perf_counter() - start) * 1_000_000)
+        error = "CONNACK timeout" if isinstance(e, asyncio.TimeoutError) else (str(e) or type(e).__name__)
+        return (HandshakeResult(host, port, protocol, client_id, connect_us is not None, None,
+                                False, connect_us, latency_us, b'', error),
+                reader, writer)
+
+
+async def mqtt_handshake_async(host, port, timeout=1.0, protocol=MQTT_V311,
+                               username=None, password=None, client_id=None):
+    """asyncio version of mqtt_handshake, for probing many listeners at once"""
+    result, _, writer = await open_session_async(host, port, timeout, protocol,
+                                                 username, password, client_id)
+    if writer is not None:
+        if result.accepted:
+            writer.write(DISCONNECT)
+        writer.close()
+    return result
+
+
+# MQTT 5 property id -> (nama, tipe); tipe: 1/2/4 byte integer, 'varint', 'str', 'bin', 'pair'
+PROPERTIES = {
+    0x01: ('payload_format', 1),
+    0x02: ('message_expiry', 4),
+    0x03: ('content_type', 'str'),
+    0x08: ('response_topic', 'str'),
+    0x09: ('correlation_data', 'bin'),
+    0x0B: ('subscription_identifier', 'varint'),
+    0x11: ('session_expiry', 4),
+    0x12: ('assigned_client_id', 'str'),
+    0x13: ('server_keepalive', 2),
+    0x15: ('auth_method', 'str'),
+    0x16: ('auth_data', 'bin'),
+    0x1A: ('response_information', 'str'),
+    0x1C: ('server_reference', 'str'),
+    0x1F: ('reason_string', 'str'),
+    0x21: ('receive_maximum', 2),
+    0x22: ('topic_alias_maximum', 2),
+    0x23: ('topic_alias', 2),
+    0x24: ('maximum_qos', 1),
+    0x25: ('retain_available', 1),
+    0x26: ('user_property', 'pair'),
+    0x27: ('maximum_packet_size', 4),
+    0x28: ('wildcard_subscription_available', 1),
+    0x29: ('subscription_identifiers_available', 1),
+    0x2A: ('shared_subscription_available', 1),
+}
+
+
+def decode_varint(data, index):
+    """Return (value, next_index) of a variable byte integer"""
+    multiplier = 1
+    value = 0
+    for _ in range(4):
+        byte = data[index]
+        index += 1
+        value += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            return value, index
+        multiplier *= 128
+    raise ValueError("Malformed variable byte integer")
+
+
+def parse_properties(raw):
+    """Decode raw MQTT 5 properties into {name: value}.
+
+    user_property becomes a list of (key, value) pairs. Decoding stops at
+    the first unknown property id, keeping what was read so far.
+    """
+    props = {}
+    index = 0
+    try:
+        while index < len(raw):
+            prop_id = raw[index]
+            index += 1
+            if prop_id not in PROPERTIES:
+                break
+            name, kind = PROPERTIES[prop_id]
+            if kind in (1, 2, 4):
+                value = int.from_bytes(raw[index:index + kind], 'big')
+                index += kind
+            elif kind == 'varint':
+                value, index = decode_varint(raw, index)
+            else:
+                values = []
+                for _ in range(2 if kind == 'pair' else 1):
+                    length = struct.unpack_from('!H', raw, index)[0]
+                    chunk = raw[index + 2:index + 2 + length]
+                    index += 2 + length
+                    values.append(chunk if kind == 'bin' else chunk.decode('utf-8', 'replace'))
+                value = tuple(values) if kind == 'pair' else values[0]
+            if kind == 'pair':
+                props.setdefault(name, []).append(value)
+            else:
+                props[name] = value
+    except (IndexError, struct.error, ValueError):
+        pass
+    return props
+
+
+SUBSCRIBE = 0x82
+SUBACK = 0x90
+PUBLISH = 0x30
+
+
+def build_subscribe(packet_id, topic, qos=0, protocol=MQTT_V311):
+    """Encode a SUBSCRIBE for one topic filter"""
+    variable = struct.pack('!H', packet_id)
+    if protocol == MQTT_V5:
+        variable += b'\x00'  # tanpa properties
+    body = variable + _utf8(topic) + bytes([qos])
+    return bytes([SUBSCRIBE]) + encode_remaining_length(len(body)) + body
+
+
+def build_publish(topic, payload, protocol=MQTT_V311, retain=False):
+    """Encode a QoS 0 PUBLISH"""
+    variable = _utf8(topic)
+    if protocol == MQTT_V5:
+        variable += b'\x00'  # tanpa properties
+    body = variable + payload
+    return bytes([PUBLISH | (0x01 if retain else 0)]) + encode_remaining_length(len(body)) + body
+
+
+def split_packet(buffer):
+    """Return (header_byte, body, consumed) of the first complete packet in buffer, or None"""
+    length = 0
+    multiplier = 1
+    index = 1
+    while True:
+        if index >= len(buffer):
+            return None
+        byte = buffer[index]
+        index += 1
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        if index > 4:
+            raise ValueError("Malformed remaining length")
+        multiplier *= 128
+    end = index + length
+    if end > len(buffer):
+        return None
+    return buffer[0], bytes(buffer[index:end]), end
+
+
+def parse_publish(header, body, protocol=MQTT_V311):
+    """Return (topic, payload) of a PUBLISH packet"""
+    length = struct.unpack_from('!H', body, 0)[0]
+    topic = body[2:2 + length].decode('utf-8', 'replace')
+    index = 2 + length
+    if header & 0x06:
+        index += 2  # packet id (QoS > 0)
+    if protocol == MQTT_V5:
+        prop_length, index = decode_varint(body, index)
+        index += prop_length
+    return topic, body[index:]
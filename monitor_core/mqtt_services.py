@@ -0,0 +1,93 @@
+MQTT_KEYWORDS = ['mosquitto', 'mqtt', 'emqx', 'hivemq', 'vernemq', 'rabbitmq']
+
+# Node RabbitMQ (Erlang VM); plugin MQTT-nya menerima CONNECT anonim dari localhost
+ERLANG_VM_PREFIXES = ('beam', 'erl')
+
+
+def find_mqtt_services(snapshot, exclude_ports=(), test_connection=None, ports=None, discovery=None,
+                       fingerprint=None):
+    """Find MQTT-looking listeners on user ports in a PortSnapshot.
+
+    A listener counts when its process name contains one of MQTT_KEYWORDS.
+    With ``discovery`` (an MqttDiscovery) every candidate is also sent a
+    CONNECT, all at once, and any listener that answers with a CONNACK
+    counts as well. Without it, listeners whose process cannot be
+    identified are kept only if ``test_connection(port)`` returns True.
+    Returns a list of dicts with port/pid/name/anonymous/mqtt/broker/keyword/
+    create_time, the shape the monitor windows already use; 'mqtt' is the CONNACK reason
+    and 'broker' the fingerprint text, None when not probed. Once probed,
+    'anonymous' means the broker accepted a CONNECT without credentials.
+    'keyword' is True when the process name matched MQTT_KEYWORDS and
+    'create_time' identifies the process for KillTarget (PIDs get reused).
+    ``ports`` limits the check to those ports (e.g. ports that just opened).
+    ``fingerprint`` overrides the discovery's own setting; kill paths pass
+    False so the decision rests on the CONNACK alone.
+    The list is for display; use kill_targets() before killing anything.
+    """
+    services = []
+    candidates = [port for port in (snapshot.ports() if ports is None else sorted(ports))
+                  if 1024 < port < 65535 and port not in exclude_ports
+                  and snapshot.is_listening(port)]
+    listeners = snapshot.listeners(candidates)
+
+    probed = {}
+    if discovery is not None:
+        probed = discovery.probe(((listener.port, listener.pid) for listener in listeners),
+                                 fingerprint=fingerprint)
+
+    for listener in listeners:
+        result = probed.get(listener.port)
+        handshake = result.handshake if result is not None and result.is_mqtt else None
+        mqtt = handshake.reason if handshake is not None else None
+        # Tanpa probe: "tidak di port standar"; dengan probe: CONNECT anonim diterima
+        anonymous = result is None or result.handshake.accepted
+        fingerprint = result.fingerprint if handshake is not None else None
+        broker = fingerprint.broker_text if fingerprint is not None else None
+        if listener.pid is not None and listener.name != "Unknown":
+            proc_name = listener.name.lower()
+            keyword = any(keyword in proc_name for keyword in MQTT_KEYWORDS)
+            if handshake is not None or keyword:
+                services.append({
+                    'port': listener.port,
+                    'pid': listener.pid,
+                    'name': listener.name,
+                    'anonymous': anonymous,
+                    'mqtt': mqtt,
+                    'broker': broker,
+                    'keyword': keyword,
+                    'create_time': listener.create_time
+                })
+        elif handshake is not None or (discovery is None and test_connection is not None
+                                       and test_connection(listener.port)):
+            services.append({
+                'port': listener.port,
+                'pid': None,
+                'name': 'Unknown',
+                'anonymous': anonymous,
+                'mqtt': mqtt,
+                'broker': broker,
+                'keyword': False,
+                'create_time': None
+            })
+    return services
+
+
+def is_rabbitmq(service):
+    """True for a listener owned by a RabbitMQ node (Erlang VM or fingerprint)"""
+    name = service['name'].lower()
+    broker = service['broker'] or ''
+    return name.startswith(ERLANG_VM_PREFIXES) or 'rabbitmq' in name or broker.startswith('rabbitmq')
+
+
+def kill_targets(services):
+    """Services from find_mqtt_services that may be killed.
+
+    Only listeners with a known PID that are anonymous ('anonymous' True)
+    and either matched MQTT_KEYWORDS or answered the CONNECT. A CONNACK
+    alone is not enough: brokers refusing the login and keyword matches
+    that refused the anonymous CONNECT are shown but never killed. Nor are
+    RabbitMQ's MQTT listeners (beam.smp/erl), whose plugin accepts an
+    anonymous CONNECT from localhost: killing them takes a cluster node down.
+    """
+    return [service for service in services if service['pid'] is not None and service['anonymous'] and (
+        service['keyword'] or service['mqtt'] is not None) and not is_rabbitmq(service)]
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from monitor_core.proc_cache import get_process_cache
+from monitor_core.proc_net import get_backend
+
+# Satu baris listener: port -> (pid, status, nama process, create_time; None kalau tidak terbaca)
+Listener = namedtuple('Listener', ['port', 'pid', 'status', 'name', 'create_time'])
+
+
+class PortSnapshot:
+    """Indexed view of the listening sockets from a single scan.
+
+    The scan only records which ports listen. The owning PID and process
+    name are resolved the first time a port is looked up, so a tick that
+    only asks about two ports never pays for the rest of the table.
+    """
+
+    def __init__(self, keys, backend, taken_at, scan_seconds, rows_scanned):
+        self._keys = keys
+        self._backend = backend
+        self._resolved = {}
+        self._lock = threading.Lock()
+        self.taken_at = taken_at
+        self.scan_seconds = scan_seconds
+        self.rows_scanned = rows_scanned
+
+    def lookup(self, port):
+        """Return the Listener on a port, or None"""
+        if port not in self._keys:
+            return None
+        listener = self._resolved.get(port)
+        if listener is None:
+            self._resolve([port])
+            listener = self._resolved[port]
+        return listener
+
+    def is_listening(self, port):
+        return port in self._keys
+
+    def ports(self):
+        return sorted(self._keys)
+
+    def listeners(self, ports=None):
+        """Resolve and return the Listeners for the given ports (default: all)"""
+        if ports is None:
+            ports = self._keys
+        ports = sorted(port for port in ports if port in self._keys)
+        pending = [port for port in ports if port not in self._resolved]
+        if pending:
+            self._resolve(pending)
+        return [self._resolved[port] for port in ports]
+
+    def age(self):
+        return time.monotonic() - self.taken_at
+
+    def _resolve(self, ports):
+        with self._lock:
+            ports = [port for port in ports if port not in self._resolved]
+            owners = self._backend.resolve({self._keys[port] for port in ports})
+            for port in ports:
+                pid = owners.get(self._keys[port])
+                info = get_process_cache().get(pid)
+                self._resolved[port] = Listener(port, pid, psutil.CONN_LISTEN,
+                                                info.name if info and info.name else "Unknown",
+                                                info.create_time if info else None)
+
+
+class PortSnapshotService:
+    """Build the port table once per interval and share it between callers"""
+
+    def __init__(self, interval=1.0, backend=None):
+        self.interval = interval
+        self.backend = backend or get_backend()
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+        # Counter biaya scan
+        self.scan_count = 0
+        self.reuse_count = 0
+        self.total_scan_seconds = 0.0
+
+    def get(self, max_age=None):
+        """Return a snapshot no older than max_age (default: interval)"""
+        if max_age is None:
+            max_age = self.interval
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age() < max_age:
+                self.reuse_count += 1
+                return snapshot
+            snapshot = self._scan()
+            self._snapshot = snapshot
+            return snapshot
+
+    def refresh(self):
+        """Force a new scan regardless of the age of the cached one"""
+        return self.get(max_age=0)
+
+    def latest(self):
+        """Return the cached snapshot without scanning (None after invalidate())"""
+        with self._lock:
+            return self._snapshot
+
+    def invalidate(self):
+        """Drop the cached snapshot, e.g. after killing a process"""
+        with self._lock:
+            self._snapshot = None
+
+    def _scan(self):
+        start = time.perf_counter()
+        keys, rows = self.backend.scan()
+        elapsed = time.perf_counter() - start
+
+        self.scan_count += 1
+        self.total_scan_seconds += elapsed
+        return PortSnapshot(keys, self.backend, time.monotonic(), elapsed, rows)
+
+    def stats(self):
+        """Return the scan cost counters as a dict"""
+        with self._lock:
+            last = self._snapshot
+            return {
+                'backend': type(self.backend).__name__,
+                'scans': self.scan_count,
+                'reused': self.reuse_count,
+                'total_scan_ms': self.total_scan_seconds * 1000.0,
+                'last_scan_ms': last.scan_seconds * 1000.0 if last else 0.0,
+                'last_rows': last.rows_scanned if last else 0,
+            }
+
+    def stats_text(self):
+        """Short one-line summary for the status bar"""
+        s = self.stats()
+        return (f"Scan: {s['last_scan_ms']:.1f} ms / {s['last_rows']} sockets "
+                f"({s['scans']} scans, {s['reused']} reused)")
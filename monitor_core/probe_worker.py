@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# Dikirim menggantikan hasil probe kalau fungsi probe raise exception
+ProbeError = namedtuple('ProbeError', ['message', 'timestamp'])
+
+
+class ProbeWorker:
+    """Run a probe function on a background thread and post its results.
+
+    ``probe()`` is called every ``interval`` seconds (or right away after
+    ``trigger()``) and whatever it returns is put on ``results``. Results
+    should be immutable (namedtuples) because the Tk thread reads them
+    while the worker is already building the next one.
+    """
+
+    def __init__(self, probe, interval=2.0, name="probe-worker"):
+        self.probe = probe
+        self.interval = interval
+        self.results = queue.Queue()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.name = name
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def trigger(self):
+        """Run the next probe now instead of waiting for the interval"""
+        self._wake.set()
+
+    def _loop(self):
+        while self._running:
+            self._wake.clear()
+            try:
+                result = self.probe()
+            except Exception as e:
+                # Probe tidak boleh mematikan thread; kirim error ke UI
+                result = ProbeError(str(e), time.time())
+            if not self._running:
+                break
+            self.results.put(result)
+            self._wake.wait(self.interval)
+
+    def drain(self):
+        """Return the newest queued result (or None) and drop older ones"""
+        latest = None
+        while True:
+            try:
+                latest = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+
@@ -0,0 +1,99 @@
+import threading
+from collections import namedtuple
+
+import psutil
+
+ProcessInfo = namedtuple('ProcessInfo', ['pid', 'create_time', 'name', 'exe', 'cmdline'])
+
+
+class ProcessInfoCache:
+    """Process metadata keyed by (pid, create_time).
+
+    Name/exe/cmdline are read once per process. ``evict()`` must be fed
+    the PIDs that exited; the shared BrokerProcessWatcher does that on
+    every poll, so a reused PID is read again instead of answering with
+    the old name. KillEngine checks ``get(pid, validate=True)`` before
+    terminating anything.
+    """
+
+    def __init__(self):
+        self._by_pid = {}
+        self._lock = threading.Lock()
+
+        self.reads = 0
+        self.evictions = 0
+        self.hits = 0
+
+    def evict(self, pids):
+        """Drop the entries of PIDs that exited"""
+        with self._lock:
+            for pid in pids:
+                if self._by_pid.pop(pid, None) is not None:
+                    self.evictions += 1
+
+    def get(self, pid, validate=False):
+        """Return ProcessInfo for pid (reading it on a miss), or None.
+
+        With validate=True the cached create_time is compared with the
+        live process first, so a recycled PID is never mistaken for the
+        old process. Use that before acting on a PID (e.g. killing it).
+        """
+        if pid is None:
+            return None
+        with self._lock:
+            info = self._by_pid.get(pid)
+            if info is not None and validate:
+                try:
+                    if psutil.Process(pid).create_time() != info.create_time:
+                        info = None
+                except psutil.NoSuchProcess:
+                    self._by_pid.pop(pid, None)
+                    return None
+                except psutil.Error:
+                    pass
+            if info is not None:
+                self.hits += 1
+                return info
+            info = self._read(pid)
+            if info is not None:
+                self._by_pid[pid] = info
+            return info
+
+    def name(self, pid):
+        info = self.get(pid)
+        return info.name if info and info.name else "Unknown"
+
+    def _read(self, pid):
+        self.reads += 1
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                create_time = proc.create_time()
+                name = proc.name()
+                try:
+                    exe = proc.exe()
+                except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                    exe = None
+                try:
+                    cmdline = tuple(proc.cmdline())
+                except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                    cmdline = ()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        return ProcessInfo(pid, create_time, name, exe, cmdline)
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._by_pid), 'reads': self.reads,
+                    'hits': self.hits, 'evictions': self.evictions}
+
+
+_cache = None
+
+
+def get_process_cache():
+    """Return the process metadata cache shared by this process"""
+    global _cache
+    if _cache is None:
+        _cache = ProcessInfoCache()
+    return _cache
@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+
+import psutil
+
+TCP_LISTEN = '0A'
+PROC_NET_FILES = ('/proc/net/tcp', '/proc/net/tcp6')
+
+
+class ProcNetBackend:
+    """Linux fast path: LISTEN rows from /proc/net, inode -> PID on demand.
+
+    ``scan()`` only parses the kernel socket tables, it never touches
+    /proc/<pid>/fd. PIDs are resolved in ``resolve()`` for the inodes a
+    caller actually asks for, and the inode -> PID map is kept between
+    calls. Entries are dropped when their PID disappears from /proc.
+    Inodes no PID could be found for (another user's sockets, a process
+    that already exited) are remembered as misses until they leave the
+    LISTEN table, so they do not trigger a full fd walk on every call.
+    """
+
+    def __init__(self, files=PROC_NET_FILES):
+        self.files = files
+        self._inode_pid = {}
+        self._pid_inodes = {}
+        self._known_pids = set()
+        self._unresolved = set()    # inode tanpa PID yang bisa dibaca
+        self._lock = threading.Lock()
+
+        self.fd_walks = 0
+        self.cache_hits = 0
+        self.miss_hits = 0
+
+    def scan(self):
+        """Return ({port: inode}, rows_scanned) for sockets in LISTEN state"""
+        listeners = {}
+        rows = 0
+        for path in self.files:
+            try:
+                with open(path) as f:
+                    next(f, None)  # header
+                    for line in f:
+                        rows += 1
+                        # Cek state dulu; split penuh hanya untuk baris LISTEN
+                        head = line.split(None, 4)
+                        if len(head) < 5 or head[3] != TCP_LISTEN:
+                            continue
+                        fields = line.split()
+                        if len(fields) < 10:
+                            continue
+                        port = int(fields[1].rsplit(':', 1)[1], 16)
+                        if port not in listeners:
+                            listeners[port] = int(fields[9])
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            # Miss dilupakan begitu socket-nya tidak LISTEN lagi
+            self._unresolved.intersection_update(listeners.values())
+        return listeners, rows
+
+    def resolve(self, inodes):
+        """Map socket inodes to PIDs, walking /proc/<pid>/fd only on a cache miss"""
+        with self._lock:
+            return self._resolve(inodes)
+
+    def _resolve(self, inodes):
+        pids = self._list_pids()
+        gone = self._known_pids - pids
+        for pid in gone:
+            for inode in self._pid_inodes.pop(pid, ()):
+                self._inode_pid.pop(inode, None)
+        new_pids = pids - self._known_pids
+        self._known_pids = pids
+
+        result = {}
+        missing = set()
+        for inode in inodes:
+            if not inode:
+                result[inode] = None
+            elif inode in self._inode_pid:
+                result[inode] = self._inode_pid[inode]
+                self.cache_hits += 1
+            elif inode in self._unresolved:
+                result[inode] = None
+                self.miss_hits += 1
+            else:
+                missing.add(inode)
+
+        if missing:
+            # Listener baru paling mungkin milik PID baru, jadi cek itu dulu
+            ordered = sorted(new_pids) + sorted(pids - new_pids)
+            for pid in ordered:
+                self._walk_fds(pid)
+                found = missing.intersection(self._pid_inodes.get(pid, ()))
+                for inode in found:
+                    result[inode] = pid
+                missing -= found
+                if not missing:
+                    break
+            for inode in missing:
+                result[inode] = None
+            self._unresolved |= missing
+        return result
+
+    def _walk_fds(self, pid):
+        self.fd_walks += 1
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            return
+        inodes = self._pid_inodes.setdefault(pid, set())
+        for fd in fds:
+            try:
+                target = os.readlink(f'{fd_dir}/{fd}')
+            except OSError:
+                continue
+            if target.startswith('socket:['):
+                inode = int(target[8:-1])
+                inodes.add(inode)
+                self._inode_pid[inode] = pid
+
+    @staticmethod
+    def _list_pids():
+        return {int(name) for name in os.listdir('/proc') if name.isdigit()}
+
+
+class PsutilBackend:
+    """Portable fallback via psutil.net_connections (PIDs come with the scan)"""
+
+    def scan(self):
+        listeners = {}
+        rows = 0
+        for conn in psutil.net_connections(kind='inet'):
+            rows += 1
+            if conn.status != psutil.CONN_LISTEN or not hasattr(conn.laddr, 'port'):
+                continue
+            listeners.setdefault(conn.laddr.port, conn.pid)
+        return listeners, rows
+
+    def resolve(self, keys):
+        return {key: key for key in keys}
+
+
+def procfs_available():
+    return sys.platform.startswith('linux') and os.path.exists(PROC_NET_FILES[0])
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the shared listener backend for this platform"""
+    global _backend
+    if _backend is None:
+        _backend = ProcNetBackend() if procfs_available() else PsutilBackend()
+    return _backend
+
+
+def listening_pids(ports, backend=None):
+    """Return {port: pid} for the given ports that are in LISTEN state.
+
+    The PID is None when the port is listening but the owner is not
+    visible (e.g. another user's process without elevated rights).
+    """
+    backend = backend or get_backend()
+    listeners, _ = backend.scan()
+    wanted = {port: listeners[port] for port in ports if port in listeners}
+    owners = backend.resolve(set(wanted.values()))
+    return {port: owners.get(key) for port, key in wanted.items()}
+
+
+def pid_by_port(port, backend=None):
+    return listening_pids([port], backend).get(port)
+
@@ -0,0 +1,186 @@
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from monitor_core.proc_cache import get_process_cache
+
+# Nama process broker per keluarga (tanpa .exe, huruf kecil)
+BROKER_FAMILIES = {
+    'mosquitto': ('mosquitto',),
+    'rabbitmq': ('beam.smp', 'beam', 'erl', 'erlsrv'),
+}
+
+# Pembungkus yang bisa exec broker jauh setelah start (sh -c "...; exec mosquitto",
+# skrip service, rabbitmq-server); PID-nya tetap sama, jadi namanya dibaca ulang tiap poll
+LAUNCHERS = frozenset((
+    'sh', 'bash', 'dash', 'ash', 'zsh', 'busybox', 'env', 'nohup', 'sudo', 'su', 'runuser',
+    'setsid', 'timeout', 'start-stop-daemon', 'rabbitmq-server', 'python', 'python3',
+))
+
+ProcessEvent = namedtuple('ProcessEvent', ['kind', 'family', 'pid', 'name', 'timestamp'])
+
+USE_PROCFS = sys.platform.startswith('linux') and os.path.isdir('/proc/self')
+
+
+def _normalize(name):
+    name = name.strip().lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class BrokerProcessWatcher:
+    """Keep a live set of broker processes by diffing the PID table.
+
+    Every poll lists PIDs once and reads the short process name (``comm``
+    on Linux) only for PIDs that were not there last time, plus a few
+    re-reads of new PIDs (a fresh fork still carries its parent's name).
+    PIDs running one of LAUNCHERS are re-read on every poll for as long
+    as they keep that name, so a wrapper that execs the broker later
+    under the same PID is still caught. PIDs that match a broker family
+    are tracked; subscribers get a ``start`` event when one appears and
+    an ``exit`` event when it goes away. Every PID that went away (broker
+    or not) is evicted from the shared process cache.
+    """
+
+    RECHECK_POLLS = 4
+
+    def __init__(self, families=None, interval=0.25):
+        self.families = families or BROKER_FAMILIES
+        self.interval = interval
+        self._by_name = {}
+        for family, names in self.families.items():
+            for name in names:
+                self._by_name[name] = family
+
+        self._seen = set()
+        self._live = {}          # pid -> (family, name)
+        self._recent = {}        # pid baru yang belum cocok -> sisa re-check
+        self._launchers = set()  # pid yang masih bernama salah satu LAUNCHERS
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.polls = 0
+        self.name_reads = 0
+        self.last_poll_ms = 0.0
+
+    def subscribe(self, callback):
+        """callback(ProcessEvent) is called from the polling thread"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="broker-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[watcher] poll error: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Diff the PID table once; return the list of events it produced"""
+        with self._lock:
+            start = time.perf_counter()
+            pids = self._list_pids()
+            now = time.time()
+            events = []
+
+            # PID yang baru di-fork bisa masih bernama parent-nya sebelum exec,
+            # jadi PID baru yang belum cocok dibaca ulang beberapa poll berikutnya
+            recheck = [pid for pid in self._recent.keys() | self._launchers if pid in pids]
+            for pid in list(pids - self._seen) + recheck:
+                name = self._read_name(pid)
+                family = self._by_name.get(name) if name else None
+                if name in LAUNCHERS:
+                    self._launchers.add(pid)
+                else:
+                    self._launchers.discard(pid)
+                if family:
+                    self._recent.pop(pid, None)
+                    self._live[pid] = (family, name)
+                    events.append(ProcessEvent('start', family, pid, name, now))
+                else:
+                    left = self._recent.get(pid, self.RECHECK_POLLS + 1) - 1
+                    if left > 0:
+                        self._recent[pid] = left
+                    else:
+                        self._recent.pop(pid, None)
+
+            gone = self._seen - pids
+            for pid in gone:
+                self._recent.pop(pid, None)
+                self._launchers.discard(pid)
+                entry = self._live.pop(pid, None)
+                if entry:
+                    events.append(ProcessEvent('exit', entry[0], pid, entry[1], now))
+
+            self._seen = pids
+            self.polls += 1
+            self.last_poll_ms = (time.perf_counter() - start) * 1000.0
+            subscribers = list(self._subscribers)
+
+        if gone:
+            get_process_cache().evict(gone)
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[watcher] subscriber error: {e}")
+        return events
+
+    def running(self, family):
+        """Return [(pid, name)] of live processes in a broker family"""
+        with self._lock:
+            return sorted((pid, name) for pid, (fam, name) in self._live.items() if fam == family)
+
+    def _read_name(self, pid):
+        self.name_reads += 1
+        if USE_PROCFS:
+            try:
+                with open(f'/proc/{pid}/comm') as f:
+                    return _normalize(f.read())
+            except OSError:
+                return None
+        try:
+            return _normalize(psutil.Process(pid).name())
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    @staticmethod
+    def _list_pids():
+        if USE_PROCFS:
+            return {int(name) for name in os.listdir('/proc') if name.isdigit()}
+        return set(psutil.pids())
+
+
+_watcher = None
+
+
+def get_process_watcher():
+    """Return the shared watcher, started on first use"""
+    global _watcher
+    if _watcher is None:
+        _watcher = BrokerProcessWatcher()
+        _watcher.poll()
+        _watcher.start()
+    return _watcher
@@ -0,0 +1,293 @@
+import base64
+import http.client
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Hanya kolom yang ditampilkan; ?columns= membuat respons /api/queues tetap kecil
+OVERVIEW_COLUMNS = (
+    "node", "cluster_name", "rabbitmq_version",
+    "message_stats.publish_details.rate", "message_stats.deliver_get_details.rate",
+    "queue_totals.messages", "object_totals.queues", "object_totals.connections",
+)
+NODE_COLUMNS = (
+    "name", "running", "mem_used", "mem_limit", "mem_alarm", "disk_free_alarm",
+    "fd_used", "fd_total", "sockets_used", "sockets_total", "uptime",
+)
+QUEUE_COLUMNS = (
+    "name", "vhost", "node", "messages", "messages_ready", "messages_unacknowledged",
+    "message_stats.publish_details.rate", "message_stats.deliver_get_details.rate",
+)
+
+ENDPOINTS = (
+    ('overview', "/api/overview", OVERVIEW_COLUMNS),
+    ('nodes', "/api/nodes", NODE_COLUMNS),
+    ('queues', "/api/queues", QUEUE_COLUMNS),
+)
+
+MgmtNodeStats = namedtuple('MgmtNodeStats', [
+    'name',             # nama node di GUI
+    'reachable', 'error',
+    'node_name',        # nama Erlang node (rabbit@host) dari /api/overview
+    'version', 'running',
+    'mem_used', 'mem_limit', 'mem_alarm', 'disk_alarm',
+    'fd_used', 'fd_total',
+    'queues', 'messages', 'messages_ready', 'messages_unacked',
+    'publish_rate', 'deliver_rate',     # jumlah rate queue yang leader-nya di node ini
+    'elapsed_ms'])
+
+QueueDepth = namedtuple('QueueDepth', ['vhost', 'name', 'node', 'messages', 'publish_rate', 'deliver_rate'])
+
+MgmtStatus = namedtuple('MgmtStatus', [
+    'nodes',
+    'top_queues',       # queue terdalam di seluruh cluster
+    'elapsed_ms',
+    'requests', 'response_bytes',
+    'connections_opened'])  # total sejak start; tetap kalau keep-alive bekerja
+
+
+def path_with_columns(path, columns):
+    return f"{path}?columns={','.join(columns)}" if columns else path
+
+
+def dig(item, dotted, default=None):
+    """item['a']['b'] for 'a.b', default if any level is missing"""
+    for key in dotted.split('.'):
+        if not isinstance(item, dict) or key not in item:
+            return default
+        item = item[key]
+    return item
+
+
+class ManagementConnection:
+    """One persistent HTTP/1.1 connection to a management listener.
+
+    The connection is reused for every request; when the server has
+    closed it in between (idle timeout, restart) the request is retried
+    once on a fresh connection.
+    """
+
+    def __init__(self, host, port, username, password, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        token = base64.b64encode(f"{username}:{password}".encode('utf-8')).decode('ascii')
+        self.headers = {"Authorization": f"Basic {token}", "Accept": "application/json",
+                        "Connection": "keep-alive"}
+        self._conn = None
+        self.opened = 0
+
+    def get_json(self, path):
+        """Return (decoded JSON, response size in bytes)"""
+        for attempt in (0, 1):
+            fresh = self._conn is None
+            if fresh:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.opened += 1
+            try:
+                self._conn.request("GET", path, headers=self.headers)
+                response = self._conn.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+                    http.client.CannotSendRequest, http.client.BadStatusLine):
+                self.close()
+                if fresh or attempt:
+                    raise
+                continue
+            except (OSError, http.client.HTTPException):
+                self.close()
+                raise
+            if response.will_close:
+                self.close()
+            if response.status != 200:
+                raise http.client.HTTPException(f"HTTP {response.status} {response.reason} for {path.split('?')[0]}")
+            return json.loads(body), len(body)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _timed_get(conn, path):
+    start = time.perf_counter()
+    data, size = conn.get_json(path)
+    return data, size, (time.perf_counter() - start) * 1000.0
+
+
+class ManagementPoller:
+    """Poll the management API of every node at once.
+
+    ``/api/overview`` is asked from every node (it is small and tells
+    whether that node answers). ``/api/nodes`` and ``/api/queues`` are
+    cluster-wide, so they are only asked from ``cluster_sources`` nodes
+    that answered last time and the answers are merged; with 100 nodes a
+    tick stays at ~100 small requests instead of 300 large ones.
+
+    Every (node, endpoint) pair has its own keep-alive connection and the
+    requests run in parallel, so no tick pays for a TCP handshake once
+    the connections are warm. ``poll()`` blocks for at most ``timeout``
+    and returns an MgmtStatus; requests unfinished by then are reported
+    as timed out, and their connection gets no new request until they
+    end.
+    """
+
+    def __init__(self, nodes, username="guest", password="guest", timeout=2.0, top_queues=5,
+                 cluster_sources=3, max_workers=32):
+        self.nodes = nodes
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.top_queues = top_queues
+        self.cluster_sources = cluster_sources
+        self._connections = {}
+        self._busy = {}         # (node, endpoint) -> future yang melewati deadline poll sebelumnya
+        self._sources = list(range(min(cluster_sources, len(nodes))))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(nodes) * len(ENDPOINTS))),
+                                        thread_name_prefix="rabbit-mgmt")
+        self.requests = 0
+        self.response_bytes = 0
+
+    def _connection(self, i, key):
+        conn = self._connections.get((i, key))
+        if conn is None:
+            node = self.nodes[i]
+            conn = ManagementConnection(node["host"], node["mgmt_port"], self.username, self.password,
+                                        self.timeout)
+            self._connections[(i, key)] = conn
+        return conn
+
+    def poll(self):
+        start = time.perf_counter()
+        futures = {}
+        answers = {}
+        for key, path, columns in ENDPOINTS:
+            targets = range(len(self.nodes)) if key == 'overview' else self._sources
+            for i in targets:
+                busy = self._busy.pop((i, key), None)
+                if busy is not None and not busy.done():
+                    # Koneksi keep-alive tidak thread-safe: tunggu request lama selesai dulu
+                    self._busy[(i, key)] = busy
+                    answers[(i, key)] = TimeoutError("previous request still running")
+                    continue
+                futures[(i, key)] = self._pool.submit(_timed_get, self._connection(i, key),
+                                                      path_with_columns(path, columns))
+
+        # Satu deadline untuk semua request, bukan timeout x retry per future
+        done, _ = wait(futures.values(), timeout=self.timeout)
+        elapsed = {}
+        for (i, key), future in futures.items():
+            if future not in done:
+                if not future.cancel():
+                    self._busy[(i, key)] = future
+                answers[(i, key)] = TimeoutError(f"no answer within {self.timeout:g} s")
+                elapsed[i] = self.timeout * 1000.0
+                continue
+            try:
+                data, size, ms = future.result()
+                self.response_bytes += size
+                answers[(i, key)] = data
+                elapsed[i] = max(elapsed.get(i, 0.0), ms)
+            except Exception as e:
+                answers[(i, key)] = e
+            self.requests += 1
+
+        node_list = self._merge(answers, 'nodes', lambda n: n.get('name'))
+        all_queues = self._merge(answers, 'queues', lambda q: (q.get('vhost'), q.get('name')))
+
+        # Index sekali per tick, bukan scan seluruh list untuk tiap node
+        if isinstance(node_list, list):
+            node_list = {n.get('name'): n for n in node_list}
+        queues_by_node = all_queues
+        if isinstance(all_queues, list):
+            queues_by_node = {}
+            for queue in all_queues:
+                queues_by_node.setdefault(queue.get('node'), []).append(queue)
+
+        nodes = []
+        for i, node in enumerate(self.nodes):
+            nodes.append(self._node_stats(node["name"], answers[(i, 'overview')], node_list,
+                                          queues_by_node, elapsed.get(i)))
+
+        # Sumber data cluster-wide berikutnya: node yang barusan menjawab
+        reachable = [i for i in range(len(self.nodes))
+                     if not isinstance(answers[(i, 'overview')], Exception)]
+        keep = [i for i in self._sources if i in reachable]
+        self._sources = (keep + [i for i in reachable if i not in keep])[:self.cluster_sources] \
+            or list(range(min(self.cluster_sources, len(self.nodes))))
+
+        top = all_queues if isinstance(all_queues, list) else []
+        top = sorted(top, key=lambda q: q.get('messages') or 0, reverse=True)
+        top_queues = tuple(
+            QueueDepth(q.get('vhost'), q.get('name'), q.get('node'), q.get('messages') or 0,
+                       dig(q, 'message_stats.publish_details.rate', 0.0),
+                       dig(q, 'message_stats.deliver_get_details.rate', 0.0))
+            for q in top[:self.top_queues])
+
+        return MgmtStatus(tuple(nodes), top_queues, (time.perf_counter() - start) * 1000.0,
+                          self.requests, self.response_bytes,
+                          sum(conn.opened for conn in self._connections.values()))
+
+    @staticmethod
+    def _merge(answers, key, identity):
+        """Union of one cluster-wide endpoint over all sources; the error if none answered"""
+        merged = {}
+        answered = False
+        error = ValueError(f"no node answered /api/{key}")
+        for (_, endpoint), data in answers.items():
+            if endpoint != key:
+                continue
+            if isinstance(data, list):
+                answered = True
+                for item in data:
+                    merged.setdefault(identity(item), item)
+            elif isinstance(data, Exception):
+                error = data
+        return list(merged.values()) if answered else error
+
+    def _node_stats(self, name, overview, node_info, queues_by_node, elapsed_ms):
+        """node_info: {erlang name: /api/nodes item}, queues_by_node: {erlang name: [queue]};
+        either may be the exception of the failed cluster-wide request"""
+        errors = [answer for answer in (overview, node_info, queues_by_node) if isinstance(answer, Exception)]
+        if isinstance(overview, Exception):
+            error = str(overview) or type(overview).__name__
+            return MgmtNodeStats(name, False, error, None, None, False, None, None, False, False,
+                                 None, None, 0, 0, 0, 0, 0.0, 0.0, elapsed_ms)
+
+        node_name = overview.get('node')
+        info = node_info.get(node_name, {}) if isinstance(node_info, dict) else {}
+        own_queues = queues_by_node.get(node_name, []) if isinstance(queues_by_node, dict) else []
+
+        return MgmtNodeStats(
+            name=name,
+            reachable=True,
+            error=(str(errors[0]) or type(errors[0]).__name__) if errors else None,
+            node_name=node_name,
+            version=overview.get('rabbitmq_version'),
+            running=info.get('running', False),
+            mem_used=info.get('mem_used'),
+            mem_limit=info.get('mem_limit'),
+            mem_alarm=bool(info.get('mem_alarm')),
+            disk_alarm=bool(info.get('disk_free_alarm')),
+            fd_used=info.get('fd_used'),
+            fd_total=info.get('fd_total'),
+            queues=len(own_queues),
+            messages=sum(q.get('messages') or 0 for q in own_queues),
+            messages_ready=sum(q.get('messages_ready') or 0 for q in own_queues),
+            messages_unacked=sum(q.get('messages_unacknowledged') or 0 for q in own_queues),
+            publish_rate=sum(dig(q, 'message_stats.publish_details.rate', 0.0) for q in own_queues),
+            deliver_rate=sum(dig(q, 'message_stats.deliver_get_details.rate', 0.0) for q in own_queues),
+            elapsed_ms=elapsed_ms,
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        for conn in self._connections.values():
+            conn.close()
+
+
+def mgmt_signature(status):
+    """Alarm/reachability state of an MgmtStatus, for change detection"""
+    return tuple((node.reachable, node.running, node.mem_alarm, node.disk_alarm, node.messages)
+                 for node in status.nodes)
@@ -0,0 +1,161 @@
+"""Wait until a broker is really serving and record how long it took.
+
+    python -m monitor_core.readiness --port 1883 --timeout 60
+    python -m monitor_core.readiness --port 1883 --since 1700000000.25 --record startup.jsonl --name rabbit1 --kind cold
+
+Exit code 0 once the listener accepts a connection and answers CONNECT
+with a CONNACK (any return code: a refused login still means the broker
+is up), 1 on timeout.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from monitor_core.mqtt_probe import mqtt_handshake
+
+ReadyResult = namedtuple('ReadyResult', [
+    'ready',
+    'elapsed_ms',       # dari start sampai CONNACK (atau sampai menyerah)
+    'listen_ms',        # dari start sampai TCP connect pertama berhasil, None kalau tidak pernah
+    'attempts',
+    'error'])
+
+
+def wait_ready(host, port, timeout=30.0, first_step=0.02, max_step=0.5, handshake=True,
+               username=None, password=None, process=None, start=None):
+    """Poll ``host:port`` until it serves MQTT, with exponential steps.
+
+    Steps start at ``first_step`` and grow 1.5x up to ``max_step``, so a
+    broker that comes up in 80 ms is seen within a few ms and a slow one
+    is not hammered. ``start`` is the time.monotonic() the clock runs
+    from (default: now), e.g. when the process was launched. When
+    ``process`` (a Popen) exits first, waiting stops at once. With
+    ``handshake=False`` an accepted TCP connection is enough.
+    """
+    start = time.monotonic() if start is None else start
+    deadline = time.monotonic() + timeout
+    step = first_step
+    attempts = 0
+    listen_ms = None
+    error = None
+    while True:
+        attempts += 1
+        remaining = deadline - time.monotonic()
+        result = mqtt_handshake(host, port, timeout=max(0.05, min(1.0, remaining)),
+                                username=username, password=password, client_id=f"ready-{os.getpid()}")
+        now = time.monotonic()
+        if result.connected and listen_ms is None:
+            listen_ms = (now - start) * 1000.0
+        if result.is_mqtt or (result.connected and not handshake):
+            return ReadyResult(True, (now - start) * 1000.0, listen_ms, attempts, None)
+        error = result.error
+        if process is not None and process.poll() is not None:
+            return ReadyResult(False, (now - start) * 1000.0, listen_ms, attempts,
+                               f"Process exited with code {process.returncode}")
+        if now + step > deadline:
+            return ReadyResult(False, (now - start) * 1000.0, listen_ms, attempts,
+                               f"Not ready after {timeout:.0f} s ({error or 'no CONNACK'})")
+        time.sleep(step)
+        step = min(step * 1.5, max_step)
+
+
+class StartupLog:
+    """Append-only JSON-lines record of broker start/restart-to-ready times.
+
+    One line per run: ``{"time", "name", "kind", "port", "ready",
+    "ready_ms", "listen_ms", ...extra}``; kind is 'cold' or 'restart'.
+    The file is cut back to the last ``keep`` runs when it grows past
+    twice that, so it stays small.
+    """
+
+    def __init__(self, path, keep=500):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def record(self, name, kind, port, result, **extra):
+        entry = {"time": round(time.time(), 3), "name": name, "kind": kind, "port": port,
+                 "ready": result.ready, "ready_ms": round(result.elapsed_ms, 1),
+                 "listen_ms": None if result.listen_ms is None else round(result.listen_ms, 1)}
+        entry.update(extra)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            entries = self.load()
+            if len(entries) > 2 * self.keep:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(e) + "\n" for e in entries[-self.keep:])
+        return entry
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue    # baris terpotong (mis. proses mati saat menulis)
+        return entries
+
+    def summary_text(self, name, kind, last=20):
+        """'cold start of X: 850 ms (median 800, p90 950 over last 12)'"""
+        times = [e["ready_ms"] for e in self.load()
+                 if e.get("name") == name and e.get("kind") == kind and e.get("ready")][-last:]
+        label = "cold start" if kind == "cold" else "restart-to-ready"
+        if not times:
+            return f"{label} of {name}: no successful runs recorded"
+        ordered = sorted(times)
+        median = ordered[len(ordered) // 2]
+        p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+        text = f"{label} of {name}: {times[-1]:.0f} ms (median {median:.0f}, p90 {p90:.0f} over last {len(times)})"
+        # Lebih lambat dari p90 run sebelumnya: kemungkinan regresi
+        if len(times) >= 5 and times[-1] > sorted(times[:-1])[int((len(times) - 1) * 0.9)] * 1.5:
+            text += " - slower than usual"
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait until an MQTT broker answers CONNECT")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--tcp-only', action='store_true', help="accepting connections is enough")
+    parser.add_argument('--since', type=float, help="epoch seconds the start began (default: now)")
+    parser.add_argument('--record', help="append the result to this JSON-lines file")
+    parser.add_argument('--name', default=None)
+    parser.add_argument('--kind', default='cold', choices=('cold', 'restart'))
+    parser.add_argument('--username', default=os.getenv("MQTT_USERNAME") or None)
+    parser.add_argument('--password', default=os.getenv("MQTT_PASSWORD"))
+    args = parser.parse_args(argv)
+
+    start = None
+    if args.since is not None:
+        # Epoch dari skrip -> jam monotonic proses ini
+        start = time.monotonic() - max(0.0, time.time() - args.since)
+    result = wait_ready(args.host, args.port, args.timeout, handshake=not args.tcp_only,
+                        username=args.username, password=args.password, start=start)
+    name = args.name or f"{args.host}:{args.port}"
+    if result.ready:
+        listen = f", listening after {result.listen_ms:.0f} ms" if result.listen_ms is not None else ""
+        print(f"{name} ready in {result.elapsed_ms:.0f} ms ({result.attempts} probes{listen})")
+    else:
+        print(f"{name} NOT ready: {result.error}")
+    if args.record:
+        log = StartupLog(args.record)
+        log.record(name, args.kind, args.port, result)
+        if result.ready:
+            print(log.summary_text(name, args.kind))
+    return 0 if result.ready else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
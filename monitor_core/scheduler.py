@@ -0,0 +1,214 @@
+import queue
+import random
+import threading
+import time
+
+from monitor_core.probe_worker import ProbeError
+
+
+class ProbeTask:
+    """One probe type with its own adaptive interval.
+
+    The interval starts at ``min_interval``. Every run whose result has the
+    same signature as the previous one multiplies it by ``backoff`` (up to
+    ``max_interval``); a changed result drops it back to ``min_interval``.
+    If a stable run uses more than ``budget_ms`` of CPU time the next
+    interval is stretched in proportion, so an expensive probe cannot eat
+    the CPU on its own (waiting on a socket does not count).
+    """
+
+    def __init__(self, name, probe, min_interval, max_interval, backoff=1.5,
+                 jitter=0.1, budget_ms=None, signature=None, wakes=()):
+        self.name = name
+        self.probe = probe
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.budget_ms = budget_ms
+        self.signature = signature or (lambda value: value)
+        self.wakes = tuple(wakes)   # task lain yang ikut dipercepat saat berubah
+
+        self.interval = min_interval
+        self.next_due = 0.0
+        self.value = None
+        self.state = None
+        self.has_value = False
+
+        self.runs = 0
+        self.changes = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.cpu_ms = 0.0
+        self.total_cpu_ms = 0.0
+        self.changed_at = None
+
+    def run(self, now):
+        """Run the probe once; return True if its state changed"""
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            value = self.probe()
+        finally:
+            self.last_ms = (time.perf_counter() - start) * 1000.0
+            self.cpu_ms = (time.thread_time() - cpu_start) * 1000.0
+            self.total_ms += self.last_ms
+            self.total_cpu_ms += self.cpu_ms
+            self.runs += 1
+
+        state = self.signature(value)
+        changed = not self.has_value or state != self.state
+        self.value = value
+        self.state = state
+        self.has_value = True
+
+        if changed:
+            self.changes += 1
+            self.changed_at = now
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            if self.budget_ms and self.cpu_ms > self.budget_ms:
+                stretched = self.min_interval * self.cpu_ms / self.budget_ms
+                self.interval = min(max(self.interval, stretched), self.max_interval)
+        self.schedule(now)
+        return changed
+
+    def schedule(self, now, interval=None):
+        interval = self.interval if interval is None else interval
+        spread = interval * self.jitter
+        self.next_due = now + interval + random.uniform(-spread, spread)
+
+    def tighten(self, now):
+        """Reset to the fastest rate and run as soon as possible"""
+        self.interval = self.min_interval
+        self.next_due = now
+
+
+class ProbeScheduler:
+    """Run several ProbeTasks on one background thread, each at its own rate.
+
+    The first tick runs every task; after that each one follows its own
+    jittered schedule. After every tick, once every due task has run,
+    ``compose(values)`` is called with the latest value of every task (by
+    name; None for a task that has not run yet) and the result is posted like
+    ``ProbeWorker`` does, so ``drain()``/``trigger()``/``stop()`` work the
+    same for the Tk side. Without a UI to drain the queue, pass ``sink``
+    and every result is handed to ``sink(result)`` instead.
+    """
+
+    def __init__(self, tasks, compose, name="probe-scheduler", sink=None):
+        self.tasks = list(tasks)
+        self._by_name = {task.name: task for task in self.tasks}
+        self.compose = compose
+        self.results = queue.Queue()
+        self.sink = sink or self.results.put
+        self.name = name
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._pending = set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def trigger(self, *names):
+        """Run the named tasks (default: all) now and tighten their rate"""
+        with self._lock:
+            self._pending.update(names or self._by_name)
+        self._wake.set()
+
+    def run_once(self):
+        """Run every task once on the calling thread (scheduler not started)"""
+        now = time.monotonic()
+        for task in self.tasks:
+            task.next_due = now
+        self._running = True
+        try:
+            self._tick(now)
+        finally:
+            self._running = False
+
+    def value(self, name):
+        """Latest value of a task, or None before its first run"""
+        return self._by_name[name].value
+
+    def _loop(self):
+        while self._running:
+            now = time.monotonic()
+            with self._lock:
+                pending, self._pending = self._pending, set()
+            for name in pending:
+                task = self._by_name.get(name)
+                if task:
+                    task.tighten(now)
+
+            if any(task.next_due <= now for task in self.tasks):
+                self._tick(now)
+                continue
+
+            self._wake.wait(min(task.next_due for task in self.tasks) - now)
+            self._wake.clear()
+
+    def _tick(self, now):
+        # Task yang dibangunkan (wakes) oleh task sebelumnya ikut jalan di tick ini
+        error = None
+        for task in self.tasks:
+            if task.next_due > now or not self._running:
+                continue
+            try:
+                changed = task.run(now)
+            except Exception as e:
+                # Task yang gagal dicoba lagi di interval minimum, error dikirim ke UI
+                task.schedule(now, task.min_interval)
+                error = ProbeError(f"{task.name}: {e}", time.time())
+                continue
+            if changed:
+                for name in task.wakes:
+                    if name in self._by_name:
+                        self._by_name[name].tighten(now)
+        # Satu post per tick, setelah semua task yang jatuh tempo selesai
+        if error is not None:
+            self.sink(error)
+        else:
+            self._post()
+
+    def _post(self):
+        if not self._running:
+            return False
+        try:
+            self.sink(self.compose({task.name: task.value for task in self.tasks}))
+        except Exception as e:
+            self.sink(ProbeError(str(e), time.time()))
+        return True
+
+    def drain(self):
+        """Return the newest queued result (or None) and drop older ones"""
+        latest = None
+        while True:
+            try:
+                latest = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def stats(self):
+        """Per-task interval and cost counters"""
+        return {task.name: {'interval': task.interval, 'runs': task.runs,
+                            'changes': task.changes, 'last_ms': task.last_ms,
+                            'total_ms': task.total_ms, 'cpu_ms': task.total_cpu_ms}
+                for task in self.tasks}
+
+    def stats_text(self):
+        """Short one-line summary for the status bar"""
+        return ", ".join(f"{task.name} {task.interval:.1f}s" for task in self.tasks)
@@ -0,0 +1,277 @@
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from monitor_core.mqtt_probe import (
+    CONNACK, PUBLISH, build_connect, build_subscribe, new_client_id, read_packet)
+
+PINGREQ = b'\xc0\x00'
+
+# (nama, topic, counter?) - counter diubah jadi rate per detik, sisanya gauge
+SYS_TOPICS = (
+    ('messages_received', b'$SYS/broker/messages/received', True),
+    ('messages_sent', b'$SYS/broker/messages/sent', True),
+    ('publish_received', b'$SYS/broker/publish/messages/received', True),
+    ('publish_sent', b'$SYS/broker/publish/messages/sent', True),
+    ('bytes_received', b'$SYS/broker/bytes/received', True),
+    ('bytes_sent', b'$SYS/broker/bytes/sent', True),
+    ('clients_connected', b'$SYS/broker/clients/connected', False),
+    ('subscriptions', b'$SYS/broker/subscriptions/count', False),
+    ('retained', b'$SYS/broker/retained messages/count', False),
+    ('heap_current', b'$SYS/broker/heap/current', False),
+    ('load_received_1min', b'$SYS/broker/load/messages/received/1min', False),
+    ('load_sent_1min', b'$SYS/broker/load/messages/sent/1min', False),
+    ('load_connections_1min', b'$SYS/broker/load/connections/1min', False),
+    ('uptime', b'$SYS/broker/uptime', False),
+)
+
+SysSnapshot = namedtuple('SysSnapshot', [
+    'connected', 'error',
+    'values',           # nama -> nilai terakhir
+    'rates',            # nama counter -> per detik, antara dua publish $SYS terakhir
+    'updated_at',       # time.monotonic() publish $SYS terakhir, None kalau belum ada
+    'messages'])        # jumlah publish $SYS yang sudah dibaca
+
+
+class SysStatsSubscriber:
+    """Keep one subscription to ``$SYS/broker/#`` and turn it into rates.
+
+    Runs on its own thread with a plain socket, reconnecting with backoff
+    when the broker is down. Incoming PUBLISH packets are parsed in place
+    from one receive buffer; a topic that is not in SYS_TOPICS is skipped
+    without decoding, and known ones update preallocated slots, so the
+    per-message path allocates only the topic key and the number. Readers
+    call ``snapshot()`` at their own frame rate and can compare
+    ``version`` to skip frames where nothing arrived.
+    """
+
+    def __init__(self, host='localhost', port=1883, username=None, password=None,
+                 keepalive=30, max_backoff=10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.max_backoff = max_backoff
+
+        self._index = {topic: i for i, (_, topic, _) in enumerate(SYS_TOPICS)}
+        count = len(SYS_TOPICS)
+        self._values = [None] * count
+        self._rates = [None] * count
+        self._prev = [None] * count      # (nilai, waktu) sampel counter sebelumnya
+        self._is_counter = [counter for _, _, counter in SYS_TOPICS]
+        self._lock = threading.Lock()
+
+        self.version = 0
+        self.messages = 0
+        self.updated_at = None
+        self.connected = False
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._sock = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"sys-stats-{self.port}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def snapshot(self):
+        """Copy the current values and rates (called from the UI thread)"""
+        with self._lock:
+            values = {}
+            rates = {}
+            for i, (name, _, counter) in enumerate(SYS_TOPICS):
+                if self._values[i] is not None:
+                    values[name] = self._values[i]
+                if counter and self._rates[i] is not None:
+                    rates[name] = self._rates[i]
+            return SysSnapshot(self.connected, self.error, values, rates, self.updated_at, self.messages)
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self._session()
+                backoff = 1.0
+            except (OSError, ValueError) as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                self.version += 1
+                self._sock = None
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _session(self):
+        sock = socket.create_connection((self.host, self.port), timeout=2.0)
+        self._sock = sock
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(build_connect(new_client_id("sys"), keepalive=self.keepalive,
+                                       username=self.username, password=self.password))
+            header, body = read_packet(sock, time.perf_counter() + 2.0)
+            if header & 0xF0 != CONNACK or len(body) < 2 or body[1] != 0:
+                raise ValueError(f"CONNACK refused ({body[1] if len(body) > 1 else '?'})")
+            sock.sendall(build_subscribe(1, '$SYS/broker/#'))
+            with self._lock:
+                # Rate dihitung ulang dari sesi baru (counter broker bisa reset)
+                self._prev = [None] * len(SYS_TOPICS)
+                self._rates = [None] * len(SYS_TOPICS)
+            self.connected = True
+            self.error = None
+            self.version += 1
+            self._receive(sock)
+        finally:
+            sock.close()
+
+    def _receive(self, sock):
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+        filled = 0
+        ping_every = self.keepalive / 2.0
+        last_sent = time.monotonic()
+        sock.settimeout(1.0)
+
+        while not self._stop.is_set():
+            if time.monotonic() - last_sent >= ping_every:
+                sock.sendall(PINGREQ)
+                last_sent = time.monotonic()
+            if filled == len(buffer):
+                # Paket lebih besar dari buffer: perbesar sekali
+                view.release()
+                buffer.extend(bytes(len(buffer)))
+                view = memoryview(buffer)
+            try:
+                count = sock.recv_into(view[filled:])
+            except socket.timeout:
+                continue
+            if not count:
+                raise ConnectionError("Broker closed the $SYS subscription")
+            filled += count
+            consumed = self._feed(buffer, filled)
+            if consumed:
+                buffer[:filled - consumed] = buffer[consumed:filled]
+                filled -= consumed
+
+    def _feed(self, buffer, end):
+        """Parse every complete packet in buffer[:end]; return bytes consumed"""
+        pos = 0
+        now = None
+        while True:
+            if end - pos < 2:
+                return pos
+            # Remaining length (varint) langsung dari buffer
+            length = 0
+            multiplier = 1
+            index = pos + 1
+            while True:
+                if index >= end:
+                    return pos
+                byte = buffer[index]
+                index += 1
+                length += (byte & 0x7F) * multiplier
+                if not byte & 0x80:
+                    break
+                multiplier *= 128
+            packet_end = index + length
+            if packet_end > end:
+                return pos
+
+            header = buffer[pos]
+            if header & 0xF0 == PUBLISH and length >= 2:
+                topic_end = index + 2 + ((buffer[index] << 8) | buffer[index + 1])
+                slot = self._index.get(bytes(buffer[index + 2:topic_end]))
+                if slot is not None:
+                    payload_start = topic_end + 2 if header & 0x06 else topic_end
+                    if now is None:
+                        now = time.monotonic()
+                    self._store(slot, buffer[payload_start:packet_end], now)
+            pos = packet_end
+
+    def _store(self, slot, payload, now):
+        try:
+            # "123 seconds" (uptime) atau angka biasa
+            space = payload.find(b' ')
+            value = float(payload[:space] if space > 0 else payload)
+        except ValueError:
+            return
+        with self._lock:
+            if self._is_counter[slot]:
+                previous = self._prev[slot]
+                if previous is not None and now > previous[1] and value >= previous[0]:
+                    self._rates[slot] = (value - previous[0]) / (now - previous[1])
+                if previous is None or now > previous[1]:
+                    self._prev[slot] = (value, now)
+            self._values[slot] = value
+            self.messages += 1
+            self.updated_at = now
+            self.version += 1
+
+
+def format_rate(value, unit=""):
+    """12345.6 -> '12.3k/s' style text for the throughput panel"""
+    if value is None:
+        return "--"
+    for suffix, scale in (("M", 1_000_000), ("k", 1_000)):
+        if value >= scale:
+            return f"{value / scale:.1f}{suffix}{unit}/s"
+    return f"{value:.1f}{unit}/s"
+
+
+def _duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 86400:
+        return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m {seconds % 60:02d}s"
+
+
+def panel_text(snapshot, now=None):
+    """Return (rates, gauges, state) lines for a SysSnapshot"""
+    rates = snapshot.rates
+    values = snapshot.values
+    rate_line = (f"Msgs in {format_rate(rates.get('messages_received'))}, "
+                 f"out {format_rate(rates.get('messages_sent'))} | "
+                 f"Bytes in {format_rate(rates.get('bytes_received'), 'B')}, "
+                 f"out {format_rate(rates.get('bytes_sent'), 'B')}")
+
+    gauges = []
+    if 'clients_connected' in values:
+        gauges.append(f"Clients {values['clients_connected']:.0f}")
+    if 'subscriptions' in values:
+        gauges.append(f"Subs {values['subscriptions']:.0f}")
+    if 'heap_current' in values:
+        gauges.append(f"Heap {values['heap_current'] / 1_048_576:.1f} MB")
+    if 'load_received_1min' in values or 'load_sent_1min' in values:
+        load = [f"{values[key]:.1f}" if key in values else "--"
+                for key in ('load_received_1min', 'load_sent_1min')]
+        gauges.append(f"Load 1m {load[0]}/{load[1]} msg/min")
+    if 'uptime' in values:
+        gauges.append(f"Up {_duration(values['uptime'])}")
+    gauge_line = " | ".join(gauges) if gauges else "--"
+
+    if snapshot.connected:
+        if snapshot.updated_at is None:
+            state = "subscribed, waiting for $SYS"
+        else:
+            age = (now if now is not None else time.monotonic()) - snapshot.updated_at
+            state = f"subscribed, last $SYS {age:.0f} s ago ({snapshot.messages} msgs)"
+    else:
+        state = f"not connected ({snapshot.error})" if snapshot.error else "connecting..."
+    return rate_line, gauge_line, state
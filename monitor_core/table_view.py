@@ -0,0 +1,159 @@
+import tkinter as tk
+from collections import namedtuple
+
+# cells: tuple (text, fg) per kolom; sort: tuple nilai sort per kolom
+TableRow = namedtuple('TableRow', ['key', 'cells', 'sort'])
+
+Column = namedtuple('Column', ['key', 'title', 'width'])
+
+
+class TableModel:
+    """Sorted rows plus a scroll offset; knows which slice is visible.
+
+    Sorting happens only when the rows or the sort column change, and
+    rows with equal sort values keep their input order. ``visible()``
+    returns at most ``page_size`` rows whatever the total count.
+    """
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self.rows = []
+        self.offset = 0
+        self.sort_column = None
+        self.reverse = False
+        self._ordered = None
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self._ordered = None
+        self.offset = self.clamp(self.offset)
+
+    def sort_by(self, column):
+        """Sort by column; the same column again flips the direction"""
+        if self.sort_column == column:
+            self.reverse = not self.reverse
+        else:
+            self.sort_column = column
+            self.reverse = False
+        self._ordered = None
+
+    def ordered(self):
+        if self._ordered is None:
+            if self.sort_column is None:
+                self._ordered = self.rows
+            else:
+                column = self.sort_column
+                self._ordered = sorted(self.rows, key=lambda row: _sort_key(row.sort[column]),
+                                       reverse=self.reverse)
+        return self._ordered
+
+    def clamp(self, offset):
+        return max(0, min(offset, len(self.rows) - self.page_size))
+
+    def scroll_to(self, offset):
+        self.offset = self.clamp(int(offset))
+
+    def visible(self):
+        return self.ordered()[self.offset:self.offset + self.page_size]
+
+    def fraction(self):
+        """(first, last) visible fraction for a Tk scrollbar"""
+        total = len(self.rows)
+        if total <= self.page_size:
+            return 0.0, 1.0
+        return self.offset / total, (self.offset + self.page_size) / total
+
+
+def _sort_key(value):
+    # None selalu di akhir, angka dan teks tidak dibandingkan langsung
+    if value is None:
+        return (2, 0)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value).lower())
+
+
+class VirtualTable:
+    """Scrollable, sortable Tk table that only renders the visible rows.
+
+    A fixed pool of ``page_size`` x columns labels is created once; each
+    ``refresh()`` writes the visible slice of the model into that pool
+    through a WidgetView, so the Tk cost of a tick depends on the page
+    size, not on the number of rows. Click a header to sort by it.
+    """
+
+    def __init__(self, parent, columns, page_size=12, view=None, font=("Helvetica", 10)):
+        self.columns = [Column(*column) for column in columns]
+        self.model = TableModel(page_size)
+        self.view = view
+        self.frame = tk.Frame(parent)
+
+        self.headers = []
+        for i, column in enumerate(self.columns):
+            header = tk.Label(self.frame, text=column.title, font=(font[0], font[1], "bold"),
+                              width=column.width, anchor="w", cursor="hand2")
+            header.grid(row=0, column=i, padx=4, pady=(0, 4), sticky="w")
+            header.bind("<Button-1>", lambda _event, i=i: self.sort_by(i))
+            self.headers.append(header)
+
+        self.cells = []
+        for r in range(page_size):
+            row = []
+            for i, column in enumerate(self.columns):
+                label = tk.Label(self.frame, text="", font=font, width=column.width, anchor="w")
+                label.grid(row=r + 1, column=i, padx=4, pady=1, sticky="w")
+                label.bind("<MouseWheel>", self._on_wheel)
+                label.bind("<Button-4>", lambda _event: self.scroll(-1))
+                label.bind("<Button-5>", lambda _event: self.scroll(1))
+                row.append(label)
+            self.cells.append(row)
+
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=len(self.columns), rowspan=page_size, sticky="ns")
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_rows(self, rows):
+        self.model.set_rows(rows)
+        self.refresh()
+
+    def sort_by(self, column):
+        self.model.sort_by(column)
+        for i, header in enumerate(self.headers):
+            arrow = ""
+            if i == self.model.sort_column:
+                arrow = " ▼" if self.model.reverse else " ▲"
+            self._set(header, text=self.columns[i].title + arrow)
+        self.refresh()
+
+    def scroll(self, rows):
+        self.model.scroll_to(self.model.offset + rows)
+        self.refresh()
+
+    def refresh(self):
+        """Write the visible slice into the label pool"""
+        visible = self.model.visible()
+        for r, labels in enumerate(self.cells):
+            cells = visible[r].cells if r < len(visible) else None
+            for i, label in enumerate(labels):
+                text, fg = cells[i] if cells is not None else ("", "black")
+                self._set(label, text=text, fg=fg)
+        self.scrollbar.set(*self.model.fraction())
+
+    def _set(self, widget, **options):
+        if self.view is not None:
+            self.view.set(widget, **options)
+        else:
+            widget.config(**options)
+
+    def _on_wheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.model.scroll_to(float(value) * len(self.model.rows))
+        elif action == "scroll":
+            step = self.model.page_size if unit == "pages" else 1
+            self.model.scroll_to(self.model.offset + int(value) * step)
+        self.refresh()
@@ -0,0 +1,54 @@
+_MISSING = object()
+
+
+class WidgetView:
+    """Remember the options last written to each widget and skip no-op writes.
+
+    ``set(widget, **options)`` only calls ``widget.config()`` with the
+    options whose value differs from what this view wrote before, so a
+    render pass over an unchanged status costs (almost) no Tk calls.
+    Everything runs on the Tk thread; no locking needed.
+
+    Widgets that are also configured directly elsewhere should be dropped
+    with ``forget(widget)`` afterwards, otherwise the cache goes stale.
+    """
+
+    def __init__(self):
+        self._state = {}
+
+        self.calls = 0          # widget.config() yang benar-benar dipanggil
+        self.skipped = 0        # set() yang tidak mengubah apa-apa
+        self.tick_calls = 0
+        self.last_tick_calls = 0
+
+    def set(self, widget, **options):
+        """Apply only the changed options; return True if Tk was called"""
+        state = self._state.setdefault(widget, {})
+        changed = {key: value for key, value in options.items()
+                   if state.get(key, _MISSING) != value}
+        if not changed:
+            self.skipped += 1
+            return False
+        widget.config(**changed)
+        state.update(changed)
+        self.calls += 1
+        self.tick_calls += 1
+        return True
+
+    def forget(self, widget=None):
+        """Drop the cached state of one widget (or all of them)"""
+        if widget is None:
+            self._state.clear()
+        else:
+            self._state.pop(widget, None)
+
+    def begin_tick(self):
+        self.tick_calls = 0
+
+    def end_tick(self):
+        """Close a render pass; return the number of Tk calls it made"""
+        self.last_tick_calls = self.tick_calls
+        return self.last_tick_calls
+
+    def stats_text(self):
+        return f"Tk calls: {self.last_tick_calls}/tick ({self.calls} total, {self.skipped} skipped)"
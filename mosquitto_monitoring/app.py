@@ -1,6 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, font, messagebox
-import subprocess
+from tkinter import ttk, font, messagebox, filedialog
 import threading
 import time
 from datetime import datetime
@@ -8,27 +7,83 @@ import sys
 import psutil
 import socket
 import os
+from collections import namedtuple
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.port_snapshot import PortSnapshotService
+from monitor_core.process_watcher import get_process_watcher
+from monitor_core.probe_worker import ProbeError
+from monitor_core.scheduler import ProbeScheduler, ProbeTask
+from monitor_core.mqtt_probe import mqtt_handshake
+from monitor_core.mqtt_services import find_mqtt_services, kill_targets
+from monitor_core.mqtt_discovery import MqttDiscovery
+from monitor_core.view_model import WidgetView
+from monitor_core.history import SAMPLE_INTERVAL, PortHistory, sparkline, export_histories_csv
+from monitor_core.kill_engine import KillEngine, KillTarget, PortRelease
+from monitor_core.sys_stats import SysStatsSubscriber, panel_text
+
 load_dotenv()
 
+# Hasil satu putaran probe: dibuat di thread worker, dibaca di thread Tk
+MonitorStatus = namedtuple('MonitorStatus', [
+    'checked_at', 'default_active', 'default_pid', 'default_name',
+    'monitor_active', 'monitor_conn', 'conn_latency_us', 'conn_reason',
+    'process_running', 'process_pid',
+    'other_services', 'scan_stats', 'probe_ms', 'schedule'])
+
+# Panel throughput digambar ulang 4x per detik, bukan per publish $SYS
+THROUGHPUT_FRAME_MS = 250
+
 class MosquittoMonitorGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Mosquitto Monitor - Real-time")
-        self.root.geometry("700x600")  # Diperlebar untuk frame tambahan
+        self.root.geometry("700x790")  # Diperlebar untuk frame tambahan + history + throughput
         
         # Port yang dimonitor
         self.monitor_port = 52345
         self.default_mqtt_port = 1883  # Port default MQTT
         self.other_services = []  # Menyimpan daftar service lain
         
+        # Satu scan socket per interval, dipakai bersama oleh semua pengecekan
+        self.port_snapshots = PortSnapshotService(interval=0.5)
+        
+        # CONNECT ke semua listener sekaligus; jenis broker dikenali sekali per (port, pid)
+        self.discovery = MqttDiscovery(fingerprint=True)
+        
+        # Cache state widget: render hanya memanggil Tk untuk yang berubah
+        self.view = WidgetView()
+        
+        # Riwayat 24 jam per port (ring buffer ukuran tetap, ~3 MB per port)
+        self.histories = {port: PortHistory(port) for port in (self.monitor_port, self.default_mqtt_port)}
+        self._last_handshake = None
+        self._last_sample = 0.0
+        
+        # Kill paralel di thread terpisah, hasilnya dibaca di update_status
+        self.kill_engine = KillEngine(self.port_snapshots)
+        self.last_kill_text = None
+        
+        # Satu subscription $SYS/broker/# yang terus hidup; UI membaca rate-nya 4x per detik
+        self.sys_stats = SysStatsSubscriber('localhost', self.monitor_port)
+        
         # Setup GUI
         self.setup_gui()
         
-        # Start monitoring
+        # Start monitoring (probe di thread worker, render di thread Tk)
+        self.last_status = None
+        self.render_ms = 0.0
+        self.probe_worker = self.create_scheduler()
+        
+        # Broker start/exit langsung memicu probe, tidak menunggu tick berikutnya
+        self.process_watcher = get_process_watcher()
+        self.process_watcher.subscribe(self.on_broker_event)
+        
         self.running = True
+        self.probe_worker.start()
+        self.sys_stats.start()
         self.update_status()
+        self.update_throughput()
         
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -174,7 +229,7 @@ class MosquittoMonitorGUI:
         tk.Label(conn_frame, text="MQTT Connection:", font=status_font, 
                 width=20, anchor="w").pack(side=tk.LEFT)
         self.conn_status = tk.Label(conn_frame, text="CHECKING...", 
-                                   font=status_font, width=15)
+                                   font=status_font, width=30, anchor="w")
         self.conn_status.pack(side=tk.LEFT)
         
         # Separator
@@ -184,31 +239,53 @@ class MosquittoMonitorGUI:
         self.summary_label = tk.Label(status_frame, text="", font=title_font, pady=10)
         self.summary_label.pack()
         
+        # ============ HISTORY ============
+        history_frame = tk.LabelFrame(self.root, text="History (24h)", font=status_font)
+        history_frame.pack(padx=20, fill=tk.X)
+        
+        self.history_labels = {}
+        for key, title in ((self.monitor_port, f"Port {self.monitor_port}:"),
+                           ('latency', "Latency:"),
+                           (self.default_mqtt_port, f"Port {self.default_mqtt_port}:")):
+            row = tk.Frame(history_frame)
+            row.pack(fill=tk.X)
+            tk.Label(row, text=title, font=status_font, width=12, anchor="w").pack(side=tk.LEFT)
+            self.history_labels[key] = tk.Label(row, text="", font=("Courier", 9), anchor="w")
+            self.history_labels[key].pack(side=tk.LEFT, fill=tk.X)
+        
+        # ============ THROUGHPUT ($SYS) ============
+        throughput_frame = tk.LabelFrame(self.root, text=f"Broker Throughput ($SYS, port {self.monitor_port})",
+                                         font=status_font)
+        throughput_frame.pack(padx=20, pady=(5, 0), fill=tk.X)
+        
+        self.throughput_labels = []
+        for fg in ("black", "black", "gray"):
+            label = tk.Label(throughput_frame, text="--", font=("Courier", 9), fg=fg, anchor="w")
+            label.pack(fill=tk.X)
+            self.throughput_labels.append(label)
+        
         # Control buttons
         button_frame = tk.Frame(self.root)
         button_frame.pack(pady=10)
         
         tk.Button(button_frame, text="Refresh Now", command=self.force_refresh,
                  bg="lightblue").pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Export CSV", command=self.export_history).pack(side=tk.LEFT, padx=5)
         
         # Status bar
         self.status_bar = tk.Label(self.root, text="Monitoring started...", 
                                   bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
     
-    def check_port_status(self, port):
+    def check_port_status(self, port, snapshot=None):
         """Check if a specific port is in use"""
         try:
-            # Method 1: Using psutil
-            for conn in psutil.net_connections(kind='inet'):
-                if hasattr(conn.laddr, 'port') and conn.laddr.port == port:
-                    if conn.status == 'LISTEN':
-                        # Get process info
-                        try:
-                            proc = psutil.Process(conn.pid)
-                            return True, conn.pid, proc.name()
-                        except:
-                            return True, conn.pid, "Unknown"
+            # Method 1: Using shared psutil snapshot
+            if snapshot is None:
+                snapshot = self.port_snapshots.get()
+            listener = snapshot.lookup(port)
+            if listener:
+                return True, listener.pid, listener.name
             return False, None, None
         except Exception as e:
             # Method 2: Using socket
@@ -223,152 +300,94 @@ class MosquittoMonitorGUI:
                 pass
             return False, None, None
     
+    def on_broker_event(self, event):
+        """Called from the watcher thread when a broker process starts/exits"""
+        if event.family == 'mosquitto':
+            self.probe_worker.trigger('process', 'ports', 'mqtt')
+    
     def check_mosquitto_process(self):
         """Check if mosquitto process is running"""
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    if 'mosquitto' in proc.info['name'].lower():
-                        return True, proc.info['pid'], proc.info['name']
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    pass
+            running = self.process_watcher.running('mosquitto')
+            if running:
+                pid, name = running[0]
+                return True, pid, name
             return False, None, None
         except Exception as e:
             return False, None, None
     
+    def probe_mqtt(self, port):
+        """In-process CONNECT/CONNACK handshake (no mosquitto_pub spawn)"""
+        return mqtt_handshake('localhost', port, timeout=1.0)
+    
     def test_mqtt_connection(self, port):
         """Test MQTT connection on specific port"""
-        try:
-            # Try to connect to the port using socket first (fast check)
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('localhost', port))
-            sock.close()
-            
-            if result == 0:
-                # Try mosquitto_pub if available
-                try:
-                    # Check env path first
-                    mosquitto_dir = os.getenv("MOSQUITTO_DIR")
-                    pub_cmd = "mosquitto_pub"
-                    if mosquitto_dir:
-                        potential_path = os.path.join(mosquitto_dir, "mosquitto_pub.exe")
-                        if os.path.exists(potential_path):
-                            pub_cmd = potential_path
-
-                    test_cmd = [
-                        pub_cmd,
-                        "-h", "localhost",
-                        "-p", str(port),
-                        "-t", "monitor/test",
-                        "-m", "test",
-                        "-q", "0",
-                        "-i", "monitor_client",
-                        "-W", "1"
-                    ]
-                    
-                    result = subprocess.run(
-                        test_cmd,
-                        capture_output=True, text=True,
-                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-                        timeout=2
-                    )
-                    
-                    return result.returncode == 0
-                except (subprocess.SubprocessError, FileNotFoundError):
-                    # mosquitto_pub not available, but port is open
-                    return True
-            return False
-        except:
-            return False
+        return self.probe_mqtt(port).accepted
     
-    def find_other_mqtt_services(self):
+    def find_other_mqtt_services(self, snapshot=None):
         """Find MQTT services on other ports (not 1883 or 52345)"""
-        other_services = []
-        
         try:
-            # Check all listening ports
-            for conn in psutil.net_connections(kind='inet'):
-                if hasattr(conn.laddr, 'port') and conn.status == 'LISTEN':
-                    port = conn.laddr.port
-                    
-                    # Skip ports we're already monitoring
-                    if port in [self.default_mqtt_port, self.monitor_port]:
-                        continue
-                    
-                    # Check if port is in typical MQTT range or is MQTT
-                    if port > 1024 and port < 65535:  # User ports, not system ports
-                        # Try to identify if it's MQTT
-                        try:
-                            # Get process name
-                            proc = psutil.Process(conn.pid)
-                            proc_name = proc.name().lower()
-                            
-                            # Check if it looks like MQTT
-                            mqtt_keywords = ['mosquitto', 'mqtt', 'emqx', 'hivemq', 'vernemq', 'rabbitmq']
-                            is_mqtt_like = any(keyword in proc_name for keyword in mqtt_keywords)
-                            
-                            if is_mqtt_like:
-                                other_services.append({
-                                    'port': port,
-                                    'pid': conn.pid,
-                                    'name': proc.name(),
-                                    'anonymous': True  # Mark as anonymous since not on standard port
-                                })
-                        except:
-                            # Could not get process info, test if it's MQTT
-                            if self.test_mqtt_connection(port):
-                                other_services.append({
-                                    'port': port,
-                                    'pid': None,
-                                    'name': 'Unknown',
-                                    'anonymous': True
-                                })
+            if snapshot is None:
+                snapshot = self.port_snapshots.get()
+            return find_mqtt_services(snapshot,
+                                      exclude_ports=(self.default_mqtt_port, self.monitor_port),
+                                      discovery=self.discovery)
         except Exception as e:
             print(f"Error finding other MQTT services: {e}")
-        
-        return other_services
+            return []
     
-    def update_other_services_display(self):
+    def update_other_services_display(self, services):
         """Update display for other MQTT services"""
-        self.other_services = self.find_other_mqtt_services()
+        self.other_services = list(services)
         
-        if self.other_services:
+        # Hanya yang menerima CONNECT tanpa kredensial dihitung "anonymous"
+        anonymous = [s for s in self.other_services if s['anonymous']]
+        
+        if anonymous:
             # Show warning about anonymous services
-            self.other_status_label.config(
-                text=f"⚠ Service MQTT Anonymous terdeteksi ({len(self.other_services)} service)",
+            self.view.set(self.other_status_label,
+                text=f"⚠ Service MQTT Anonymous terdeteksi ({len(anonymous)} service)",
                 fg="red",
                 font=("Helvetica", 10, "bold")
             )
             
             # Enable buttons
-            self.other_killall_button.config(state=tk.NORMAL, bg="darkred", fg="white")
-            self.other_detail_button.config(state=tk.NORMAL, bg="#ff9966", fg="white")
+            killable = bool(kill_targets(self.other_services))
+            self.view.set(self.other_killall_button, state=tk.NORMAL if killable else tk.DISABLED,
+                          bg="darkred" if killable else "lightgray", fg="white" if killable else "black")
+            self.view.set(self.other_detail_button, state=tk.NORMAL, bg="#ff9966", fg="white")
             
             # Update frame appearance
             right_frame = self.other_status_label.master.master
-            right_frame.config(bg="#ffcc99")  # Orange background for warning
-            
-            # Update status bar with details
-            service_ports = [str(s['port']) for s in self.other_services]
-            self.status_bar.config(
-                text=f"{self.status_bar.cget('text')} | Anonymous MQTT pada port: {', '.join(service_ports)}"
+            self.view.set(right_frame, bg="#ffcc99")  # Orange background for warning
+        elif self.other_services:
+            # Broker lain yang menolak client anonim: ditampilkan, tidak di-kill
+            self.view.set(self.other_status_label,
+                text=f"ℹ {len(self.other_services)} service MQTT lain (menolak client anonim)",
+                fg="darkblue",
+                font=("Helvetica", 10)
             )
+            
+            self.view.set(self.other_killall_button, state=tk.DISABLED, bg="lightgray", fg="black")
+            self.view.set(self.other_detail_button, state=tk.NORMAL, bg="#ff9966", fg="white")
+            
+            right_frame = self.other_status_label.master.master
+            self.view.set(right_frame, bg="#ffffcc")
         else:
             # No other services found
-            self.other_status_label.config(
+            self.view.set(self.other_status_label,
                 text="✓ Tidak ada service MQTT lain",
                 fg="darkgreen",
                 font=("Helvetica", 10)
             )
             
             # Disable buttons
-            self.other_killall_button.config(state=tk.DISABLED, bg="lightgray", fg="black")
-            self.other_detail_button.config(state=tk.DISABLED, bg="lightgray", fg="black")
+            self.view.set(self.other_killall_button, state=tk.DISABLED, bg="lightgray", fg="black")
+            self.view.set(self.other_detail_button, state=tk.DISABLED, bg="lightgray", fg="black")
             
             # Update frame appearance
             right_frame = self.other_status_label.master.master
-            right_frame.config(bg="#ccffcc")  # Green background for safe
+            self.view.set(right_frame, bg="#ccffcc")  # Green background for safe
     
     def show_other_services_detail(self):
         """Show popup with detailed information about other MQTT services"""
@@ -417,11 +436,19 @@ class MosquittoMonitorGUI:
                 detail_text.insert(tk.END, f"PID: Tidak diketahui\n")
             
             detail_text.insert(tk.END, f"Nama Process: {service['name']}\n")
-            detail_text.insert(tk.END, f"Status: Anonymous MQTT Service\n")
+            if service.get('broker'):
+                detail_text.insert(tk.END, f"Broker: {service['broker']}\n")
+            if service.get('mqtt'):
+                detail_text.insert(tk.END, f"CONNACK: {service['mqtt']}\n")
+            if service['anonymous']:
+                detail_text.insert(tk.END, f"Status: Anonymous MQTT Service\n")
+            else:
+                detail_text.insert(tk.END, f"Status: MQTT Service (menolak client anonim)\n")
             detail_text.insert(tk.END, "-"*30 + "\n\n")
         
         # Add summary
-        detail_text.insert(tk.END, f"\nTotal: {len(self.other_services)} service anonymous\n")
+        anonymous_count = sum(1 for s in self.other_services if s['anonymous'])
+        detail_text.insert(tk.END, f"\nTotal: {len(self.other_services)} service, {anonymous_count} anonymous\n")
         
         # Make text read-only
         detail_text.config(state=tk.DISABLED)
@@ -445,9 +472,15 @@ class MosquittoMonitorGUI:
         if not self.other_services:
             return
         
+        # Hanya keyword/anonim yang diterima; broker ber-auth dan node cluster tidak di-kill
+        services = kill_targets(self.other_services)
+        if not services:
+            self.view.set(self.status_bar, text="No killable MQTT service (only authenticated listeners)")
+            return
+        
         # Ask for confirmation
-        service_count = len(self.other_services)
-        service_ports = [str(s['port']) for s in self.other_services]
+        service_count = len(services)
+        service_ports = [str(s['port']) for s in services]
         
         confirm_msg = f"Kill semua {service_count} service MQTT anonymous?\n\n"
         confirm_msg += f"Port yang akan di-kill: {', '.join(service_ports)}\n\n"
@@ -456,56 +489,21 @@ class MosquittoMonitorGUI:
         if not messagebox.askyesno("Konfirmasi Kill All", confirm_msg):
             return
         
-        killed_count = 0
-        failed_count = 0
-        
-        # Kill each service
-        for service in self.other_services:
-            try:
-                if service['pid']:
-                    try:
-                        process = psutil.Process(service['pid'])
-                        process.terminate()
-                        
-                        # Wait a bit for termination
-                        try:
-                            process.wait(timeout=1)
-                        except:
-                            pass
-                        
-                        killed_count += 1
-                        
-                    except Exception as e:
-                        # Try force kill
-                        try:
-                            process = psutil.Process(service['pid'])
-                            process.kill()
-                            killed_count += 1
-                        except:
-                            failed_count += 1
-            except:
-                failed_count += 1
-        
-        # Show result
-        result_msg = f"Berhasil kill {killed_count} service\n"
-        if failed_count > 0:
-            result_msg += f"Gagal kill {failed_count} service\n"
-        
-        messagebox.showinfo("Hasil Kill All", result_msg)
-        
-        # Refresh display
-        self.status_bar.config(text=f"Killed {killed_count} anonymous MQTT services")
-        self.update_other_services_display()
+        # Semua target di-SIGTERM sekaligus, UI tidak menunggu
+        targets = [KillTarget(s['pid'], s['port'], f"Anonymous Port {s['port']}", None, s['create_time'])
+                   for s in services]
+        self.kill_engine.submit(targets, tag='kill-all')
+        self.view.set(self.status_bar, text=f"Killing {len(targets)} anonymous MQTT services...")
     
     def update_default_port_display(self, default_active, default_pid, default_name):
         """Update the display for default port monitoring"""
         if default_active:
             # Update frame appearance
             left_frame = self.default_status_label.master.master
-            left_frame.config(bg="#ffcccc", relief=tk.RIDGE, borderwidth=3)
+            self.view.set(left_frame, bg="#ffcccc", relief=tk.RIDGE, borderwidth=3)
             
             # Update status label
-            self.default_status_label.config(
+            self.view.set(self.default_status_label,
                 text="⚠ WARNING: Default Port 1883 is ACTIVE!",
                 fg="red",
                 font=("Helvetica", 10, "bold")
@@ -515,112 +513,274 @@ class MosquittoMonitorGUI:
             detail_text = f"PID: {default_pid if default_pid else 'Unknown'}"
             if default_name and default_name != "Unknown":
                 detail_text += f" | Process: {default_name}"
-            self.default_detail_label.config(text=detail_text, fg="darkred")
+            self.view.set(self.default_detail_label, text=detail_text, fg="darkred")
             
             # Enable kill button
-            self.default_action_button.config(state=tk.NORMAL, bg="red", fg="white")
+            self.view.set(self.default_action_button, state=tk.NORMAL, bg="red", fg="white")
             
         else:
             # Update frame appearance
             left_frame = self.default_status_label.master.master
-            left_frame.config(bg="#ccffcc", relief=tk.RIDGE, borderwidth=2)
+            self.view.set(left_frame, bg="#ccffcc", relief=tk.RIDGE, borderwidth=2)
             
             # Update status label
-            self.default_status_label.config(
+            self.view.set(self.default_status_label,
                 text="✓ Default Port 1883 is inactive",
                 fg="darkgreen",
                 font=("Helvetica", 10)
             )
             
             # Clear detail info
-            self.default_detail_label.config(text="No service detected", fg="gray")
+            self.view.set(self.default_detail_label, text="No service detected", fg="gray")
             
             # Disable kill button
-            self.default_action_button.config(state=tk.DISABLED, bg="lightgray", fg="black")
+            self.view.set(self.default_action_button, state=tk.DISABLED, bg="lightgray", fg="black")
     
-    def update_status(self):
-        """Update all status indicators"""
+    def create_scheduler(self):
+        """Each probe type gets its own rate: cheap checks often, sweeps rarely"""
+        tasks = [
+            # Interval tetap tanpa jitter: satu sampel history per run (lihat record_history)
+            ProbeTask('ports', self.probe_ports, SAMPLE_INTERVAL, SAMPLE_INTERVAL, jitter=0.0, budget_ms=20,
+                      signature=lambda ports: tuple(p[:2] for p in ports),
+                      wakes=('mqtt', 'process', 'sweep')),
+            ProbeTask('process', self.check_mosquitto_process, 1.0, 10.0,
+                      signature=lambda proc: proc[:2], wakes=('ports',)),
+            ProbeTask('mqtt', self.probe_monitor_mqtt, 2.0, 20.0, budget_ms=50,
+                      signature=lambda h: h and (h.return_code, h.error)),
+            ProbeTask('sweep', self.find_other_mqtt_services, 5.0, 30.0, backoff=2.0, budget_ms=100,
+                      signature=lambda services: tuple((s['port'], s['pid']) for s in services)),
+        ]
+        return ProbeScheduler(tasks, self.collect_status, name="monitor-probes")
+    
+    def probe_ports(self):
+        """Default and monitor port state from one shared snapshot, plus one history sample"""
+        snapshot = self.port_snapshots.get()
+        ports = (self.check_port_status(self.default_mqtt_port, snapshot),
+                 self.check_port_status(self.monitor_port, snapshot))
+        # Latency dari handshake terakhir task 'mqtt' (hanya saat port monitor listen)
+        self.record_history(ports, self.probe_worker.value('mqtt') if ports[1][0] else None)
+        return ports
+    
+    def probe_monitor_mqtt(self):
+        """Handshake with the monitor port, only while it is listening"""
+        ports = self.probe_worker.value('ports')
+        if ports and ports[1][0]:
+            return self.probe_mqtt(self.monitor_port)
+        return None
+    
+    def collect_status(self, values):
+        """Build a MonitorStatus from the latest result of every probe task"""
+        # None = task belum pernah jalan (mis. gagal di tick pertama): ditampilkan "belum dicek"
+        (default_active, default_pid, default_name), (monitor_active, _, _) = \
+            values['ports'] or ((None, None, None), (None, None, None))
+        handshake = values['mqtt'] if monitor_active else None
+        process_running, process_pid, process_name = values['process'] or (None, None, None)
+        other_services = values['sweep'] or ()
+        stats = self.probe_worker.stats()
+        
+        return MonitorStatus(
+            checked_at=datetime.now().strftime("%H:%M:%S"),
+            default_active=default_active,
+            default_pid=default_pid,
+            default_name=default_name,
+            monitor_active=monitor_active,
+            monitor_conn=bool(handshake and handshake.accepted),
+            conn_latency_us=handshake.latency_us if handshake else None,
+            conn_reason=handshake.reason if handshake else None,
+            process_running=process_running,
+            process_pid=process_pid,
+            other_services=tuple(other_services),
+            scan_stats=f"{self.port_snapshots.stats_text()}, {self.discovery.stats_text()}",
+            probe_ms=sum(task['last_ms'] for task in stats.values()),
+            schedule=self.probe_worker.stats_text()
+        )
+    
+    def record_history(self, ports, handshake):
+        """Append one sample per watched port (probe thread, once per 'ports' run)"""
+        # Run tambahan karena trigger/wakes tidak menambah sampel: jarak tetap ~SAMPLE_INTERVAL
+        if time.monotonic() - self._last_sample < SAMPLE_INTERVAL / 2:
+            return
+        self._last_sample = time.monotonic()
+        now = time.time()
+        (default_active, default_pid, _), (monitor_active, monitor_pid, _) = ports
+        # Latency hanya dicatat saat handshake baru, bukan diulang tiap sampel
+        latency_ms = None
+        if handshake is not None and handshake is not self._last_handshake and handshake.is_mqtt:
+            latency_ms = handshake.latency_us / 1000.0
+        self._last_handshake = handshake
+        self.histories[self.monitor_port].append(now, monitor_active, latency_ms, monitor_pid)
+        self.histories[self.default_mqtt_port].append(now, default_active, None, default_pid)
+    
+    def update_history_display(self):
+        """Sparklines for the last minute, p50/p99 over the last 15 minutes"""
+        for port in (self.monitor_port, self.default_mqtt_port):
+            history = self.histories[port]
+            uptime = history.uptime()
+            self.view.set(self.history_labels[port],
+                text=f"{sparkline(history.up_states(60), 60)} "
+                     f"up {uptime * 100 if uptime is not None else 0:.1f}%, {history.flaps} flaps")
+        
+        monitor = self.histories[self.monitor_port]
+        p50, p99 = monitor.percentiles(last=1800)
+        readout = f"p50 {p50:.1f} ms, p99 {p99:.1f} ms" if p50 is not None else "p50 --, p99 --"
+        self.view.set(self.history_labels['latency'],
+                      text=f"{sparkline(monitor.latencies(60), 60)} {readout}")
+    
+    def update_throughput(self):
+        """Redraw the $SYS throughput panel at a fixed frame rate (Tk thread)"""
         if not self.running:
             return
-            
+        
+        # Frame rate tetap: berapapun banyaknya publish $SYS, paling banyak 3 label per frame
+        # (WidgetView hanya memanggil Tk untuk label yang teksnya berubah)
+        for label, text in zip(self.throughput_labels, panel_text(self.sys_stats.snapshot())):
+            self.view.set(label, text=text)
+        
+        self.root.after(THROUGHPUT_FRAME_MS, self.update_throughput)
+    
+    def export_history(self):
+        """Save the history of every watched port to one CSV file"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+            initialfile=f"mqtt_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        if not path:
+            return
         try:
-            # Update time
-            current_time = datetime.now().strftime("%H:%M:%S")
-            self.time_label.config(text=f"Last check: {current_time}")
-            
-            # Check default port (1883)
-            default_active, default_pid, default_name = self.check_port_status(self.default_mqtt_port)
-            
-            # Update display untuk port 1883
-            self.update_default_port_display(default_active, default_pid, default_name)
-            
-            # Check and update other MQTT services
-            self.update_other_services_display()
-            
-            # Check monitor port (52345)
-            monitor_active, monitor_pid, monitor_name = self.check_port_status(self.monitor_port)
-            
-            if monitor_active:
-                self.monitor_status.config(text="ACTIVE", fg="green")
-                # Test connection on monitor port
-                monitor_conn = self.test_mqtt_connection(self.monitor_port)
-                if monitor_conn:
-                    self.conn_status.config(text=f"CONNECTED", fg="green")
-                else:
-                    self.conn_status.config(text=f"PORT OPEN", fg="orange")
-            else:
-                self.monitor_status.config(text="INACTIVE", fg="red")
-                self.conn_status.config(text="DISCONNECTED", fg="red")
-            
-            # Check mosquitto process
-            process_running, process_pid, process_name = self.check_mosquitto_process()
-            
-            if process_running:
-                self.process_status.config(text="RUNNING", fg="green")
-                self.pid_label.config(text=process_pid, fg="blue")
+            rows = export_histories_csv(self.histories.values(), path)
+            self.view.set(self.status_bar, text=f"Exported {rows} samples to {path}")
+        except OSError as e:
+            messagebox.showerror("Export CSV", f"Gagal menyimpan history:\n{e}")
+    
+    def show_kill_report(self, report):
+        """Show the outcome of a finished kill batch (Tk thread)"""
+        if isinstance(report, PortRelease):
+            # Datang setelah KillReport batch-nya, begitu port terlihat lepas (atau batas waktu habis)
+            self.last_kill_text = f"{self.last_kill_text}, {report.summary()}"
+            return
+        self.last_kill_text = report.summary()
+        self.port_snapshots.invalidate()
+        self.probe_worker.trigger('ports', 'sweep')
+        
+        if report.tag == 'kill-all':
+            result_msg = f"Berhasil kill {report.killed_count} service\n"
+            if report.failed_count > 0:
+                result_msg += f"Gagal kill {report.failed_count} service\n"
+            messagebox.showinfo("Hasil Kill All", result_msg)
+            self.view.set(self.status_bar, text=f"Killed {report.killed_count} anonymous MQTT services")
+        elif report.tag == 'kill-default':
+            result = report.results[0] if report.results else None
+            if result is not None and result.outcome != 'failed':
+                verb = "force killed" if result.outcome == 'killed' else "terminated"
+                self.view.set(self.status_bar, text=f"Process on port 1883 (PID: {result.pid}) {verb}.")
+                self.update_default_port_display(False, None, None)
             else:
-                self.process_status.config(text="STOPPED", fg="red")
-                self.pid_label.config(text="--", fg="gray")
-            
-            # Update summary
-            if monitor_active:
-                self.summary_label.config(text=f"✅ PORT {self.monitor_port} ACTIVE", fg="green")
-                self.status_bar.config(
-                    text=f"Port {self.monitor_port} active | "
-                         f"Default port 1883: {'ACTIVE' if default_active else 'inactive'} | "
-                         f"Other MQTT: {len(self.other_services)} service(s) | "
-                         f"Updated: {current_time}"
-                )
+                error = result.error if result is not None else "no target"
+                self.view.set(self.status_bar, text=f"Failed to kill process: {str(error)[:50]}")
+    
+    def update_status(self):
+        """Drain the probe queue and render the newest result (Tk thread)"""
+        if not self.running:
+            return
+        
+        for report in self.kill_engine.drain():
+            self.show_kill_report(report)
+        
+        status = self.probe_worker.drain()
+        if status is not None:
+            start = time.perf_counter()
+            self.view.begin_tick()
+            try:
+                self.render_status(status)
+            except Exception as e:
+                self.view.set(self.status_bar, text=f"Error: {str(e)[:50]}...")
+            self.view.end_tick()
+            self.render_ms = (time.perf_counter() - start) * 1000.0
+        
+        self.root.after(100, self.update_status)
+    
+    def render_status(self, status):
+        """Update all status indicators from one MonitorStatus"""
+        if isinstance(status, ProbeError):
+            self.view.set(self.status_bar, text=f"Error: {status.message[:50]}...")
+            return
+        
+        self.last_status = status
+        current_time = status.checked_at
+        self.view.set(self.time_label, text=f"Last check: {current_time}")
+        
+        self.update_default_port_display(status.default_active, status.default_pid, status.default_name)
+        self.update_other_services_display(status.other_services)
+        self.update_history_display()
+        
+        if status.monitor_active is None:
+            self.view.set(self.monitor_status, text="CHECKING...", fg="gray")
+            self.view.set(self.conn_status, text="--", fg="gray")
+        elif status.monitor_active:
+            self.view.set(self.monitor_status, text="ACTIVE", fg="green")
+            if status.monitor_conn:
+                self.view.set(self.conn_status, text=f"CONNECTED ({status.conn_latency_us / 1000:.1f} ms)", fg="green")
             else:
-                self.summary_label.config(text=f"❌ PORT {self.monitor_port} INACTIVE", fg="red")
-                self.status_bar.config(
-                    text=f"Port {self.monitor_port} not active | "
-                         f"Default port 1883: {'ACTIVE' if default_active else 'inactive'} | "
-                         f"Other MQTT: {len(self.other_services)} service(s) | "
-                         f"Updated: {current_time}"
-                )
-                
-        except Exception as e:
-            self.status_bar.config(text=f"Error: {str(e)[:50]}...")
+                # Handshake belum jalan sejak port terbuka
+                reason = status.conn_reason or "checking..."
+                self.view.set(self.conn_status, text=f"PORT OPEN ({reason[:20]})", fg="orange")
+        else:
+            self.view.set(self.monitor_status, text="INACTIVE", fg="red")
+            self.view.set(self.conn_status, text="DISCONNECTED", fg="red")
+        
+        if status.process_running is None:
+            self.view.set(self.process_status, text="CHECKING...", fg="gray")
+            self.view.set(self.pid_label, text="--", fg="gray")
+        elif status.process_running:
+            self.view.set(self.process_status, text="RUNNING", fg="green")
+            self.view.set(self.pid_label, text=status.process_pid, fg="blue")
+        else:
+            self.view.set(self.process_status, text="STOPPED", fg="red")
+            self.view.set(self.pid_label, text="--", fg="gray")
         
-        # Schedule next update (every 2 seconds)
-        self.root.after(2000, self.update_status)
+        if status.monitor_active:
+            self.view.set(self.summary_label, text=f"✅ PORT {self.monitor_port} ACTIVE", fg="green")
+            port_state = "active"
+        else:
+            self.view.set(self.summary_label, text=f"❌ PORT {self.monitor_port} INACTIVE", fg="red")
+            port_state = "not active"
+        
+        anonymous_ports = ""
+        if self.other_services:
+            anonymous_ports = f" (port {', '.join(str(s['port']) for s in self.other_services)})"
+        
+        self.view.set(self.status_bar,
+            text=f"Port {self.monitor_port} {port_state} | "
+                 f"Default port 1883: {'ACTIVE' if status.default_active else 'inactive'} | "
+                 f"Other MQTT: {len(self.other_services)} service(s){anonymous_ports} | "
+                 f"{f'Last kill: {self.last_kill_text} | ' if self.last_kill_text else ''}"
+                 f"{status.scan_stats} | "
+                 f"Probe: {status.probe_ms:.0f} ms ({status.schedule}), "
+                 f"UI: {self.render_ms:.1f} ms, {self.view.stats_text()} | "
+                 f"Updated: {current_time}"
+        )
     
     def scan_other_mqtt_services(self):
         """Manual scan for other MQTT services"""
-        self.status_bar.config(text="Scanning for other MQTT services...")
-        self.update_other_services_display()
-        self.status_bar.config(text="Scan completed" + self.status_bar.cget('text').split('Scan completed')[-1])
+        self.view.set(self.status_bar, text="Scanning for other MQTT services...")
+        self.port_snapshots.invalidate()
+        self.discovery.forget()
+        self.probe_worker.trigger('ports', 'sweep')
     
     def force_refresh(self):
         """Force immediate refresh"""
-        self.status_bar.config(text="Manual refresh triggered...")
-        self.update_status()
+        self.view.set(self.status_bar, text="Manual refresh triggered...")
+        self.port_snapshots.invalidate()
+        self.probe_worker.trigger()
     
     def kill_default_port(self):
         """Kill process using default port 1883"""
         try:
-            default_active, default_pid, default_name = self.check_port_status(self.default_mqtt_port)
+            status = self.last_status
+            if status is None:
+                self.view.set(self.status_bar, text="Still checking port 1883, try again in a moment.")
+                return
+            default_active, default_pid, default_name = status.default_active, status.default_pid, status.default_name
             
             if default_active and default_pid:
                 try:
@@ -634,36 +794,26 @@ class MosquittoMonitorGUI:
                                              f"This may stop important services."):
                         return
                     
-                    process.terminate()
-                    
-                    # Wait for process to terminate
-                    try:
-                        process.wait(timeout=3)
-                        self.status_bar.config(text=f"Process on port 1883 (PID: {default_pid}) terminated.")
-                        
-                        # Update display immediately
-                        self.update_default_port_display(False, None, None)
-                        
-                    except:
-                        process.kill()
-                        self.status_bar.config(text=f"Process on port 1883 (PID: {default_pid}) force killed.")
-                        
-                        # Update display immediately
-                        self.update_default_port_display(False, None, None)
+                    self.kill_engine.submit([KillTarget(default_pid, self.default_mqtt_port, "Port 1883", None, None)],
+                                            tag='kill-default')
+                    self.view.set(self.status_bar, text=f"Stopping process on port 1883 (PID: {default_pid})...")
                     
                 except Exception as e:
-                    self.status_bar.config(text=f"Failed to kill process: {str(e)[:50]}")
+                    self.view.set(self.status_bar, text=f"Failed to kill process: {str(e)[:50]}")
             elif default_active:
-                self.status_bar.config(text="Port 1883 active but cannot identify process.")
+                self.view.set(self.status_bar, text="Port 1883 active but cannot identify process.")
             else:
-                self.status_bar.config(text="Port 1883 is already inactive.")
+                self.view.set(self.status_bar, text="Port 1883 is already inactive.")
                 
         except Exception as e:
-            self.status_bar.config(text=f"Error checking port: {str(e)[:50]}")
+            self.view.set(self.status_bar, text=f"Error checking port: {str(e)[:50]}")
     
     def on_closing(self):
         """Handle window closing"""
         self.running = False
+        self.process_watcher.unsubscribe(self.on_broker_event)
+        self.probe_worker.stop()
+        self.sys_stats.stop()
         self.root.destroy()
 
 def main():
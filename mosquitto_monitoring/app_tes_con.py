@@ -8,6 +8,9 @@ import sys
 import time
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.mqtt_probe import mqtt_handshake, MQTT_V311, MQTT_V5
+
 load_dotenv()
 
 # Coba import paho-mqtt, jika tidak ada beri instruksi
@@ -175,6 +178,11 @@ class MosquittoConnectionTester:
                                    command=self.clear_log, width=15)
         self.clear_btn.grid(row=2, column=1, padx=5, pady=5)
         
+        # Row 4: Handshake probe (tanpa mosquitto_pub)
+        self.test_conn_btn = ttk.Button(button_frame, text="Test Handshake", 
+                                       command=self.test_handshake, width=15)
+        self.test_conn_btn.grid(row=3, column=0, padx=5, pady=5)
+        
         # Results frame dengan ScrolledText
         results_frame = ttk.LabelFrame(main_frame, text="Test Results - Live Log", padding="10")
         results_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
@@ -325,6 +333,36 @@ class MosquittoConnectionTester:
         
         threading.Thread(target=publish_thread, daemon=True).start()
     
+    def test_handshake(self):
+        """Test CONNECT/CONNACK langsung via socket, MQTT 3.1.1 dan 5"""
+        settings = self.get_settings()
+        if not settings:
+            return
+        
+        host, port, _, _ = settings
+        
+        def handshake_thread():
+            self.root.after(0, lambda: self.test_conn_btn.config(state=tk.DISABLED))
+            self.root.after(0, lambda: self.log_message(f"🤝 Handshake probe to {host}:{port}", "blue"))
+            
+            for label, protocol in (("3.1.1", MQTT_V311), ("5.0", MQTT_V5)):
+                result = mqtt_handshake(host, port, timeout=2.0, protocol=protocol)
+                if result.accepted:
+                    text = (f"✅ MQTT {label}: CONNACK {result.reason} in {result.latency_us} µs "
+                            f"(TCP {result.connect_us} µs, id {result.client_id})")
+                    color = "green"
+                elif result.is_mqtt:
+                    text = f"⚠ MQTT {label}: CONNACK rc={result.return_code} ({result.reason}) in {result.latency_us} µs"
+                    color = "orange"
+                else:
+                    text = f"❌ MQTT {label}: {result.reason}"
+                    color = "red"
+                self.root.after(0, lambda t=text, c=color: self.log_message(t, c))
+            
+            self.root.after(0, lambda: self.test_conn_btn.config(state=tk.NORMAL))
+        
+        threading.Thread(target=handshake_thread, daemon=True).start()
+    
     def test_subscribe_basic(self):
         """Basic subscribe menggunakan mosquitto_sub.exe (masih ada timing issues)"""
         settings = self.get_settings()
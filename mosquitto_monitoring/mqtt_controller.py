@@ -2,20 +2,50 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import subprocess
 import threading
-import psutil
+import time
 import os
 import sys
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.broker_bench import quick_benchmark, result_text
+from monitor_core.broker_pool import INSTANCE_COLUMNS, BrokerPool, instance_rows, pool_summary
+from monitor_core.kill_engine import KillEngine, KillTarget
+from monitor_core.log_console import LogConsole
+from monitor_core.mosquitto_log import (
+    CLIENT_COLUMNS, TOPIC_COLUMNS, MosquittoLogParser, client_rows, topic_rows, traffic_summary)
+from monitor_core.mosquitto_profiles import DEFAULT_PROFILE, PROFILES
+from monitor_core.proc_net import listening_pids, pid_by_port
+from monitor_core.process_watcher import get_process_watcher
+from monitor_core.readiness import StartupLog
+from monitor_core.table_view import VirtualTable
+from monitor_core.view_model import WidgetView
+
 load_dotenv()
 
+# mosquitto.conf hasil profil ditulis ke sini (lihat monitor_core/mosquitto_profiles.py)
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generated')
+# Waktu cold start / restart-to-ready per run, untuk melacak regresi startup
+STARTUP_LOG = StartupLog(os.path.join(GENERATED_DIR, 'startup_times.jsonl'))
+READY_TIMEOUT = 30.0
+
 class MosquittoGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Mosquitto MQTT Broker Controller")
-        self.root.geometry("700x500")
+        self.root.geometry("1250x950")
         
-        self.mosquitto_process = None
+        self.pool = None
+        # Stop pool / kill pemilik port jalan di thread ini, bukan di thread Tk
+        self.stop_thread = None
+        self.launch_thread = None
+        self.kill_engine = KillEngine()
+        self.running_profile = None
+        self.bench_results = {}
+        self.process_watcher = get_process_watcher()
+        self.process_watcher.subscribe(self.on_broker_event)
+        self.traffic = MosquittoLogParser()
+        self.view = WidgetView()
         self.default_port = 1883  # Default MQTT port
         
         # Setup GUI
@@ -35,8 +65,27 @@ class MosquittoGUI:
         # Port configuration
         ttk.Label(main_frame, text="Port:").grid(row=1, column=0, sticky=tk.W, pady=5)
         self.port_var = tk.StringVar(value=str(self.default_port))
-        self.port_entry = ttk.Entry(main_frame, textvariable=self.port_var, width=10)
-        self.port_entry.grid(row=1, column=1, sticky=tk.W, pady=5)
+        port_frame = ttk.Frame(main_frame)
+        port_frame.grid(row=1, column=1, sticky=tk.W, pady=5)
+        self.port_entry = ttk.Entry(port_frame, textvariable=self.port_var, width=10)
+        self.port_entry.pack(side=tk.LEFT)
+        
+        # Profil mosquitto.conf yang dibuat saat start
+        ttk.Label(port_frame, text="Profile:").pack(side=tk.LEFT, padx=(15, 5))
+        self.profile_var = tk.StringVar(value=DEFAULT_PROFILE)
+        self.profile_combo = ttk.Combobox(port_frame, textvariable=self.profile_var, values=list(PROFILES),
+                                          state="readonly", width=16)
+        self.profile_combo.pack(side=tk.LEFT)
+        
+        # Pool: N instance di port berurutan (port, port+1, ...), opsional di-bridge ke instance pertama
+        ttk.Label(port_frame, text="Instances:").pack(side=tk.LEFT, padx=(15, 5))
+        self.instances_var = tk.StringVar(value="1")
+        self.instances_spin = ttk.Spinbox(port_frame, from_=1, to=os.cpu_count() or 1,
+                                          textvariable=self.instances_var, width=4)
+        self.instances_spin.pack(side=tk.LEFT)
+        self.bridge_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(port_frame, text="Bridge (one topic space)",
+                        variable=self.bridge_var).pack(side=tk.LEFT, padx=(10, 0))
         
         # Broker status
         self.status_var = tk.StringVar(value="Status: Stopped")
@@ -62,43 +111,89 @@ class MosquittoGUI:
                                         state=tk.DISABLED)
         self.restart_button.pack(side=tk.LEFT, padx=5)
         
+        self.bench_button = ttk.Button(button_frame, text="⚡ Quick Benchmark", 
+                                      command=self.run_benchmark, width=18)
+        self.bench_button.pack(side=tk.LEFT, padx=5)
+        
         # Log output
         ttk.Label(main_frame, text="Mosquitto Log:").grid(row=3, column=0, 
                                                          sticky=tk.W, pady=(10, 5))
         
         # Scrolled text for logs
-        self.log_text = scrolledtext.ScrolledText(main_frame, height=15, width=80)
+        self.log_text = scrolledtext.ScrolledText(main_frame, height=12, width=80)
         self.log_text.grid(row=4, column=0, columnspan=3, pady=(0, 10))
         
         # Configure tags for colored text
         self.log_text.tag_config("success", foreground="green")
         self.log_text.tag_config("error", foreground="red")
         self.log_text.tag_config("info", foreground="blue")
+        self.log_console = LogConsole(self.root, self.log_text, max_lines=2000)
+        ttk.Label(main_frame, textvariable=self.log_console.status,
+                  font=("Arial", 8)).grid(row=3, column=1, columnspan=2, sticky=tk.E, pady=(10, 5))
+        
+        # Trafik per client/topic dari log -v
+        traffic_frame = ttk.LabelFrame(main_frame, text="Traffic (from mosquitto -v, last 10 s)", padding=5)
+        traffic_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.traffic_label = ttk.Label(traffic_frame, text="Waiting for broker output...")
+        self.traffic_label.grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        self.client_table = VirtualTable(traffic_frame, CLIENT_COLUMNS, page_size=8,
+                                         view=self.view, font=("Helvetica", 9))
+        self.client_table.frame.grid(row=1, column=0, sticky=tk.N, padx=(0, 10))
+        self.topic_table = VirtualTable(traffic_frame, TOPIC_COLUMNS, page_size=8,
+                                        view=self.view, font=("Helvetica", 9))
+        self.topic_table.frame.grid(row=1, column=1, sticky=tk.N)
+        
+        # Status per instance dari BrokerPool (PID, restart, CPU, RSS)
+        instances_frame = ttk.LabelFrame(main_frame, text="Instances", padding=5)
+        instances_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        self.instance_table = VirtualTable(instances_frame, INSTANCE_COLUMNS, page_size=4,
+                                           view=self.view, font=("Helvetica", 9))
+        self.instance_table.frame.grid(row=0, column=0, sticky=tk.W)
+        self.root.after(1000, self.update_panels)
         
         # Auto-check if mosquitto is already running
         self.check_mosquitto_status()
         
     def check_mosquitto_status(self):
-        """Check if mosquitto is already running"""
-        for proc in psutil.process_iter(['pid', 'name']):
-            if 'mosquitto' in proc.info['name'].lower():
-                self.status_var.set("Status: Already Running")
-                self.start_button.config(state=tk.DISABLED)
-                self.stop_button.config(state=tk.NORMAL)
-                self.restart_button.config(state=tk.NORMAL)
-                self.log_message("Mosquitto already running from external process\n", "info")
-                return
+        """Check if a broker is already listening on the configured port"""
+        port = self.port_var.get()
+        pid = pid_by_port(int(port)) if port.isdigit() else None
+        if pid:
+            self.status_var.set("Status: Already Running")
+            self.start_button.config(state=tk.DISABLED)
+            self.stop_button.config(state=tk.NORMAL)
+            self.restart_button.config(state=tk.NORMAL)
+            self.log_message(f"Port {port} already served by an external process (PID: {pid})\n", "info")
+            return
         self.log_message("Ready to start Mosquitto\n", "info")
     
+    def on_broker_event(self, event):
+        if event.family == 'mosquitto':
+            verb = "started" if event.kind == 'start' else "exited"
+            self.root.after(0, self.log_message, f"[watcher] mosquitto {verb} (PID: {event.pid})\n", "info")
+    
     def log_message(self, message, tag="normal"):
         """Add message to log text widget"""
-        self.log_text.insert(tk.END, message, tag)
-        self.log_text.see(tk.END)
-        self.log_text.update()
+        self.log_console.write(message, tag)
+    
+    def update_panels(self):
+        """Refresh the traffic and instance tables once per second"""
+        snapshot = self.traffic.snapshot()
+        pool = self.pool
+        statuses = pool.snapshot() if pool else []
+        self.view.begin_tick()
+        self.view.set(self.traffic_label, text=traffic_summary(snapshot))
+        self.client_table.set_rows(client_rows(snapshot))
+        self.topic_table.set_rows(topic_rows(snapshot))
+        self.instance_table.set_rows(instance_rows(statuses))
+        self.view.end_tick()
+        if pool:
+            self.status_var.set(f"Status: {pool_summary(statuses)} ({pool.profile})")
+        self.root.after(1000, self.update_panels)
     
     def clear_log(self):
         """Clear log messages"""
-        self.log_text.delete(1.0, tk.END)
+        self.log_console.clear()
     
     def find_mosquitto_path(self):
         """Find mosquitto.exe in common locations"""
@@ -141,135 +236,206 @@ class MosquittoGUI:
         )
         return path if path else None
     
-    def kill_process_on_port(self, port):
-        """Kill process using specified port"""
-        try:
-            for conn in psutil.net_connections():
-                if conn.laddr.port == int(port) and conn.status == 'LISTEN':
-                    try:
-                        proc = psutil.Process(conn.pid)
-                        proc.terminate()
-                        proc.wait(timeout=3)
-                        self.log_message(f"Killed process {conn.pid} on port {port}\n", "info")
-                    except:
-                        pass
-        except Exception as e:
-            self.log_message(f"Error checking port {port}: {e}\n", "error")
-    
-    def start_mosquitto(self):
-        """Start mosquitto broker"""
+    def start_mosquitto(self, restart_since=None):
+        """Start the pool of mosquitto instances; ``restart_since`` is the monotonic time a restart began"""
         try:
             port = self.port_var.get()
             if not port.isdigit():
                 messagebox.showerror("Invalid Port", "Please enter a valid port number")
                 return
+            count = self.instances_var.get()
+            if not count.isdigit() or int(count) < 1:
+                messagebox.showerror("Invalid Instances", "Please enter the number of instances (1 or more)")
+                return
             
             port = int(port)
+            count = int(count)
+            ports = f"{port}" if count == 1 else f"{port}-{port + count - 1}"
             
-            # Clear previous log
             self.clear_log()
             
-            # Kill any process using the port
-            self.kill_process_on_port(port)
-            
-            # Find mosquitto.exe
             mosquitto_path = self.find_mosquitto_path()
             if not mosquitto_path:
                 messagebox.showerror("Error", "mosquitto.exe not found!")
                 return
             
-            self.log_message(f"Starting Mosquitto on port {port}...\n", "info")
-            
-            # Kill existing mosquitto processes
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'mosquitto' in proc.info['name'].lower():
-                    try:
-                        proc.kill()
-                        self.log_message(f"Stopped existing mosquitto (PID: {proc.info['pid']})\n", "info")
-                    except:
-                        pass
+            self.log_message(f"Starting {count} Mosquitto instance(s) on port {ports}...\n", "info")
             
-            # Start mosquitto
-            cmd = [mosquitto_path, '-p', str(port), '-v']
-            
-            self.mosquitto_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+            # Config per instance dari profil (listener, limit antrean, persistence, log, bridge)
+            profile = self.profile_var.get()
+            bridge = self.bridge_var.get() and count > 1
+            self.traffic = MosquittoLogParser()
+            pool = BrokerPool(
+                mosquitto_path, port, count, profile, GENERATED_DIR,
+                bridge=bridge,
+                username=os.getenv("MQTT_USERNAME") or None,
+                password=os.getenv("MQTT_PASSWORD"),
+                ready_timeout=READY_TIMEOUT,
+                on_event=lambda event: self.root.after(0, self.on_pool_event, pool, event),
+                on_output=lambda instance_port, stream: self.read_instance_output(pool, instance_port, stream)
             )
+            self.pool = pool
+            self.running_profile = profile
+            self.log_message(f"Profile '{profile}': configs in {GENERATED_DIR}\n", "info")
+            if bridge:
+                self.log_message(f"Ports {port + 1}-{port + count - 1} bridged to {port} (one topic space)\n", "info")
+            if not PROFILES[profile].verbose:
+                self.log_message("Traffic panel needs the 'verbose' profile (log_type all)\n", "info")
+            self.status_var.set(f"Status: Starting on port {ports} ({profile})")
+            # Selesai per instance saat broker benar-benar menjawab CONNECT (event 'ready')
+            self.launch_thread = threading.Thread(target=self.launch_pool,
+                                                  args=(pool, self.stop_thread, restart_since), daemon=True)
+            self.launch_thread.start()
             
-            self.log_message(f"Mosquitto started (PID: {self.mosquitto_process.pid})\n", "success")
-            self.status_var.set(f"Status: Running on port {port}")
-            
-            # Update button states
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.restart_button.config(state=tk.NORMAL)
             
-            # Start thread to read output
-            self.read_output_thread = threading.Thread(
-                target=self.read_process_output, 
-                daemon=True
-            )
-            self.read_output_thread.start()
-            
         except Exception as e:
+            self.pool = None
+            self.running_profile = None
             self.log_message(f"Error starting mosquitto: {e}\n", "error")
             messagebox.showerror("Error", f"Failed to start mosquitto:\n{str(e)}")
     
-    def read_process_output(self):
-        """Read output from mosquitto process"""
-        while self.mosquitto_process and self.mosquitto_process.poll() is None:
+    def launch_pool(self, pool, stop_thread, restart_since):
+        """Wait for the previous stop, free the pool's ports and start it (worker thread)"""
+        if stop_thread is not None:
+            stop_thread.join()
+        # Hanya proses di port milik pool; mosquitto lain di host dibiarkan jalan
+        targets = [KillTarget(pid, port, f"Port {port}", None, None)
+                   for port, pid in listening_pids(pool.ports).items() if pid]
+        if targets:
+            report = self.kill_engine.kill_now(targets, tag='free-ports')
+            self.root.after(0, self.log_message, f"Freed port(s) for the pool: {report.summary()}\n", "info")
+        try:
+            pool.start(restart_since)
+        except OSError as e:
+            self.root.after(0, self.on_pool_failed, pool, e)
+    
+    def on_pool_failed(self, pool, error):
+        """mosquitto could not be executed at all (Tk thread)"""
+        if pool is not self.pool:
+            return
+        self.pool = None
+        self.running_profile = None
+        self.log_message(f"Error starting mosquitto: {error}\n", "error")
+        self.status_var.set("Status: Stopped")
+        self.start_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+        self.restart_button.config(state=tk.DISABLED)
+        messagebox.showerror("Error", f"Failed to start mosquitto:\n{error}")
+    
+    def on_pool_event(self, pool, event):
+        """Log a pool event and record startup times (Tk thread)"""
+        if pool is not self.pool:
+            return  # pool lama yang sudah di-stop/restart
+        if event.kind == 'launched':
+            self.log_message(f"Mosquitto launched on port {event.port} (PID: {event.pid}), waiting for CONNACK...\n", "info")
+        elif event.kind in ('ready', 'not_ready'):
+            result = event.result
+            name = f"mosquitto:{event.port}/{pool.profile}"
             try:
-                output = self.mosquitto_process.stdout.readline()
-                if output:
-                    # Update GUI from main thread
-                    self.root.after(0, self.log_message, output)
-            except:
-                break
+                STARTUP_LOG.record(name, event.start_kind, event.port, result, profile=pool.profile,
+                                   instances=pool.count)
+                summary = STARTUP_LOG.summary_text(name, event.start_kind)
+            except OSError as e:
+                summary = f"Startup time not recorded: {e}"
+            if not result.ready:
+                self.log_message(f"Mosquitto on port {event.port} not ready: {result.error}\n", "error")
+                return
+            label = "Restart-to-ready" if event.start_kind == "restart" else "Cold start"
+            listen = f", listening after {result.listen_ms:.0f} ms" if result.listen_ms is not None else ""
+            self.log_message(f"Mosquitto ready on port {event.port}: {label} {result.elapsed_ms:.0f} ms{listen}\n",
+                             "success")
+            self.log_message(summary + "\n", "info")
+        elif event.kind == 'exited':
+            self.log_message(f"Mosquitto on port {event.port} (PID: {event.pid}) {event.message}\n", "error")
+        else:
+            self.log_message(f"Mosquitto on port {event.port} could not be relaunched: {event.message}\n", "error")
+    
+    def read_instance_output(self, pool, port, stream):
+        """Read output of one instance in blocks until it exits (reader thread)"""
+        # Panel trafik hanya dari instance pertama: dengan bridge semua pesan lewat sana
+        sink = self.traffic.feed if port == pool.base_port else None
+        self.log_console.pump(stream, sink=sink)
     
     def stop_mosquitto(self):
-        """Stop mosquitto broker"""
-        if self.mosquitto_process:
-            try:
-                self.mosquitto_process.terminate()
-                self.mosquitto_process.wait(timeout=5)
-                self.log_message("Mosquitto stopped\n", "info")
-            except:
-                try:
-                    self.mosquitto_process.kill()
-                    self.log_message("Mosquitto force stopped\n", "info")
-                except:
-                    pass
-            
-            self.mosquitto_process = None
-        
-        # Also kill any other mosquitto processes
-        for proc in psutil.process_iter(['pid', 'name']):
-            if 'mosquitto' in proc.info['name'].lower():
-                try:
-                    proc.kill()
-                except:
-                    pass
+        """Stop the pool's own instances, or the external broker on the port, off the Tk thread"""
+        if self.pool:
+            pool, self.pool = self.pool, None
+            self.running_profile = None
+            self.stop_thread = threading.Thread(target=self.stop_pool, args=(pool, self.launch_thread),
+                                                daemon=True)
+            self.stop_thread.start()
+        else:
+            # Broker eksternal: hanya proses yang listen di port ini
+            port = self.port_var.get()
+            pid = pid_by_port(int(port)) if port.isdigit() else None
+            if pid:
+                self.stop_thread = self.kill_engine.submit(
+                    [KillTarget(pid, int(port), f"Port {port}", None, None)], tag='stop-external',
+                    callback=lambda report: self.root.after(
+                        0, self.log_message, f"External broker on port {port}: {report.summary()}\n", "info"))
         
         self.status_var.set("Status: Stopped")
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.restart_button.config(state=tk.DISABLED)
     
+    def stop_pool(self, pool, launch_thread):
+        """Terminate the pool's processes (worker thread)"""
+        # Start yang belum selesai (masih membebaskan port) ditunggu dulu, baru di-stop
+        if launch_thread is not None:
+            launch_thread.join()
+        pool.stop()
+        self.root.after(0, self.log_message, f"Mosquitto stopped ({len(pool.ports)} instance(s))\n", "info")
+    
+    def run_benchmark(self):
+        """Quick publish/subscribe benchmark against the broker on the port"""
+        port = self.port_var.get()
+        if not port.isdigit():
+            messagebox.showerror("Invalid Port", "Please enter a valid port number")
+            return
+        
+        profile = self.running_profile or "external"
+        self.bench_button.config(state=tk.DISABLED)
+        self.log_message(f"Benchmarking port {port} ({profile}), QoS 0, 64 B...\n", "info")
+        threading.Thread(target=self._benchmark, args=(int(port), profile), daemon=True).start()
+    
+    def _benchmark(self, port, profile):
+        result = quick_benchmark("127.0.0.1", port, username=os.getenv("MQTT_USERNAME") or None,
+                                 password=os.getenv("MQTT_PASSWORD"))
+        self.root.after(0, self._benchmark_done, profile, result)
+    
+    def _benchmark_done(self, profile, result):
+        # Hasil per profil disimpan agar bisa dibandingkan setelah ganti profil + restart
+        self.bench_results[profile] = result
+        self.log_message("Benchmark results so far:\n", "info")
+        for name, entry in self.bench_results.items():
+            self.log_message(result_text(name, entry) + "\n", "error" if entry.error else "success")
+        self.bench_button.config(state=tk.NORMAL)
+    
     def restart_mosquitto(self):
         """Restart mosquitto broker"""
         self.log_message("Restarting Mosquitto...\n", "info")
+        restart_since = time.monotonic()
         self.stop_mosquitto()
-        self.root.after(1000, self.start_mosquitto)
+        # Tanpa jeda tetap: start menunggu stop_thread lalu langsung jalan, siap dideteksi lewat wait_ready
+        self.start_mosquitto(restart_since)
     
     def on_closing(self):
         """Clean up on window close"""
-        if self.mosquitto_process:
+        self.process_watcher.unsubscribe(self.on_broker_event)
+        self.log_console.close()
+        if self.pool:
             self.stop_mosquitto()
+        self.destroy_when_stopped()
+    
+    def destroy_when_stopped(self):
+        # Jendela ditutup setelah proses pool selesai dihentikan, tanpa memblok thread Tk
+        if self.stop_thread is not None and self.stop_thread.is_alive():
+            self.root.after(50, self.destroy_when_stopped)
+            return
         self.root.destroy()
 
 def main():
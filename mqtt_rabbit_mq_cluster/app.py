@@ -1,12 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, font, messagebox
-import subprocess
-import threading
-import time
-from datetime import datetime
 import sys
-import psutil
-import socket
 import os
 from dotenv import load_dotenv
 
@@ -15,22 +9,71 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(current_dir, '.env')
 load_dotenv(env_path)
 
+sys.path.insert(0, os.path.dirname(current_dir))
+from monitor_core.cluster_probe import ClusterProbeEngine, status_signature
+from monitor_core.probe_worker import ProbeError
+from monitor_core.scheduler import ProbeScheduler, ProbeTask
+from monitor_core.process_watcher import get_process_watcher
+from monitor_core.view_model import WidgetView
+from monitor_core.rabbit_mgmt import ManagementPoller, mgmt_signature
+from monitor_core.inventory import load_nodes
+from monitor_core.table_view import TableRow, VirtualTable
+from monitor_core.canary import ReplicationCanary, matrix_lines, worst_cell
+
+# (key, judul, lebar) kolom tabel node; klik judul untuk sort
+NODE_COLUMNS = (
+    ("name", "Node Name", 18), ("host", "Host", 14),
+    ("mqtt", "MQTT", 6), ("amqp", "AMQP", 6), ("mgmt", "Mgmt", 6),
+    ("status", "Status", 16), ("pid", "PID", 8),
+    ("queued", "Queued", 16), ("rates", "Pub / Deliver", 16),
+    ("memory", "Memory", 18), ("fd", "FD", 11),
+)
+TABLE_ROWS = 12
+# Matrix canary dirender sekali per detik (probe tetap jalan di thread sendiri)
+CANARY_FRAME_MS = 1000
+
 class RabbitMQClusterMonitorGUI:
-    def __init__(self, root):
+    def __init__(self, root, inventory=None):
         self.root = root
         self.root.title("RabbitMQ Cluster Monitor - HA Plan A")
-        self.root.geometry("800x700")
+        self.root.geometry("1280x900")
         
-        # Configuration from Plan A
-        self.nodes = [
-            {"name": "Node 1 (Master)", "mqtt_port": 1883, "amqp_port": 5672, "mgmt_port": 15672, "host": "localhost"},
-            {"name": "Node 2 (Slave)",  "mqtt_port": 1884, "amqp_port": 5673, "mgmt_port": 15673, "host": "localhost"},
-            {"name": "Node 3 (Slave)",  "mqtt_port": 1885, "amqp_port": 5674, "mgmt_port": 15674, "host": "localhost"}
-        ]
+        # Node dari inventory (file / CLUSTER_NODES), default Plan A
+        self.nodes = load_nodes(inventory)
         
+        # Cache state widget: render hanya memanggil Tk untuk yang berubah
+        self.view = WidgetView()
+        self.last_status = None
+        self.last_mgmt = None
+        self.canary = None
+        self.canary_version = None
         self.setup_gui()
         
+        # Semua node/port diprobe bersamaan di thread worker, Tk hanya render
+        self.probe_engine = ClusterProbeEngine(
+            self.nodes, deadline=1.0,
+            username=os.getenv("MQTT_USERNAME") or None,
+            password=os.getenv("MQTT_PASSWORD"))
+        # Interval 1-10 s: mundur saat cluster stabil, rapat lagi setelah ada perubahan
+        self.probe_task = ProbeTask('cluster', self.probe_engine.probe, 1.0, 10.0,
+                                    signature=status_signature)
+        # Management API: overview/nodes/queues tiap node lewat koneksi keep-alive
+        self.mgmt_poller = ManagementPoller(
+            self.nodes,
+            username=os.getenv("RABBITMQ_USERNAME") or "guest",
+            password=os.getenv("RABBITMQ_PASSWORD") or "guest")
+        self.mgmt_task = ProbeTask('mgmt', self.mgmt_poller.poll, 2.0, 15.0,
+                                   signature=mgmt_signature)
+        self.probe_worker = ProbeScheduler([self.probe_task, self.mgmt_task],
+                                           lambda values: (values['cluster'], values['mgmt']),
+                                           name="cluster-probe")
+        
+        # beam.smp/erl start atau exit langsung memicu probe
+        self.process_watcher = get_process_watcher()
+        self.process_watcher.subscribe(self.on_broker_event)
+        
         self.running = True
+        self.probe_worker.start()
         self.update_status()
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -47,40 +90,11 @@ class RabbitMQClusterMonitorGUI:
         self.cluster_frame = tk.LabelFrame(self.root, text="Cluster Node Status", font=header_font, padx=10, pady=10)
         self.cluster_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         
-        # Headers
-        headers = ["Node Name", "MQTT Port", "AMQP Port", "Mgmt Port", "Status", "PID"]
-        for i, h in enumerate(headers):
-            tk.Label(self.cluster_frame, text=h, font=("Helvetica", 10, "bold")).grid(row=0, column=i, padx=10, pady=5, sticky="w")
-        
-        # Node Rows
-        self.node_labels = []
-        for i, node in enumerate(self.nodes):
-            row_labels = {}
-            
-            # Name
-            tk.Label(self.cluster_frame, text=node["name"], font=status_font).grid(row=i+1, column=0, padx=10, pady=5, sticky="w")
-            
-            # MQTT Port
-            row_labels["mqtt"] = tk.Label(self.cluster_frame, text=f"{node['mqtt_port']}", font=status_font)
-            row_labels["mqtt"].grid(row=i+1, column=1, padx=10, pady=5)
-            
-            # AMQP Port
-            row_labels["amqp"] = tk.Label(self.cluster_frame, text=f"{node['amqp_port']}", font=status_font)
-            row_labels["amqp"].grid(row=i+1, column=2, padx=10, pady=5)
-            
-            # Mgmt Port
-            row_labels["mgmt"] = tk.Label(self.cluster_frame, text=f"{node['mgmt_port']}", font=status_font)
-            row_labels["mgmt"].grid(row=i+1, column=3, padx=10, pady=5)
-            
-            # Status
-            row_labels["status"] = tk.Label(self.cluster_frame, text="Checking...", font=status_font, fg="gray")
-            row_labels["status"].grid(row=i+1, column=4, padx=10, pady=5)
-            
-            # PID
-            row_labels["pid"] = tk.Label(self.cluster_frame, text="--", font=status_font)
-            row_labels["pid"].grid(row=i+1, column=5, padx=10, pady=5)
-            
-            self.node_labels.append(row_labels)
+        # Hanya TABLE_ROWS baris yang dirender; sisanya lewat scroll
+        self.node_table = VirtualTable(self.cluster_frame, NODE_COLUMNS, page_size=TABLE_ROWS,
+                                       view=self.view, font=("Helvetica", 10))
+        self.node_table.pack(fill=tk.BOTH, expand=True)
+        self.node_table.set_rows(self.node_rows())
             
         # Summary Section
         summary_frame = tk.Frame(self.root, relief=tk.RAISED, borderwidth=2)
@@ -92,91 +106,204 @@ class RabbitMQClusterMonitorGUI:
         self.overall_status = tk.Label(summary_frame, text="Cluster Health: CHECKING", font=("Helvetica", 14, "bold"))
         self.overall_status.pack(pady=10)
         
+        self.queues_label = tk.Label(summary_frame, text="Top queues: --", font=("Courier", 9), justify=tk.LEFT)
+        self.queues_label.pack(pady=(0, 5))
+        
+        # Replication canary: latency publish node A -> subscriber node B
+        canary_frame = tk.LabelFrame(self.root, text="Replication Canary (p50/p99 ms, loss)", font=header_font,
+                                     padx=10, pady=5)
+        canary_frame.pack(fill=tk.X, padx=20, pady=5)
+        self.canary_label = tk.Label(canary_frame, text="Canary off - press Start Canary",
+                                     font=("Courier", 9), justify=tk.LEFT, anchor="w")
+        self.canary_label.pack(fill=tk.X)
+        
         # Controls
         btn_frame = tk.Frame(self.root)
         btn_frame.pack(pady=10)
         
-        tk.Button(btn_frame, text="Refresh Now", command=self.update_status, bg="lightblue").pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Refresh Now", command=self.force_refresh, bg="lightblue").pack(side=tk.LEFT, padx=5)
+        self.canary_button = tk.Button(btn_frame, text="Start Canary", command=self.toggle_canary)
+        self.canary_button.pack(side=tk.LEFT, padx=5)
         
         # Status Bar
         self.status_bar = tk.Label(self.root, text="Monitoring started...", bd=1, relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-    def check_port(self, host, port):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.5)
-            result = sock.connect_ex((host, port))
-            sock.close()
-            return result == 0
-        except:
-            return False
-
-    def get_pid_by_port(self, port):
-        try:
-            for conn in psutil.net_connections(kind='inet'):
-                if hasattr(conn.laddr, 'port') and conn.laddr.port == port and conn.status == 'LISTEN':
-                    return conn.pid
-        except:
-            pass
-        return None
-
     def update_status(self):
+        """Drain the probe queue and render the newest ClusterStatus (Tk thread)"""
         if not self.running:
             return
-            
-        active_nodes = 0
-        current_time = datetime.now().strftime("%H:%M:%S")
-        self.time_label.config(text=f"Last check: {current_time}")
         
-        for i, node in enumerate(self.nodes):
-            labels = self.node_labels[i]
-            
-            # Check MQTT Port
-            mqtt_active = self.check_port(node["host"], node["mqtt_port"])
-            pid = self.get_pid_by_port(node["mqtt_port"])
-            
-            # Update UI
-            if mqtt_active:
-                active_nodes += 1
-                labels["status"].config(text="ONLINE", fg="green", font=("Helvetica", 10, "bold"))
-                labels["mqtt"].config(fg="green")
-                labels["pid"].config(text=str(pid) if pid else "Unknown")
-            else:
-                labels["status"].config(text="OFFLINE", fg="red")
-                labels["mqtt"].config(fg="red")
-                labels["pid"].config(text="--")
-                
-            # Check other ports just for color
-            if self.check_port(node["host"], node["amqp_port"]):
-                labels["amqp"].config(fg="green")
+        result = self.probe_worker.drain()
+        if result is not None:
+            self.view.begin_tick()
+            if isinstance(result, ProbeError):
+                self.view.set(self.status_bar, text=f"Error: {result.message[:50]}...")
             else:
-                labels["amqp"].config(fg="red")
-                
-            if self.check_port(node["host"], node["mgmt_port"]):
-                labels["mgmt"].config(fg="green")
-            else:
-                labels["mgmt"].config(fg="red")
+                status, mgmt = result
+                if mgmt is not None:
+                    self.render_mgmt(mgmt)
+                if status is not None:
+                    self.render_status(status)
+                self.node_table.set_rows(self.node_rows())
+            self.view.end_tick()
+        
+        self.root.after(100, self.update_status)
+
+    def render_status(self, status):
+        active_nodes = status.active_nodes
+        self.last_status = status
+        self.view.set(self.time_label, text=f"Last check: {status.checked_at}")
 
         # Overall Status
         if active_nodes == len(self.nodes):
-            self.overall_status.config(text=f"Cluster Health: HEALTHY ({active_nodes}/{len(self.nodes)} Nodes)", fg="green")
+            self.view.set(self.overall_status, text=f"Cluster Health: HEALTHY ({active_nodes}/{len(self.nodes)} Nodes)", fg="green")
         elif active_nodes > 0:
-             self.overall_status.config(text=f"Cluster Health: DEGRADED ({active_nodes}/{len(self.nodes)} Nodes)", fg="orange")
+             self.view.set(self.overall_status, text=f"Cluster Health: DEGRADED ({active_nodes}/{len(self.nodes)} Nodes)", fg="orange")
         else:
-             self.overall_status.config(text="Cluster Health: DOWN", fg="red")
+             self.view.set(self.overall_status, text="Cluster Health: DOWN", fg="red")
              
-        self.status_bar.config(text=f"Updated: {current_time} | Active Nodes: {active_nodes}")
+        erlang_vms = len(self.process_watcher.running('rabbitmq'))
+        self.view.set(self.status_bar, text=f"Updated: {status.checked_at} | Active Nodes: {active_nodes}/{len(self.nodes)} | "
+                                    f"Erlang VMs: {erlang_vms} | "
+                                    f"Probe: {status.elapsed_ms:.0f} ms ({status.timed_out} timed out), "
+                                    f"every {self.probe_task.interval:.1f}s | {self.mgmt_text()} | "
+                                    f"{self.view.stats_text()}")
+
+    def mgmt_text(self):
+        mgmt = self.last_mgmt
+        if mgmt is None:
+            return "Mgmt API: --"
+        return (f"Mgmt API: {mgmt.elapsed_ms:.0f} ms, {mgmt.response_bytes // max(mgmt.requests, 1)} B/resp, "
+                f"{mgmt.connections_opened} conns, every {self.mgmt_task.interval:.1f}s")
+
+    def render_mgmt(self, mgmt):
+        if mgmt.top_queues:
+            lines = [f"{q.messages:>7}  {q.name[:40]:<40} {q.node or ''}" for q in mgmt.top_queues]
+            self.view.set(self.queues_label, text="Top queues:\n" + "\n".join(lines))
+        else:
+            unreachable = [node.error for node in mgmt.nodes if node.error]
+            self.view.set(self.queues_label,
+                          text=f"Top queues: -- ({unreachable[0][:60]})" if unreachable else "Top queues: (none)")
+        self.last_mgmt = mgmt
+
+    def node_rows(self):
+        """One TableRow per inventory node from the last probe and mgmt results"""
+        statuses = self.last_status.nodes if self.last_status is not None else ()
+        stats = self.last_mgmt.nodes if self.last_mgmt is not None else ()
+        rows = []
+        for i, node in enumerate(self.nodes):
+            status = statuses[i] if i < len(statuses) else None
+            mgmt = stats[i] if i < len(stats) else None
+            cells = [(node["name"], "black"), (node["host"], "black")]
+            sort = [node["name"], node["host"], node["mqtt_port"], node["amqp_port"], node["mgmt_port"]]
+            
+            if status is None:
+                cells += [(str(node["mqtt_port"]), "black"), (str(node["amqp_port"]), "black"),
+                          (str(node["mgmt_port"]), "black"), ("Checking...", "gray"), ("--", "black")]
+                sort += [None, None]
+            else:
+                handshake = status.mqtt
+                online = handshake.is_mqtt
+                cells += [(str(node["mqtt_port"]), "green" if online else "red"),
+                          (str(node["amqp_port"]), "green" if status.amqp_open else "red"),
+                          (str(node["mgmt_port"]), "green" if status.mgmt_open else "red")]
+                if online:
+                    cells.append((f"ONLINE {handshake.latency_us / 1000:.1f} ms",
+                                  "green" if handshake.accepted else "orange"))
+                    cells.append((str(status.pid) if status.pid else "Unknown", "black"))
+                    sort += [handshake.latency_us, status.pid]
+                else:
+                    cells += [("OFFLINE", "red"), ("--", "black")]
+                    # Node offline paling atas saat sort Status
+                    sort += [-1, None]
+            
+            cells += self.mgmt_cells(mgmt)
+            if mgmt is not None and mgmt.reachable:
+                sort += [mgmt.messages, mgmt.publish_rate + mgmt.deliver_rate, mgmt.mem_used, mgmt.fd_used]
+            else:
+                sort += [None, None, None, None]
+            rows.append(TableRow(node["name"], tuple(cells), tuple(sort)))
+        return rows
+
+    def mgmt_cells(self, node):
+        """Queued / rates / memory / FD cells of one MgmtNodeStats"""
+        if node is None or not node.reachable:
+            return [("--", "gray")] * 4
+        cells = [(f"{node.messages} ({node.messages_unacked} unack)", "black"),
+                 (f"{node.publish_rate:.1f} / {node.deliver_rate:.1f} /s", "black")]
+        if node.mem_used is not None and node.mem_limit:
+            alarm = " ALARM" if node.mem_alarm else ""
+            cells.append((f"{node.mem_used / 1_048_576:.0f}/{node.mem_limit / 1_048_576:.0f} MB{alarm}",
+                          "red" if node.mem_alarm or node.disk_alarm else "black"))
+        else:
+            cells.append(("--", "gray"))
+        if node.fd_used is not None and node.fd_total:
+            ratio = node.fd_used / node.fd_total
+            cells.append((f"{node.fd_used}/{node.fd_total}",
+                          "red" if ratio > 0.9 else "orange" if ratio > 0.75 else "black"))
+        else:
+            cells.append(("--", "gray"))
+        return cells
+
+    def toggle_canary(self):
+        """Start/stop one MQTT client per node publishing and subscribing probes"""
+        if self.canary is not None:
+            self.canary.stop()
+            self.canary = None
+            self.view.set(self.canary_button, text="Start Canary")
+            self.view.set(self.canary_label, text="Canary off - press Start Canary", fg="black")
+            return
         
-        self.root.after(3000, self.update_status)
+        self.canary = ReplicationCanary(
+            self.nodes,
+            username=os.getenv("MQTT_USERNAME") or None,
+            password=os.getenv("MQTT_PASSWORD"))
+        self.canary.start()
+        self.canary_version = None
+        self.view.set(self.canary_button, text="Stop Canary")
+        self.view.set(self.canary_label, text="Canary starting...", fg="gray")
+        self.root.after(CANARY_FRAME_MS, self.update_canary)
+
+    def update_canary(self):
+        canary = self.canary
+        if not self.running or canary is None:
+            return
+        if canary.version != self.canary_version:
+            snapshot = canary.snapshot()
+            self.canary_version = snapshot.version
+            lines = matrix_lines(snapshot)
+            down = [f"{name}: {error or 'connecting'}" for name, connected, error
+                    in zip(snapshot.names, snapshot.connected, snapshot.errors) if not connected]
+            if down:
+                lines.append(f"Not subscribed: {'; '.join(down[:3])[:150]}")
+            loss, p99 = worst_cell(snapshot)
+            self.view.set(self.canary_label, text="\n".join(lines),
+                          fg="red" if loss > 0 or down else "orange" if p99 > 100 else "black")
+        self.root.after(CANARY_FRAME_MS, self.update_canary)
+
+    def on_broker_event(self, event):
+        if event.family == 'rabbitmq':
+            self.probe_worker.trigger()
+
+    def force_refresh(self):
+        self.view.set(self.status_bar, text="Manual refresh triggered...")
+        self.probe_worker.trigger()
 
     def on_closing(self):
         self.running = False
+        self.process_watcher.unsubscribe(self.on_broker_event)
+        self.probe_worker.stop()
+        self.mgmt_poller.close()
+        if self.canary is not None:
+            self.canary.stop()
         self.root.destroy()
 
 def main():
+    # Opsional: python app.py path/ke/inventory.json
+    inventory = sys.argv[1] if len(sys.argv) > 1 else None
     root = tk.Tk()
-    app = RabbitMQClusterMonitorGUI(root)
+    app = RabbitMQClusterMonitorGUI(root, inventory)
     root.mainloop()
 
 if __name__ == "__main__":
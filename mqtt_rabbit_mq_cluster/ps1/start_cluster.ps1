@@ -57,6 +57,26 @@ New-Item -ItemType Directory -Force -Path $BaseDir3 | Out-Null
 
 Write-Host "Data Directories created at $AppData\RabbitMQ_Node*" -ForegroundColor Gray
 
+# --- READINESS ---
+# Menunggu sampai listener MQTT menjawab CONNACK (bukan sleep tetap) dan
+# mencatat waktu cold start per node ke STARTUP_LOG
+$Python = if ($env:PYTHON) { $env:PYTHON } else { "python" }
+$StartupLog = if ($env:STARTUP_LOG) { $env:STARTUP_LOG } else { "$AppData\RabbitMQ_startup_times.jsonl" }
+
+function Wait-Ready($Name, $Port, $Since) {
+    Push-Location $RepoRoot
+    # Output ke host; kalau tidak, ikut jadi nilai return fungsi
+    & $Python -m monitor_core.readiness --port $Port --timeout 90 --since $Since --record $StartupLog --name $Name --kind cold | Write-Host
+    $ok = ($LASTEXITCODE -eq 0)
+    Pop-Location
+    return $ok
+}
+
+function Get-EpochNow {
+    # Titik desimal, apa pun locale Windows
+    return ([DateTimeOffset]::UtcNow.ToUnixTimeMilliseconds() / 1000.0).ToString([Globalization.CultureInfo]::InvariantCulture)
+}
+
 # --- START NODE 1 (MASTER) ---
 # Reset Env for Node 1
 $Env:RABBITMQ_NODENAME = $Node1_Name
@@ -66,10 +86,14 @@ $Env:RABBITMQ_BASE = $BaseDir1
 $Env:RABBITMQ_SERVER_START_ARGS = "-rabbitmq_management listener [{port,15672}] -rabbitmq_mqtt tcp_listeners [1883]"
 
 Write-Host "Starting Node 1..." -ForegroundColor Green
+$Node1_Start = Get-EpochNow
 Start-Process "cmd.exe" -ArgumentList "/c `"$RabbitServerCmd`"" -WindowStyle Minimized
 
-Write-Host "Waiting 10s for Node 1 to initialize..." -ForegroundColor Yellow
-Start-Sleep -Seconds 10
+Write-Host "Waiting for Node 1 to serve MQTT..." -ForegroundColor Yellow
+if (-not (Wait-Ready $Node1_Name 1883 $Node1_Start)) {
+    Write-Host "ERROR: Node 1 did not become ready." -ForegroundColor Red
+    exit 1
+}
 
 # --- START NODE 2 ---
 $Env:RABBITMQ_NODENAME = $Node2_Name
@@ -79,6 +103,7 @@ $Env:RABBITMQ_BASE = $BaseDir2
 $Env:RABBITMQ_SERVER_START_ARGS = "-rabbitmq_management listener [{port,15673}] -rabbitmq_mqtt tcp_listeners [1884]"
 
 Write-Host "Starting Node 2..." -ForegroundColor Green
+$Node2_Start = Get-EpochNow
 Start-Process "cmd.exe" -ArgumentList "/c `"$RabbitServerCmd`"" -WindowStyle Minimized
 
 # --- START NODE 3 ---
@@ -89,10 +114,18 @@ $Env:RABBITMQ_BASE = $BaseDir3
 $Env:RABBITMQ_SERVER_START_ARGS = "-rabbitmq_management listener [{port,15674}] -rabbitmq_mqtt tcp_listeners [1885]"
 
 Write-Host "Starting Node 3..." -ForegroundColor Green
+$Node3_Start = Get-EpochNow
 Start-Process "cmd.exe" -ArgumentList "/c `"$RabbitServerCmd`"" -WindowStyle Minimized
 
-Write-Host "Waiting 15s for nodes to fully start..." -ForegroundColor Yellow
-Start-Sleep -Seconds 15
+Write-Host "Waiting for Node 2 and Node 3 to serve MQTT..." -ForegroundColor Yellow
+if (-not (Wait-Ready $Node2_Name 1884 $Node2_Start)) {
+    Write-Host "ERROR: Node 2 did not become ready." -ForegroundColor Red
+    exit 1
+}
+if (-not (Wait-Ready $Node3_Name 1885 $Node3_Start)) {
+    Write-Host "ERROR: Node 3 did not become ready." -ForegroundColor Red
+    exit 1
+}
 
 # --- CLUSTERING ---
 Write-Host "Joining Nodes to Cluster..." -ForegroundColor Cyan
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import subprocess
 import threading
+import time
 import psutil
 import os
 import sys
@@ -12,12 +13,22 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(current_dir, '.env')
 load_dotenv(env_path)
 
+sys.path.insert(0, os.path.dirname(current_dir))
+from monitor_core.inventory import load_nodes
+from monitor_core.log_console import LogConsole
+from monitor_core.readiness import StartupLog
+
+# start_cluster menulis waktu cold start per node ke sini (monitor_core.readiness)
+STARTUP_LOG = StartupLog(os.path.join(current_dir, 'generated', 'startup_times.jsonl'))
+
 class RabbitMQControllerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("RabbitMQ Cluster Controller - HA Plan A")
         self.root.geometry("800x600")
         
+        self.nodes = load_nodes()
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -33,9 +44,14 @@ class RabbitMQControllerGUI:
         info_frame = ttk.LabelFrame(main_frame, text="Cluster Information", padding=10)
         info_frame.grid(row=1, column=0, columnspan=3, sticky="ew", pady=5)
         
-        ttk.Label(info_frame, text="Nodes: 3 (1 Master, 2 Slaves)").pack(anchor="w")
-        ttk.Label(info_frame, text="Ports: 1883, 1884, 1885 (MQTT)").pack(anchor="w")
-        ttk.Label(info_frame, text="Mode: Localhost Simulation").pack(anchor="w")
+        hosts = sorted({node["host"] for node in self.nodes})
+        mqtt_ports = ", ".join(str(node["mqtt_port"]) for node in self.nodes[:6])
+        if len(self.nodes) > 6:
+            mqtt_ports += f", ... (+{len(self.nodes) - 6})"
+        ttk.Label(info_frame, text=f"Nodes: {len(self.nodes)}").pack(anchor="w")
+        ttk.Label(info_frame, text=f"Ports: {mqtt_ports} (MQTT)").pack(anchor="w")
+        mode = "Localhost Simulation" if hosts == ["localhost"] else f"{len(hosts)} host(s)"
+        ttk.Label(info_frame, text=f"Mode: {mode}").pack(anchor="w")
         
         # Control Buttons
         button_frame = ttk.Frame(main_frame)
@@ -62,10 +78,12 @@ class RabbitMQControllerGUI:
         self.log_text.tag_config("info", foreground="blue")
         self.log_text.tag_config("error", foreground="red")
         self.log_text.tag_config("success", foreground="green")
+        self.log_console = LogConsole(self.root, self.log_text, max_lines=2000)
+        ttk.Label(main_frame, textvariable=self.log_console.status,
+                  font=("Arial", 8)).grid(row=3, column=1, columnspan=2, sticky=tk.E, pady=(10, 5))
 
     def log(self, message, tag="info"):
-        self.log_text.insert(tk.END, f"{message}\n", tag)
-        self.log_text.see(tk.END)
+        self.log_console.write(message, tag)
 
     def run_script(self, script_name):
         # Determine OS and script type
@@ -99,27 +117,40 @@ class RabbitMQControllerGUI:
                     subprocess.run(["chmod", "+x", script_path])
                     cmd = ["/bin/bash", script_path]
 
+                started = time.time()
+                # Skrip memanggil python -m monitor_core.readiness untuk menunggu node siap
+                env = dict(os.environ, PYTHON=sys.executable, STARTUP_LOG=STARTUP_LOG.path)
                 process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
-                    text=True,
+                    env=env,
                     creationflags=subprocess.CREATE_NO_WINDOW if is_windows else 0
                 )
                 
-                for line in process.stdout:
-                    self.root.after(0, self.log, line.strip(), "info")
+                # Dibaca per blok; GUI menampilkan batch tiap flush, bukan per baris
+                self.log_console.pump(process.stdout, "info")
                     
                 process.wait()
                 if process.returncode == 0:
-                    self.root.after(0, self.log, "Execution completed successfully.", "success")
+                    self.log("Execution completed successfully.", "success")
+                    self.log_startup_times(started)
                 else:
-                    self.root.after(0, self.log, f"Execution failed with code {process.returncode}", "error")
+                    self.log(f"Execution failed with code {process.returncode}", "error")
             except Exception as e:
-                self.root.after(0, self.log, f"Error running script: {e}", "error")
+                self.log(f"Error running script: {e}", "error")
 
         threading.Thread(target=_run, daemon=True).start()
 
+    def log_startup_times(self, since):
+        """Summarize the node start times the script recorded since ``since``"""
+        names = []
+        for entry in STARTUP_LOG.load():
+            if entry.get("time", 0) >= since and entry.get("name") not in names:
+                names.append(entry.get("name"))
+        for name in names:
+            self.log(STARTUP_LOG.summary_text(name, "cold"), "info")
+
     def start_cluster(self):
         self.run_script("start_cluster.ps1") # Will be converted to .sh on Linux
 
@@ -3,6 +3,7 @@ from tkinter import ttk, scrolledtext, messagebox
 import paho.mqtt.client as mqtt
 import time
 import os
+import sys
 import threading
 from dotenv import load_dotenv
 
@@ -11,18 +12,17 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(current_dir, '.env')
 load_dotenv(env_path)
 
+sys.path.insert(0, os.path.dirname(current_dir))
+from monitor_core.inventory import load_nodes, mqtt_brokers
+
 class RabbitMQSubscriberHA:
     def __init__(self, root):
         self.root = root
         self.root.title("RabbitMQ Subscriber (HA - Smart Client)")
         self.root.geometry("700x550")
         
-        # HA Configuration
-        self.brokers = [
-            {"host": "localhost", "port": 1883},
-            {"host": "localhost", "port": 1884},
-            {"host": "localhost", "port": 1885}
-        ]
+        # HA Configuration: daftar broker dari inventory cluster (default Plan A)
+        self.brokers = mqtt_brokers(load_nodes())
         self.current_broker_index = 0
         self.client = None
         self.is_connected = False
@@ -18,6 +18,19 @@ mkdir -p "$BASE_DIR/node3"
 
 echo "Data Directories created at $BASE_DIR"
 
+# --- READINESS ---
+# Menunggu sampai listener MQTT menjawab CONNACK (bukan sleep tetap) dan
+# mencatat waktu cold start per node ke STARTUP_LOG
+REPO_ROOT="$(cd "$(dirname "$0")/../.." && pwd)"
+PYTHON="${PYTHON:-python3}"
+STARTUP_LOG="${STARTUP_LOG:-$BASE_DIR/startup_times.jsonl}"
+
+wait_ready() {
+    # wait_ready <node name> <mqtt port> <epoch saat start>
+    (cd "$REPO_ROOT" && "$PYTHON" -m monitor_core.readiness --port "$2" --timeout 90 \
+        --since "$3" --record "$STARTUP_LOG" --name "$1" --kind cold)
+}
+
 # Check for rabbitmq-server
 if ! command -v rabbitmq-server &> /dev/null; then
     echo "ERROR: rabbitmq-server could not be found."
@@ -34,10 +47,14 @@ export RABBITMQ_BASE="$BASE_DIR/node1"
 export RABBITMQ_SERVER_START_ARGS="-rabbitmq_management listener [{port,15672}] -rabbitmq_mqtt tcp_listeners [1883]"
 export RABBITMQ_PID_FILE="$BASE_DIR/node1.pid"
 
+NODE1_START=$(date +%s.%N)
 rabbitmq-server -detached
 
-echo "Waiting 10s for Node 1 to initialize..."
-sleep 10
+echo "Waiting for Node 1 to serve MQTT..."
+if ! wait_ready "$NODE1_NAME" 1883 "$NODE1_START"; then
+    echo "ERROR: Node 1 did not become ready."
+    exit 1
+fi
 
 # --- START NODE 2 ---
 echo "Starting Node 2..."
@@ -48,6 +65,7 @@ export RABBITMQ_BASE="$BASE_DIR/node2"
 export RABBITMQ_SERVER_START_ARGS="-rabbitmq_management listener [{port,15673}] -rabbitmq_mqtt tcp_listeners [1884]"
 export RABBITMQ_PID_FILE="$BASE_DIR/node2.pid"
 
+NODE2_START=$(date +%s.%N)
 rabbitmq-server -detached
 
 # --- START NODE 3 ---
@@ -59,10 +77,12 @@ export RABBITMQ_BASE="$BASE_DIR/node3"
 export RABBITMQ_SERVER_START_ARGS="-rabbitmq_management listener [{port,15674}] -rabbitmq_mqtt tcp_listeners [1885]"
 export RABBITMQ_PID_FILE="$BASE_DIR/node3.pid"
 
+NODE3_START=$(date +%s.%N)
 rabbitmq-server -detached
 
-echo "Waiting 15s for nodes to fully start..."
-sleep 15
+echo "Waiting for Node 2 and Node 3 to serve MQTT..."
+wait_ready "$NODE2_NAME" 1884 "$NODE2_START" || { echo "ERROR: Node 2 did not become ready."; exit 1; }
+wait_ready "$NODE3_NAME" 1885 "$NODE3_START" || { echo "ERROR: Node 3 did not become ready."; exit 1; }
 
 # --- CLUSTERING ---
 echo "Joining Nodes to Cluster..."
@@ -0,0 +1,110 @@
+"""Benchmark: push agents publishing deltas vs central polling.
+
+    python tools/bench_fleet.py --hosts 200 --keys 20 --seconds 20
+    python tools/bench_fleet.py --hosts 50 --loss 0.05 --heartbeat 3   # lost deltas -> resync
+
+Starts the fake broker (tools/fake_mqtt_cluster.py) as the stand-in
+central broker, ``--hosts`` HostAgents with synthetic collectors, where
+one of ``--keys`` values changes on each host every ``--change-every``
+seconds, and one FleetAggregator. It reports what the central side
+received, compared with polling every key of every host each interval.
+At the end it checks that the aggregated view equals every agent's
+state, and that a killed agent shows up offline through its last will.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_mqtt_cluster import FakeCluster, serve
+from monitor_core.agent import FleetAggregator, HostAgent
+
+
+class SyntheticHost:
+    """Collector with ``keys`` stable values, one of which changes now and then"""
+
+    def __init__(self, keys, change_every):
+        self.state = {f"port/{1883 + i}": [1000 + i, "mosquitto"] for i in range(keys - 2)}
+        self.state["host/cpu"] = 10
+        self.state["host/mem"] = 40
+        self.change_every = change_every
+        self.next_change = time.monotonic() + random.uniform(0, change_every)
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        now = time.monotonic()
+        with self.lock:
+            if now >= self.next_change:
+                self.next_change = now + self.change_every
+                self.state["host/cpu"] = random.choice([5, 10, 15, 20, 25])
+            return dict(self.state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=24883)
+    parser.add_argument('--hosts', type=int, default=200)
+    parser.add_argument('--keys', type=int, default=20)
+    parser.add_argument('--change-every', type=float, default=10.0)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--heartbeat', type=float, default=30.0)
+    parser.add_argument('--loss', type=float, default=0.0, help='fraction of messages the broker drops')
+    args = parser.parse_args()
+
+    cluster = FakeCluster(losses={(0, 0): args.loss} if args.loss else None)
+    serve(cluster, [args.port])
+
+    fleet = FleetAggregator("127.0.0.1", args.port)
+    fleet.start()
+    hosts = [SyntheticHost(args.keys, args.change_every) for _ in range(args.hosts)]
+    agents = [HostAgent("127.0.0.1", args.port, f"host{i:04d}", collect=host, keyframe=3600,
+                        heartbeat=args.heartbeat)
+              for i, host in enumerate(hosts)]
+    for agent in agents:
+        agent.start()
+
+    time.sleep(2.0)     # semua agent terhubung dan state penuh pertama terkirim
+    received = fleet.link.messages_received
+    received_bytes = fleet.link.bytes_received
+    start = time.monotonic()
+    time.sleep(args.seconds)
+    elapsed = time.monotonic() - start
+    rate = (fleet.link.messages_received - received) / elapsed
+    byte_rate = (fleet.link.bytes_received - received_bytes) / elapsed
+
+    polled = args.hosts * args.keys
+    print(f"{args.hosts} hosts x {args.keys} keys, one change per host every {args.change_every:.0f} s")
+    print(f"push:  {rate:.1f} msgs/s, {byte_rate:.0f} B/s at the aggregator "
+          f"(hosts change ~{args.hosts / args.change_every:.1f}/s; a host quiet for "
+          f"{args.heartbeat:.0f} s adds one heartbeat)")
+    print(f"poll:  {polled} probes/s to read every key of every host once per second")
+    print(fleet.stats_text())
+
+    # Biarkan resync yang tertunda selesai, lalu bandingkan
+    for host in hosts:
+        with host.lock:
+            host.next_change = float('inf')
+    time.sleep(args.heartbeat + FleetAggregator.RESYNC_EVERY + 2.0 if args.loss else 3.0)
+    view = fleet.snapshot()
+    mismatched = [agent.host_id for agent, host in zip(agents, hosts)
+                  if view.get(agent.host_id) is None or view[agent.host_id].state != host.state]
+    stale = [name for name, entry in view.items() if entry.stale]
+    print(f"view check: {len(view)} hosts, {len(mismatched)} mismatched, {len(stale)} stale")
+
+    # Agent mati tanpa DISCONNECT -> last will menandai offline
+    victim = agents[0]
+    victim._stop.set()
+    victim.link.sock.close()
+    time.sleep(1.0)
+    print(f"killed {victim.host_id}: online={fleet.snapshot()[victim.host_id].online}")
+
+    for agent in agents[1:]:
+        agent.stop(timeout=0)
+    fleet.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark: how fast a new LISTEN socket is noticed (and killed).
+
+    python tools/bench_listen_reaction.py --count 50
+    python tools/bench_listen_reaction.py --count 20 --kill
+    python tools/bench_listen_reaction.py --interval 1.0     # old 1 s polling
+
+Detect mode opens listeners in this process and measures listen() ->
+ListenerWatcher 'open' event. Kill mode starts child processes that
+listen on a port, and the watcher + KillEngine terminate them; it
+measures the child's listen() -> port released (time.monotonic is
+system-wide, so the child's timestamp can be compared directly) and how
+long kill_now() holds the caller (the release arrives later as a
+PortRelease from drain()).
+"""
+import argparse
+import os
+import queue
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.kill_engine import KillEngine, KillTarget, PortRelease
+from monitor_core.listen_watcher import ListenerWatcher
+from monitor_core.port_snapshot import PortSnapshotService
+
+CHILD = """
+import socket, sys, time
+s = socket.socket()
+s.bind(('127.0.0.1', 0))
+s.listen()
+print(s.getsockname()[1], repr(time.monotonic()), flush=True)
+time.sleep(30)
+"""
+
+
+def report(label, samples_ms):
+    if not samples_ms:
+        print(f"{label}: no samples")
+        return
+    samples_ms = sorted(samples_ms)
+    p50 = samples_ms[len(samples_ms) // 2]
+    p99 = samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.99))]
+    print(f"{label}: n={len(samples_ms)}  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  max {samples_ms[-1]:7.1f} ms")
+
+
+def bench_detect(watcher, count):
+    opened = {}
+    seen = queue.Queue()
+
+    def on_events(events):
+        for event in events:
+            if event.kind == 'open' and event.port in opened:
+                seen.put((event.port, time.monotonic()))
+
+    watcher.subscribe(on_events)
+    samples = []
+    for _ in range(count):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        opened[port] = time.monotonic()
+        sock.listen()
+        try:
+            got_port, at = seen.get(timeout=max(2.0, watcher.interval * 3))
+            samples.append((at - opened[got_port]) * 1000.0)
+        except queue.Empty:
+            print(f"  port {port}: no event")
+        sock.close()
+        time.sleep(watcher.interval * 1.3)  # biar close terlihat sebelum listener berikutnya
+    watcher.unsubscribe(on_events)
+    return samples
+
+
+def wait_release(engine, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for item in engine.drain():
+            if isinstance(item, PortRelease):
+                return item
+        time.sleep(0.005)
+    return None
+
+
+def bench_kill(watcher, count):
+    engine = KillEngine(PortSnapshotService(), grace=0.5, listen_watcher=watcher)
+    opened = queue.Queue()
+
+    def on_events(events):
+        for event in events:
+            if event.kind == 'open':
+                opened.put(event)
+
+    watcher.subscribe(on_events)
+    samples = []
+    kill_ms = []
+    for _ in range(count):
+        proc = subprocess.Popen([sys.executable, '-c', CHILD], stdout=subprocess.PIPE, text=True)
+        port_text, listened_at = proc.stdout.readline().split()
+        port, listened_at = int(port_text), float(listened_at)
+
+        # Event bisa sudah masuk sebelum child sempat mencetak port-nya
+        event = None
+        deadline = time.monotonic() + max(2.0, watcher.interval * 3)
+        while event is None and time.monotonic() < deadline:
+            try:
+                candidate = opened.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if candidate.port == port:
+                event = candidate
+        if event is None:
+            print(f"  port {port}: no event")
+        else:
+            target = KillTarget(proc.pid, port, "bench listener", event.timestamp, None)
+            kill_report = engine.kill_now([target], tag='bench', publish=True)
+            kill_ms.append(kill_report.elapsed_ms)
+            release = wait_release(engine, engine.release_timeout + 1.0)
+            if release is None or not release.released:
+                print(f"  port {port}: {release.summary() if release else 'no release report'}")
+            else:
+                released_at = event.timestamp + release.release_ms / 1000.0
+                samples.append((released_at - listened_at) * 1000.0)
+        proc.kill()
+        proc.wait()
+    watcher.unsubscribe(on_events)
+    return samples, kill_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=30)
+    parser.add_argument('--interval', type=float, help='watcher poll interval (default: backend default)')
+    parser.add_argument('--kill', action='store_true', help='measure listen -> port released with KillEngine')
+    args = parser.parse_args()
+
+    watcher = ListenerWatcher(interval=args.interval)
+    watcher.start()
+    mode = "event-driven /proc/net diff" if watcher.event_driven else "psutil polling"
+    print(f"Watcher: {mode}, interval {watcher.interval * 1000:.0f} ms")
+
+    if args.kill:
+        samples, kill_ms = bench_kill(watcher, args.count)
+        report("listen -> port released", samples)
+        report("kill_now() returned   ", kill_ms)
+    else:
+        report("listen -> open event", bench_detect(watcher, args.count))
+    print(f"Scan cost: {watcher.last_scan_ms:.2f} ms per poll, {watcher.polls} polls")
+    watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
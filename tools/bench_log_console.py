@@ -0,0 +1,99 @@
+"""Benchmark: per-line Tk log updates vs the batched LogConsole.
+
+    python tools/bench_log_console.py --lines 200000
+    python tools/bench_log_console.py --lines 20000 --legacy    # old readline + after(0) + update()
+
+A child process floods stdout like ``mosquitto -v`` under load. The
+window reads it either the old way (one ``root.after(0, ...)`` and one
+``update()`` per line) or through LogConsole (block reads, one insert
+per flush, last ``--max-lines`` kept). It reports how long the window
+lagged behind the child, the longest gap between Tk event loop turns
+and the RSS growth of this process. Needs a display.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import scrolledtext
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.log_console import LogConsole
+
+CHILD = """
+import sys, time
+for i in range({lines}):
+    sys.stdout.write(f"1700000000: Received PUBLISH from client-{{i % 500}} (d0, q0, r0, m0, 'sensor/{{i % 97}}/temp', ... (5 bytes))\\n")
+sys.stdout.flush()
+sys.stderr.write(repr(time.monotonic()))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--max-lines', type=int, default=2000)
+    parser.add_argument('--legacy', action='store_true')
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    text = scrolledtext.ScrolledText(root, height=20, width=100)
+    text.pack()
+    process_info = psutil.Process()
+    rss_before = process_info.memory_info().rss
+    child = subprocess.Popen([sys.executable, '-c', CHILD.format(lines=args.lines)],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    state = {"gap": 0.0, "last": time.monotonic(), "shown": 0, "done": None}
+
+    def legacy_append(line):
+        text.insert(tk.END, line)
+        text.see(tk.END)
+        text.update()
+        state["shown"] += 1
+
+    if args.legacy:
+        def reader():
+            for line in iter(child.stdout.readline, b""):
+                root.after(0, legacy_append, line.decode("utf-8", "replace"))
+            root.after(0, state.__setitem__, "done", time.monotonic())
+        console = None
+    else:
+        console = LogConsole(root, text, max_lines=args.max_lines)
+
+        def reader():
+            console.pump(child.stdout)
+            state["done"] = time.monotonic()
+    threading.Thread(target=reader, daemon=True).start()
+
+    def tick():
+        now = time.monotonic()
+        state["gap"] = max(state["gap"], now - state["last"])
+        state["last"] = now
+        if console is not None:
+            state["shown"] = console.buffer.received
+        finished = state["done"] is not None and (console is None or not console.buffer._lines)
+        if finished:
+            root.quit()
+        else:
+            root.after(10, tick)
+
+    root.after(10, tick)
+    root.mainloop()
+    child_end = float(child.stderr.read() or 0.0)
+    lag = time.monotonic() - child_end
+    rss_growth = (process_info.memory_info().rss - rss_before) / 1e6
+    mode = "legacy per-line" if args.legacy else "LogConsole"
+    print(f"{mode}: {args.lines} lines, window caught up {lag:.2f} s after the child finished")
+    print(f"  longest event loop gap {state['gap'] * 1000:.0f} ms, RSS +{rss_growth:.1f} MB, "
+          f"{int(text.index('end-1c').split('.')[0]) - 1} lines in the widget")
+    if console is not None:
+        print(f"  {console.status.get()}, {console.flushes} flushes")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: MosquittoLogParser throughput on synthetic ``mosquitto -v`` output.
+
+    python tools/bench_mosquitto_log.py --lines 500000 --clients 500 --topics 2000
+
+Builds a log with the mix a busy broker prints (connects, subscribes,
+one PUBLISH in and a few PUBLISH out per message, pings) and feeds it
+in 64 KiB-sized blocks like LogConsole.pump does, on one core. Prints
+lines/s and the top clients/topics the parser derived. Then feeds
+--churn clients that connect and drop with a socket error (the way
+mosquitto reports an abrupt disconnect) and checks the online table did
+not grow.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.mosquitto_log import MosquittoLogParser, traffic_summary
+
+
+def synthetic_log(lines, clients, topics, fanout):
+    stamp = 1700000000
+    out = []
+    for i in range(clients):
+        out.append(f"{stamp}: New connection from 127.0.0.1:{40000 + i} on port 1883.")
+        out.append(f"{stamp}: New client connected from 127.0.0.1:{40000 + i} as client-{i} (p2, c1, k60).")
+        out.append(f"{stamp}: Received SUBSCRIBE from client-{i}")
+        out.append(f"{stamp}: \tsensor/{i % topics}/# (QoS 0)")
+        out.append(f"{stamp}: Sending SUBACK to client-{i}")
+    # Distribusi condong: sebagian kecil client/topic membawa sebagian besar trafik
+    while len(out) < lines:
+        client = int(random.paretovariate(1.2)) % clients
+        topic = f"sensor/{int(random.paretovariate(1.2)) % topics}/temp"
+        size = random.randint(4, 200)
+        out.append(f"{stamp}: Received PUBLISH from client-{client} (d0, q0, r0, m0, '{topic}', ... ({size} bytes))")
+        for _ in range(fanout):
+            out.append(f"{stamp}: Sending PUBLISH to client-{random.randrange(clients)} "
+                       f"(d0, q0, r0, m0, '{topic}', ... ({size} bytes))")
+        if random.random() < 0.01:
+            out.append(f"{stamp}: Received PINGREQ from client-{client}")
+            out.append(f"{stamp}: Sending PINGRESP to client-{client}")
+    return out[:lines]
+
+
+def churn_log(clients, stamp=1700000001):
+    out = []
+    for i in range(clients):
+        out.append(f"{stamp}: New client connected from 127.0.0.1:{50000 + i % 10000} as churn-{i} (p2, c1, k60).")
+        out.append(f"{stamp}: Received SUBSCRIBE from churn-{i}")
+        out.append(f"{stamp}: \tchurn/{i} (QoS 0)")
+        out.append(f"{stamp}: Socket error on client churn-{i}, disconnecting.")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=500000)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--fanout', type=int, default=2)
+    parser.add_argument('--block', type=int, default=600, help='lines per feed() call (~64 KiB)')
+    parser.add_argument('--churn', type=int, default=10000, help='clients that connect and drop')
+    args = parser.parse_args()
+
+    lines = synthetic_log(args.lines, args.clients, args.topics, args.fanout)
+    log = MosquittoLogParser()
+    start = time.perf_counter()
+    for i in range(0, len(lines), args.block):
+        log.feed(lines[i:i + args.block])
+    elapsed = time.perf_counter() - start
+    snapshot_start = time.perf_counter()
+    snapshot = log.snapshot()
+    snapshot_ms = (time.perf_counter() - snapshot_start) * 1000
+
+    print(f"{len(lines)} lines in {elapsed:.2f} s -> {len(lines) / elapsed:,.0f} lines/s "
+          f"({elapsed / len(lines) * 1e6:.2f} us/line), snapshot {snapshot_ms:.1f} ms")
+    print(traffic_summary(snapshot))
+    print("top clients:", ", ".join(f"{row.client} {row.in_rate:.0f}/s" for row in snapshot.clients[:5]))
+    print("top topics: ", ", ".join(f"{row.topic} {row.in_rate:.0f}/s" for row in snapshot.topics[:5]))
+
+    online = len(log.online)
+    churn = churn_log(args.churn)
+    for i in range(0, len(churn), args.block):
+        log.feed(churn[i:i + args.block])
+    print(f"churn: {args.churn} connect + socket error -> online {online} -> {len(log.online)}, "
+          f"{len(log.subscriptions)} subscription sets")
+    assert len(log.online) == online, "dropped clients stayed online"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: launch mosquitto once per config profile and compare them.
+
+    python tools/bench_mosquitto_profiles.py --port 28883
+    python tools/bench_mosquitto_profiles.py --profiles low-latency,high-throughput --seconds 5
+    python tools/bench_mosquitto_profiles.py --port 1883 --running      # only the broker already up
+
+For each profile in monitor_core.mosquitto_profiles the script writes the
+generated mosquitto.conf to a temp directory, starts mosquitto with it
+(MOSQUITTO_DIR, then PATH), runs quick_benchmark (QoS 0 latency probes
+then a flood) and stops the broker again. Output is one line per
+profile: throughput, p50/p99 latency and loss.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.broker_bench import quick_benchmark, result_text
+from monitor_core.mosquitto_profiles import PROFILES, write_config
+
+
+def find_mosquitto():
+    directory = os.getenv("MOSQUITTO_DIR")
+    for name in ("mosquitto.exe", "mosquitto"):
+        if directory and os.path.exists(os.path.join(directory, name)):
+            return os.path.join(directory, name)
+    return shutil.which("mosquitto")
+
+
+def wait_listening(port, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=28883)
+    parser.add_argument('--profiles', default=",".join(PROFILES))
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--payload', type=int, default=64)
+    parser.add_argument('--running', action='store_true', help='benchmark the broker already on --port')
+    args = parser.parse_args()
+
+    username = os.getenv("MQTT_USERNAME") or None
+    password = os.getenv("MQTT_PASSWORD")
+    if args.running:
+        print(result_text("running", quick_benchmark("127.0.0.1", args.port, args.seconds, args.payload,
+                                                     username=username, password=password)))
+        return
+
+    mosquitto = find_mosquitto()
+    if not mosquitto:
+        sys.exit("mosquitto not found (set MOSQUITTO_DIR or add it to PATH)")
+    directory = tempfile.mkdtemp(prefix="mosquitto_profiles_")
+    print(f"{mosquitto}, port {args.port}, QoS 0, {args.payload} B payload, {args.seconds:.0f} s flood")
+    for name in args.profiles.split(","):
+        config_path = write_config(name.strip(), args.port, directory)
+        # Output broker dibuang; profil 'verbose' tetap menanggung biaya menulis log
+        process = subprocess.Popen([mosquitto, '-c', config_path],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_listening(args.port):
+                print(f"{name:<16} error: broker did not start")
+                continue
+            print(result_text(name, quick_benchmark("127.0.0.1", args.port, args.seconds, args.payload,
+                                                    username=username, password=password)))
+        finally:
+            process.terminate()
+            process.wait(timeout=5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
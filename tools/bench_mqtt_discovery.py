@@ -0,0 +1,138 @@
+"""Benchmark: concurrent MQTT discovery vs probing listeners one by one.
+
+    python tools/bench_mqtt_discovery.py --listeners 1000
+    python tools/bench_mqtt_discovery.py --listeners 200 --serial
+
+Starts stub listeners on loopback: a quarter accept CONNECT, a quarter
+answer "not authorized", a quarter send garbage and close, and a quarter
+never answer (those cost the full probe timeout). Then sweeps them with
+MqttDiscovery, sweeps again (all cache hits), and scans a closed port
+range. --serial also times the old one-handshake-at-a-time loop.
+Finally checks kill_targets: an anonymous-accepting listener owned by
+mosquitto is a target, the same listener owned by beam.smp (a RabbitMQ
+node) is not.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.mqtt_discovery import MqttDiscovery
+from monitor_core.mqtt_probe import mqtt_handshake
+from monitor_core.mqtt_services import find_mqtt_services, kill_targets
+from monitor_core.port_snapshot import PortSnapshotService
+
+BEHAVIOURS = ('open', 'auth', 'garbage', 'silent')
+
+
+def start_stub_listeners(count):
+    """Start count listeners on one background loop, return [(port, behaviour)]"""
+    ready = threading.Event()
+    listeners = []
+
+    def make_handler(behaviour):
+        async def handle(reader, writer):
+            try:
+                await reader.read(64)
+                if behaviour == 'open':
+                    writer.write(b'\x20\x02\x00\x00')
+                elif behaviour == 'auth':
+                    writer.write(b'\x20\x02\x00\x05')
+                elif behaviour == 'garbage':
+                    writer.write(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+                else:
+                    await asyncio.sleep(30)
+                await writer.drain()
+            except (OSError, asyncio.CancelledError):
+                pass
+            finally:
+                writer.close()
+        return handle
+
+    async def serve():
+        for i in range(count):
+            behaviour = BEHAVIOURS[i % len(BEHAVIOURS)]
+            server = await asyncio.start_server(make_handler(behaviour), '127.0.0.1', 0, backlog=64)
+            listeners.append((server.sockets[0].getsockname()[1], behaviour))
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return listeners
+
+
+class RenamedSnapshot:
+    """PortSnapshot whose listeners on the given ports report another process name"""
+
+    def __init__(self, snapshot, names):
+        self.snapshot = snapshot
+        self.names = names
+
+    def ports(self):
+        return [port for port in self.snapshot.ports() if port in self.names]
+
+    def is_listening(self, port):
+        return self.snapshot.is_listening(port)
+
+    def listeners(self, ports=None):
+        return [listener._replace(name=self.names.get(listener.port, listener.name))
+                for listener in self.snapshot.listeners(ports)]
+
+
+def check_kill_targets(listeners, timeout):
+    """Same anonymous-accepting stubs, once as mosquitto and once as beam.smp"""
+    open_ports = [port for port, behaviour in listeners if behaviour == 'open'][:2]
+    names = dict(zip(open_ports, ('mosquitto', 'beam.smp')))
+    snapshot = RenamedSnapshot(PortSnapshotService(interval=0).refresh(), names)
+    services = find_mqtt_services(snapshot, discovery=MqttDiscovery(timeout=timeout), fingerprint=False)
+    targets = {service['port'] for service in kill_targets(services)}
+    assert len(services) == 2 and all(service['anonymous'] for service in services), services
+    assert targets == {open_ports[0]}, f"kill targets {targets}, expected only {open_ports[0]}"
+    print("Kill targets:     mosquitto listener killable, beam.smp listener spared")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--listeners', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=0.5)
+    parser.add_argument('--range', type=int, default=2000, help='closed ports to range-scan')
+    parser.add_argument('--serial', action='store_true', help='also time one probe at a time')
+    args = parser.parse_args()
+
+    listeners = start_stub_listeners(args.listeners)
+    expected = {port: behaviour for port, behaviour in listeners}
+    targets = [(port, os.getpid()) for port, _ in listeners]
+    discovery = MqttDiscovery(concurrency=args.concurrency, timeout=args.timeout)
+
+    results = discovery.probe(targets)
+    found = sum(1 for r in results.values() if r.is_mqtt)
+    wrong = sum(1 for port, r in results.items()
+                if r.classification != {'garbage': 'other', 'silent': 'other'}.get(expected[port], expected[port]))
+    print(f"Concurrent sweep: {len(targets)} listeners in {discovery.last_sweep_ms:7.0f} ms, "
+          f"{found} MQTT, {wrong} misclassified")
+
+    discovery.probe(targets)
+    print(f"Cached re-sweep:  {len(targets)} listeners in {discovery.last_sweep_ms:7.2f} ms, "
+          f"{discovery.last_probed} probed")
+
+    # Rentang port di atas listener stub; hampir semuanya ditolak (RST) langsung
+    base = 60000
+    discovery.scan_range('127.0.0.1', range(base, base + args.range))
+    print(f"Range scan:       {args.range} ports in {discovery.last_sweep_ms:7.0f} ms")
+
+    if args.serial:
+        start = time.perf_counter()
+        for port, _ in listeners:
+            mqtt_handshake('127.0.0.1', port, timeout=args.timeout)
+        print(f"Serial loop:      {len(targets)} listeners in {(time.perf_counter() - start) * 1000:7.0f} ms")
+
+    check_kill_targets(listeners, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
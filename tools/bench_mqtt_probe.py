@@ -0,0 +1,103 @@
+"""Benchmark: in-process CONNECT/CONNACK probe vs mosquitto_pub subprocess.
+
+    python tools/bench_mqtt_probe.py --port 52345 --count 200
+
+Without --port a tiny stub listener that answers every CONNECT with a
+CONNACK is started, so the in-process side can be measured anywhere. The
+subprocess side needs mosquitto_pub (PATH or MOSQUITTO_DIR) and a real
+broker, and is skipped otherwise.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.mqtt_probe import mqtt_handshake, read_packet
+
+
+def start_stub_broker():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', 0))
+    server.listen(128)
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            try:
+                _, body = read_packet(conn, time.perf_counter() + 1.0)
+                protocol = body[6] if len(body) > 6 else 4
+                conn.sendall(b'\x20\x03\x00\x00\x00' if protocol == 5 else b'\x20\x02\x00\x00')
+            except (OSError, ValueError):
+                pass
+            finally:
+                conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def find_mosquitto_pub():
+    mosquitto_dir = os.getenv("MOSQUITTO_DIR")
+    if mosquitto_dir:
+        for name in ("mosquitto_pub.exe", "mosquitto_pub"):
+            path = os.path.join(mosquitto_dir, name)
+            if os.path.exists(path):
+                return path
+    return shutil.which("mosquitto_pub")
+
+
+def run(label, fn, count):
+    ok = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        if fn():
+            ok += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count / elapsed:10.1f} probes/s  "
+          f"{elapsed / count * 1000:8.3f} ms/probe  ok={ok}/{count}")
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='broker port (default: start a stub listener)')
+    parser.add_argument('--count', type=int, default=200)
+    args = parser.parse_args()
+
+    port = args.port or start_stub_broker()
+    print(f"Target: {args.host}:{port}{'' if args.port else ' (stub)'}")
+
+    fast = run("in-process handshake (3.1.1)",
+               lambda: mqtt_handshake(args.host, port, timeout=2.0).is_mqtt, args.count)
+    run("in-process handshake (5.0)",
+        lambda: mqtt_handshake(args.host, port, timeout=2.0, protocol=5).is_mqtt, args.count)
+
+    pub = find_mosquitto_pub()
+    if not pub or not args.port:
+        print("mosquitto_pub subprocess: skipped (needs mosquitto_pub and a real broker via --port)")
+        return
+
+    cmd = [pub, "-h", args.host, "-p", str(port), "-t", "monitor/test",
+           "-m", "test", "-q", "0", "-i", "bench_client", "-W", "1"]
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+    def spawn():
+        try:
+            return subprocess.run(cmd, capture_output=True, creationflags=flags, timeout=2).returncode == 0
+        except (subprocess.SubprocessError, OSError):
+            return False
+
+    count = max(10, args.count // 10)
+    slow = run("mosquitto_pub subprocess", spawn, count)
+    print(f"Speedup: {fast / slow:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
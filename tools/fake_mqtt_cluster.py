@@ -0,0 +1,201 @@
+"""Fake N-node MQTT cluster with injectable cross-node delay and loss.
+
+    python tools/fake_mqtt_cluster.py --ports 21883-21885                   # serve
+    python tools/fake_mqtt_cluster.py --check --slow 1:3=40 --loss 2:1=0.2  # serve + canary
+
+Every port plays one node; a PUBLISH on any node is routed to matching
+subscribers on every node, like a clustered broker. ``--slow A:B=MS``
+delays messages published on node A before they reach subscribers on
+node B, ``--loss A:B=FRACTION`` drops that share of them (nodes are
+1-based). Only what the monitors need is implemented: CONNECT with a
+QoS 0 last will, QoS 0 SUBSCRIBE/PUBLISH with '+'/'#' filters, retained
+messages, PINGREQ and DISCONNECT. One port is enough as a stand-in
+broker for the push agents (monitor_core.agent).
+--check runs ReplicationCanary against the fake nodes and prints the
+latency/loss matrix it measured.
+"""
+import argparse
+import asyncio
+import os
+import random
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.canary import ReplicationCanary, matrix_lines
+from monitor_core.mqtt_discovery import parse_ports
+from monitor_core.mqtt_probe import PUBLISH, SUBSCRIBE, encode_remaining_length, read_packet_async
+
+PINGREQ = 0xC0
+DISCONNECT = 0xE0
+
+
+def topic_matches(pattern, topic):
+    parts = pattern.split('/')
+    levels = topic.split('/')
+    for i, part in enumerate(parts):
+        if part == '#':
+            return True
+        if i >= len(levels) or (part != '+' and part != levels[i]):
+            return False
+    return len(parts) == len(levels)
+
+
+def parse_pairs(values, cast):
+    """['1:3=40', ...] -> {(0, 2): 40}"""
+    pairs = {}
+    for value in values:
+        pair, _, amount = value.partition('=')
+        src, _, dst = pair.partition(':')
+        pairs[(int(src) - 1, int(dst) - 1)] = cast(amount)
+    return pairs
+
+
+class FakeCluster:
+    """Shared subscription table of all fake nodes"""
+
+    def __init__(self, delays=None, losses=None):
+        self.delays = delays or {}
+        self.losses = losses or {}
+        self.subscriptions = []     # (node, filter, writer)
+        self.retained = {}          # topic -> (node, header, body)
+        self.routed = 0
+        self.dropped = 0
+
+    async def handle(self, node, reader, writer):
+        subscribed = []
+        will = None
+        try:
+            while True:
+                header, body = await read_packet_async(reader)
+                kind = header & 0xF0
+                if kind == 0x10:
+                    will = parse_will(body)
+                    writer.write(b'\x20\x02\x00\x00')
+                elif kind == SUBSCRIBE & 0xF0:
+                    packet_id = body[:2]
+                    length = struct.unpack_from('!H', body, 2)[0]
+                    pattern = body[4:4 + length].decode('utf-8')
+                    entry = (node, pattern, writer)
+                    self.subscriptions.append(entry)
+                    subscribed.append(entry)
+                    writer.write(b'\x90\x03' + packet_id + b'\x00')
+                    for topic, (src, retained_header, retained_body) in list(self.retained.items()):
+                        if topic_matches(pattern, topic):
+                            self.deliver(src, node, writer, retained_header, retained_body)
+                elif kind == PUBLISH:
+                    length = struct.unpack_from('!H', body, 0)[0]
+                    self.route(node, body[2:2 + length].decode('utf-8'), header, body)
+                elif kind == PINGREQ:
+                    writer.write(b'\xd0\x00')
+                elif kind == DISCONNECT:
+                    will = None
+                    break
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for entry in subscribed:
+                self.subscriptions.remove(entry)
+            writer.close()
+            if will is not None:
+                topic, payload, retain = will
+                self.route(node, topic, PUBLISH | (0x01 if retain else 0),
+                           struct.pack('!H', len(topic)) + topic.encode('utf-8') + payload)
+
+    def route(self, src, topic, header, body):
+        if header & 0x01:
+            # Retained: payload kosong menghapus; yang diteruskan ke subscriber tanpa flag retain
+            length = struct.unpack_from('!H', body, 0)[0]
+            if len(body) > 2 + length:
+                self.retained[topic] = (src, header, body)
+            else:
+                self.retained.pop(topic, None)
+            header &= ~0x01
+        for dst, pattern, writer in list(self.subscriptions):
+            if topic_matches(pattern, topic):
+                self.deliver(src, dst, writer, header, body)
+
+    def deliver(self, src, dst, writer, header, body):
+        if random.random() < self.losses.get((src, dst), 0.0):
+            self.dropped += 1
+            return
+        self.routed += 1
+        packet = bytes([header]) + encode_remaining_length(len(body)) + body
+        delay = self.delays.get((src, dst), 0.0) / 1000.0
+        if delay:
+            asyncio.get_running_loop().call_later(delay, _write, writer, packet)
+        else:
+            _write(writer, packet)
+
+
+def parse_will(body):
+    """(topic, payload, retain) of a 3.1.1 CONNECT's last will, or None"""
+    flags = body[7]
+    if not flags & 0x04:
+        return None
+    index = 10 + 2 + struct.unpack_from('!H', body, 10)[0]     # lewati client id
+    length = struct.unpack_from('!H', body, index)[0]
+    topic = body[index + 2:index + 2 + length].decode('utf-8')
+    index += 2 + length
+    length = struct.unpack_from('!H', body, index)[0]
+    return topic, body[index + 2:index + 2 + length], bool(flags & 0x20)
+
+
+def _write(writer, packet):
+    if not writer.is_closing():
+        writer.write(packet)
+
+
+def serve(cluster, ports, host="127.0.0.1"):
+    """Start one listener per port on a background loop"""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        for node, port in enumerate(ports):
+            loop.run_until_complete(asyncio.start_server(
+                lambda r, w, node=node: cluster.handle(node, r, w), host, port))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', default="21883,21884,21885")
+    parser.add_argument('--slow', action='append', default=[], help='A:B=MS extra delay from node A to B')
+    parser.add_argument('--loss', action='append', default=[], help='A:B=FRACTION dropped from node A to B')
+    parser.add_argument('--check', action='store_true', help='run the replication canary and print the matrix')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=0.2)
+    args = parser.parse_args()
+
+    ports = parse_ports(args.ports)
+    cluster = FakeCluster(parse_pairs(args.slow, float), parse_pairs(args.loss, float))
+    serve(cluster, ports)
+    print(f"Fake MQTT cluster: {len(ports)} nodes on {args.ports}")
+
+    if not args.check:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            return
+
+    nodes = [{"name": f"Node {i + 1}", "host": "127.0.0.1", "mqtt_port": port} for i, port in enumerate(ports)]
+    canary = ReplicationCanary(nodes, interval=args.interval, loss_after=1.0)
+    canary.start()
+    time.sleep(args.seconds)
+    snapshot = canary.snapshot()
+    canary.stop()
+    print("\n".join(matrix_lines(snapshot)))
+    print(f"{snapshot.sent} probes sent, {cluster.routed} delivered, {cluster.dropped} dropped by the fake")
+
+
+if __name__ == "__main__":
+    main()
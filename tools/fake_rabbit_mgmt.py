@@ -0,0 +1,225 @@
+"""Fake RabbitMQ management API serving canned JSON, for testing the poller.
+
+    python tools/fake_rabbit_mgmt.py --ports 15672,15673,15674       # serve
+    python tools/fake_rabbit_mgmt.py --check --polls 20              # serve + poll
+    python tools/fake_rabbit_mgmt.py --check --ports 20000-20099     # 100 nodes
+
+Each port plays one node of the cluster (rabbit@node1..N) and
+answers /api/overview, /api/nodes and /api/queues with HTTP/1.1
+keep-alive, honouring ?columns= the way the real plugin does (dotted
+paths into nested objects). Credentials are guest/guest. Queue depths
+and rates drift on every request so the GUI has something to show.
+--check runs ManagementPoller against the fake nodes and reports the
+poll time, response sizes and how many TCP connections were opened.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitor_core.mqtt_discovery import parse_ports
+from monitor_core.rabbit_mgmt import ManagementPoller
+
+AUTH = "Basic " + base64.b64encode(b"guest:guest").decode('ascii')
+
+
+def node_names(count):
+    return tuple(f"rabbit@node{i + 1}" for i in range(count))
+
+
+def make_queues(count, names):
+    queues = []
+    for i in range(count):
+        queues.append({
+            "name": f"mqtt-subscription-client{i}qos1", "vhost": "/",
+            "node": names[i % len(names)],
+            "durable": True, "auto_delete": False, "arguments": {"x-queue-type": "classic"},
+            "consumers": 1, "memory": 10_000 + i, "state": "running",
+            "messages": 0, "messages_ready": 0, "messages_unacknowledged": 0,
+            "message_stats": {"publish": 0, "publish_details": {"rate": 0.0},
+                              "deliver_get": 0, "deliver_get_details": {"rate": 0.0}},
+            "backing_queue_status": {"mode": "default", "q1": 0, "q2": 0, "q3": 0, "q4": 0,
+                                     "len": 0, "target_ram_count": "infinity"},
+        })
+    return queues
+
+
+class Cluster:
+    """Shared state of the fake cluster"""
+
+    def __init__(self, queue_count, node_count=3):
+        self.lock = threading.Lock()
+        self.node_names = node_names(node_count)
+        self.queues = make_queues(queue_count, self.node_names)
+        self.connections = 0
+        self.requests = 0
+
+    def drift(self):
+        with self.lock:
+            for queue in self.queues:
+                ready = max(0, queue["messages_ready"] + random.randint(-5, 8))
+                unacked = random.randint(0, 3)
+                queue["messages_ready"] = ready
+                queue["messages_unacknowledged"] = unacked
+                queue["messages"] = ready + unacked
+                queue["message_stats"]["publish_details"]["rate"] = round(random.uniform(0, 50), 1)
+                queue["message_stats"]["deliver_get_details"]["rate"] = round(random.uniform(0, 50), 1)
+
+    def overview(self, node):
+        with self.lock:
+            total = sum(q["messages"] for q in self.queues)
+        return {
+            "node": node, "cluster_name": "rabbit@node1", "rabbitmq_version": "3.13.7",
+            "erlang_version": "26.2.5", "management_version": "3.13.7",
+            "message_stats": {"publish_details": {"rate": 120.0}, "deliver_get_details": {"rate": 118.5}},
+            "queue_totals": {"messages": total, "messages_ready": total, "messages_unacknowledged": 0},
+            "object_totals": {"queues": len(self.queues), "connections": 12, "channels": 12,
+                              "consumers": len(self.queues), "exchanges": 8},
+            "listeners": [{"node": n, "protocol": p, "port": port}
+                          for n in self.node_names for p, port in (("amqp", 5672), ("mqtt", 1883))],
+        }
+
+    def nodes(self):
+        return [{
+            "name": name, "running": True, "type": "disc",
+            "mem_used": 120_000_000 + i * 7_000_000, "mem_limit": 6_000_000_000,
+            "mem_alarm": i == 2 and random.random() < 0.2,
+            "disk_free_alarm": False, "disk_free": 50_000_000_000,
+            "fd_used": 60 + i * 10, "fd_total": 1_048_576,
+            "sockets_used": 12, "sockets_total": 943_626, "uptime": 3_600_000,
+            "applications": [{"name": "rabbit", "version": "3.13.7"}] * 20,
+            "exchange_types": [{"name": "direct"}, {"name": "fanout"}, {"name": "topic"}],
+        } for i, name in enumerate(self.node_names)]
+
+
+def select_columns(item, columns):
+    """Keep only the dotted column paths, like the management plugin"""
+    out = {}
+    for column in columns:
+        src, dst = item, out
+        parts = column.split('.')
+        for part in parts[:-1]:
+            if not isinstance(src, dict) or part not in src:
+                break
+            src = src[part]
+            dst = dst.setdefault(part, {})
+        else:
+            if isinstance(src, dict) and parts[-1] in src:
+                dst[parts[-1]] = src[parts[-1]]
+    return out
+
+
+def make_handler(cluster, node):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive
+
+        def setup(self):
+            super().setup()
+            with cluster.lock:
+                cluster.connections += 1
+
+        def do_GET(self):
+            if self.headers.get("Authorization") != AUTH:
+                self.reply(401, {"error": "not_authorised", "reason": "Login failed"})
+                return
+            url = urlsplit(self.path)
+            columns = parse_qs(url.query).get("columns", [""])[0].split(",")
+            columns = [c for c in columns if c]
+            with cluster.lock:
+                cluster.requests += 1
+            if url.path == "/api/overview":
+                data = cluster.overview(node)
+            elif url.path == "/api/nodes":
+                data = cluster.nodes()
+            elif url.path == "/api/queues":
+                cluster.drift()
+                with cluster.lock:
+                    data = json.loads(json.dumps(cluster.queues))
+            else:
+                self.reply(404, {"error": "Object Not Found", "reason": "Not Found"})
+                return
+            if columns:
+                data = ([select_columns(item, columns) for item in data] if isinstance(data, list)
+                        else select_columns(data, columns))
+            self.reply(200, data)
+
+        def reply(self, status, data):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(cluster, ports, host="127.0.0.1"):
+    servers = []
+    for port, node in zip(ports, cluster.node_names):
+        server = ThreadingHTTPServer((host, port), make_handler(cluster, node))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', default="15672,15673,15674")
+    parser.add_argument('--queues', type=int, default=200)
+    parser.add_argument('--check', action='store_true', help='poll the fake nodes and report')
+    parser.add_argument('--polls', type=int, default=10)
+    args = parser.parse_args()
+
+    ports = parse_ports(args.ports)
+    cluster = Cluster(args.queues, len(ports))
+    servers = serve(cluster, ports)
+    print(f"Fake management API: {', '.join(f'{n} on :{p}' for n, p in zip(cluster.node_names[:5], ports))}"
+          f"{f' ... ({len(ports)} nodes)' if len(ports) > 5 else ''}")
+
+    if not args.check:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            return
+
+    nodes = [{"name": f"Node {i + 1}", "host": "127.0.0.1", "mgmt_port": port} for i, port in enumerate(ports)]
+    poller = ManagementPoller(nodes)
+    times = []
+    status = None
+    for _ in range(args.polls):
+        status = poller.poll()
+        times.append(status.elapsed_ms)
+    poller.close()
+
+    for node in status.nodes[:5]:
+        print(f"  {node.name}: {node.node_name} up={node.running} queues={node.queues} "
+              f"msgs={node.messages} pub {node.publish_rate:.1f}/s del {node.deliver_rate:.1f}/s "
+              f"mem {node.mem_used / 1e6:.0f}/{node.mem_limit / 1e6:.0f} MB alarm={node.mem_alarm} "
+              f"fd {node.fd_used}/{node.fd_total}")
+    print(f"Top queue: {status.top_queues[0].name} ({status.top_queues[0].messages} msgs)")
+    times.sort()
+    print(f"{args.polls} polls: median {times[len(times) // 2]:.1f} ms, max {times[-1]:.1f} ms; "
+          f"{status.requests} requests, {status.response_bytes / status.requests:.0f} B/response, "
+          f"{status.connections_opened} connections opened (server saw {cluster.connections})")
+
+    full = len(json.dumps(cluster.queues))
+    print(f"/api/queues without columns= would be ~{full} B per node")
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()